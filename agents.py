@@ -1,16 +1,71 @@
-import json
 from datetime import datetime
-from aws_services import invoke_claude_sonnet
+from aws_services import invoke_claude, invoke_claude_stream
+from config import config
+from json_stream import IncrementalJSONParser
+from monitoring import llm_usage_monitor
+from structured_output import (
+    ALERT_SCHEMA, COGNITIVE_SCHEMA, EMOTION_SCHEMA, conforms_to, extract_json_object, parse_structured_output,
+    validate_schema
+)
+
+
+def estimate_tokens(text):
+    """Rough token estimate (~4 characters per token) for savings accounting."""
+    return max(1, len(text or "") // 4)
+
+
+def invoke_agent(agent_name, prompt, max_tokens=1024, on_field=None, cache_if=None):
+    """
+    Invokes Claude for an agent and records the call's token usage and latency.
+    Agents listed in config.ai.cache_excluded_agents bypass the response cache,
+    and with cache_if only completions it accepts (e.g. ones that validate
+    against the agent's schema) are cached.
+    With on_field, the response is streamed and on_field(path, value) is called
+    for each JSON field as soon as it has been decoded.
+    """
+    use_cache = agent_name not in config.ai.cache_excluded_agents
+    if on_field:
+        parser = IncrementalJSONParser(on_field)
+        result = invoke_claude_stream(prompt, max_tokens=max_tokens, on_text=parser.feed, use_cache=use_cache,
+                                      cache_if=cache_if)
+    else:
+        result = invoke_claude(prompt, max_tokens=max_tokens, use_cache=use_cache, cache_if=cache_if)
+    if not result:
+        return None
+    if result.get('cached'):
+        llm_usage_monitor.record_cache_hit(agent_name)
+        return result
+    usage = result.get('usage') or {}
+    llm_usage_monitor.record_call(
+        agent_name,
+        usage.get('input_tokens', estimate_tokens(prompt)),
+        usage.get('output_tokens', estimate_tokens(result['text'])),
+        result.get('latency', 0.0)
+    )
+    return result
+
+
+def parse_agent_response(agent_name, result, schema):
+    """Validates an agent's completion, allowing one repair call through the same agent."""
+    def repair(prompt):
+        repaired = invoke_agent(agent_name, prompt, cache_if=conforms_to(schema))
+        return repaired['text'] if repaired else None
+
+    if not result:
+        return {"error": "model_unavailable"}
+    return parse_structured_output(agent_name, result['text'], schema, repair=repair)
 
 
 class EmotionAgent:
     """Agent for analyzing emotional tone and sentiment."""
 
+    SCHEMA = EMOTION_SCHEMA
+
     def __init__(self):
         pass
 
-    def analyze_emotion(self, transcript, user_context=""):
-        prompt = f"""
+    def build_prompt(self, transcript, user_context=""):
+        return f"""
         You are an AI wellness assistant analyzing emotional health.
         Consider the user's context: {user_context}
 
@@ -33,25 +88,28 @@ class EmotionAgent:
             "timestamp": "{datetime.utcnow().isoformat()}"
         }}
         """
-        response = invoke_claude_sonnet(prompt)
-        return self.safe_json_parse(response)
+
+    def analyze_emotion(self, transcript, user_context="", on_field=None):
+        result = invoke_agent("emotion", self.build_prompt(transcript, user_context), on_field=on_field,
+                              cache_if=conforms_to(self.SCHEMA))
+        return parse_agent_response("emotion", result, self.SCHEMA)
 
     @staticmethod
     def safe_json_parse(response):
-        try:
-            return json.loads(response)
-        except json.JSONDecodeError:
-            return {"error": "malformed_json", "raw": response}
+        document, _ = extract_json_object(response)
+        return document if document is not None else {"error": "malformed_json", "raw": response}
 
 
 class MemoryAgent:
     """Agent for analyzing cognitive patterns and memory indicators."""
 
+    SCHEMA = COGNITIVE_SCHEMA
+
     def __init__(self):
         pass
 
-    def analyze_cognitive_patterns(self, transcript, user_context=""):
-        prompt = f"""
+    def build_prompt(self, transcript, user_context=""):
+        return f"""
         You are an AI cognitive health assistant analyzing memory and cognitive patterns.
         Consider the user's context: {user_context}
 
@@ -75,25 +133,27 @@ class MemoryAgent:
             "timestamp": "{datetime.utcnow().isoformat()}"
         }}
         """
-        response = invoke_claude_sonnet(prompt)
-        return self.safe_json_parse(response)
+
+    def analyze_cognitive_patterns(self, transcript, user_context=""):
+        result = invoke_agent("memory", self.build_prompt(transcript, user_context), cache_if=conforms_to(self.SCHEMA))
+        return parse_agent_response("memory", result, self.SCHEMA)
 
     @staticmethod
     def safe_json_parse(response):
-        try:
-            return json.loads(response)
-        except json.JSONDecodeError:
-            return {"error": "malformed_json", "raw": response}
+        document, _ = extract_json_object(response)
+        return document if document is not None else {"error": "malformed_json", "raw": response}
 
 
 class AlertAgent:
     """Agent for evaluating when caregiver alerts should be sent."""
 
+    SCHEMA = ALERT_SCHEMA
+
     def __init__(self):
         pass
 
-    def evaluate_alert_conditions(self, emotion_analysis, cognitive_analysis, recent_scores, user_context=""):
-        prompt = f"""
+    def build_prompt(self, emotion_analysis, cognitive_analysis, recent_scores, user_context=""):
+        return f"""
         You are an AI caregiver alert assistant. Review the user's emotional and cognitive health, and decide if an alert is needed.
 
         Emotion Analysis: {emotion_analysis}
@@ -115,12 +175,168 @@ class AlertAgent:
             "timestamp": "{datetime.utcnow().isoformat()}"
         }}
         """
-        response = invoke_claude_sonnet(prompt)
-        return self.safe_json_parse(response)
+
+    def evaluate_alert_conditions(self, emotion_analysis, cognitive_analysis, recent_scores, user_context=""):
+        prompt = self.build_prompt(emotion_analysis, cognitive_analysis, recent_scores, user_context)
+        result = invoke_agent("alert", prompt, cache_if=conforms_to(self.SCHEMA))
+        return parse_agent_response("alert", result, self.SCHEMA)
 
     @staticmethod
     def safe_json_parse(response):
-        try:
-            return json.loads(response)
-        except json.JSONDecodeError:
-            return {"error": "malformed_json", "raw": response}
+        document, _ = extract_json_object(response)
+        return document if document is not None else {"error": "malformed_json", "raw": response}
+
+
+class CombinedAnalysisAgent:
+    """
+    Agent that produces the emotion, cognitive and alert analyses in a single
+    model call, so the transcript is sent (and paid for) once instead of once
+    per agent.
+    """
+
+    SECTIONS = {
+        "emotion": EmotionAgent,
+        "cognitive": MemoryAgent,
+        "alert": AlertAgent,
+    }
+
+    def __init__(self, emotion_agent=None, memory_agent=None, alert_agent=None):
+        self.agents = {
+            "emotion": emotion_agent or EmotionAgent(),
+            "cognitive": memory_agent or MemoryAgent(),
+            "alert": alert_agent or AlertAgent(),
+        }
+
+    def build_prompt(self, transcript, user_context="", recent_scores=None, sections=("emotion", "cognitive", "alert")):
+        schemas = {
+            "emotion": """"emotion": {
+                "primary_emotion": "emotion_name",
+                "confidence": 0.85,
+                "intensity": 7,
+                "stability": "stable/unstable",
+                "concerning_patterns": ["pattern1", "pattern2"],
+                "summary": "brief emotional summary"
+            }""",
+            "cognitive": """"cognitive": {
+                "lexical_diversity": 0.75,
+                "sentence_fluency": 0.8,
+                "repetition_score": 0.2,
+                "memory_indicators": ["indicator1", "indicator2"],
+                "cognitive_concerns": ["concern1"],
+                "overall_cognitive_health": "good/moderate/concerning"
+            }""",
+            "alert": """"alert": {
+                "alert_needed": true/false,
+                "alert_reason": "brief reason",
+                "urgency": "low/medium/high",
+                "recommended_action": "brief advice for caregiver"
+            }""",
+        }
+        tasks = {
+            "emotion": "- emotion: primary emotion (happy, sad, anxious, lonely, confused, angry, calm, etc.), intensity (1-10), stability and concerning emotional patterns",
+            "cognitive": "- cognitive: lexical diversity, sentence fluency and coherence, repetition patterns, memory-related indicators and signs of cognitive decline",
+            "alert": """- alert: based on your emotion and cognitive findings and the recent scores, decide if a caregiver alert is needed. Alert when:
+          * Cognora Score < 50 for 3 consecutive days
+          * Emotion is "lonely" or "hopeless" for 2 consecutive days
+          * Severe cognitive decline or instability
+          * Emotional intensity >= 8 and stability is unstable""",
+        }
+        task_lines = "\n        ".join(tasks[section] for section in sections)
+        schema_lines = ",\n            ".join(schemas[section] for section in sections)
+        return f"""
+        You are an AI wellness assistant analyzing a user's emotional and cognitive health.
+        Consider the user's context: {user_context}
+        Recent Scores (last 3 days): {recent_scores if recent_scores else "not available"}
+
+        Analyze the following transcript and produce these sections:
+        {task_lines}
+
+        Transcript: {transcript}
+
+        Return a single strict JSON object with exactly these sections:
+        {{
+            {schema_lines}
+        }}
+        """
+
+    def analyze(self, transcript, user_context="", recent_scores=None, sections=("emotion", "cognitive", "alert"),
+                on_field=None):
+        """
+        Runs the combined analysis.
+
+        Args:
+            transcript: The user's transcript
+            user_context: Extra context for the model
+            recent_scores: Recent Cognora Scores for the alert section
+            sections: Which of "emotion", "cognitive" and "alert" to request
+            on_field: Stream the response, calling on_field(path, value) per decoded field
+
+        Returns:
+            Dictionary mapping each requested section to its analysis, or None if
+            the call failed or the response did not validate (callers then fall
+            back to the separate agents)
+        """
+        sections = tuple(sections)
+        prompt = self.build_prompt(transcript, user_context, recent_scores, sections)
+        result = invoke_agent("combined", prompt, max_tokens=1024 * len(sections), on_field=on_field,
+                              cache_if=lambda text: self._extract_sections(text, sections)[0] is not None)
+        parsed = self.validate(result['text'] if result else None, sections)
+        if parsed is None:
+            print("WARNING: Combined analysis failed validation, falling back to separate agent calls")
+            llm_usage_monitor.record_combined_failure()
+            return None
+
+        self._record_savings(prompt, result, transcript, user_context, recent_scores, parsed, sections)
+        return parsed
+
+    def validate(self, response, sections):
+        """
+        Extracts the combined JSON document and validates every section against its
+        agent's schema. No repair call is made here: the separate agents are the fallback.
+        """
+        parsed, extracted = self._extract_sections(response, sections)
+        if parsed is None:
+            llm_usage_monitor.record_parse("combined", "failed")
+            return None
+        llm_usage_monitor.record_parse("combined", "extracted" if extracted else "ok")
+        return parsed
+
+    def _extract_sections(self, response, sections):
+        """Returns (validated sections or None, extracted) without recording metrics."""
+        document, extracted = extract_json_object(response)
+        if document is None:
+            return None, extracted
+
+        parsed = {}
+        for section in sections:
+            analysis = document.get(section)
+            if not isinstance(analysis, dict) or validate_schema(analysis, self.SECTIONS[section].SCHEMA):
+                return None, extracted
+            analysis.setdefault("timestamp", datetime.utcnow().isoformat())
+            parsed[section] = analysis
+        return parsed, extracted
+
+    def _record_savings(self, prompt, result, transcript, user_context, recent_scores, parsed, sections):
+        # What the separate agents would have sent, calibrated by the combined prompt's actual usage
+        separate_prompts = []
+        if "emotion" in sections:
+            separate_prompts.append(self.agents["emotion"].build_prompt(transcript, user_context))
+        if "cognitive" in sections:
+            separate_prompts.append(self.agents["cognitive"].build_prompt(transcript, user_context))
+        if "alert" in sections:
+            separate_prompts.append(self.agents["alert"].build_prompt(
+                parsed.get("emotion"), parsed.get("cognitive"), recent_scores, user_context
+            ))
+        actual_input = (result.get('usage') or {}).get('input_tokens', estimate_tokens(prompt))
+        calibration = actual_input / estimate_tokens(prompt)
+        separate_input = int(sum(estimate_tokens(p) for p in separate_prompts) * calibration)
+
+        agent_names = {"emotion": "emotion", "cognitive": "memory", "alert": "alert"}
+        averages = [llm_usage_monitor.average_latency(agent_names[section]) for section in sections]
+        latency_saved = sum(averages) - result.get('latency', 0.0) if all(a is not None for a in averages) else None
+
+        llm_usage_monitor.record_combined_savings(
+            calls_saved=len(sections) - 1,
+            input_tokens_saved=max(0, separate_input - actual_input),
+            latency_saved=latency_saved
+        )
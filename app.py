@@ -8,6 +8,7 @@ import tempfile
 import os
 import io
 from decimal import Decimal
+from concurrent.futures import wait as future_wait
 
 # Import production modules
 from config import config
@@ -24,16 +25,27 @@ from utils import (
 from agents import EmotionAgent, MemoryAgent, AlertAgent
 from scoring import calculate_cognora_score, get_score_color, get_score_emoji
 from storage import data_manager, report_generator, alert_manager
-from aws_services import transcribe_audio, send_alert, transcribe_audio_file
+from aws_services import transcribe_audio, send_alert, transcribe_audio_file_async, check_aws_connectivity
+from metrics_cache import cached_analyze_cognitive_metrics
 from nlp_metrics import analyze_cognitive_metrics
-from audio_recorder import get_audio_input_method
+from nlp_models import warm_up as warm_up_nlp_model
+from orchestrator import AnalysisOrchestrator
+from audio_recorder import get_audio_input_method, normalize_audio
+from chunked_transcription import audio_duration, transcribe_chunked
 from login_signup import check_authentication, show_user_profile, show_logout
 from auth import initialize_auth
 
+# Load the shared SpaCy model in the background while the first page renders
+warm_up_nlp_model(background=True)
+
+# Check AWS connectivity once per process; the health checks refresh it on their schedule
+check_aws_connectivity(max_age=float('inf'))
+
 # Initialize agents
 emotion_agent = EmotionAgent()
 memory_agent = MemoryAgent()
 alert_agent = AlertAgent()
+analysis_orchestrator = AnalysisOrchestrator(emotion_agent, memory_agent, alert_agent)
 
 def safe_convert_decimal(value):
     """Safely convert Decimal types to regular Python types."""
@@ -361,6 +373,11 @@ def show_dashboard(user_id, lang_code):
                 if latest_text_entry and latest_voice_entry:
                     break
             
+            # History is loaded without transcripts; fetch just the ones shown
+            data_manager_instance.attach_transcripts(
+                user_id, [entry for entry in (latest_text_entry, latest_voice_entry) if entry]
+            )
+            
             # Display text entry
             if latest_text_entry:
                 st.markdown(f"📝 **{get_text('latest_text_entry', lang_code)}**")
@@ -528,6 +545,7 @@ def show_dashboard(user_id, lang_code):
         
         # Show last 5 entries in chronological order
         recent_entries = sorted(user_history[:5], key=lambda x: x.get('date', ''), reverse=True)
+        data_manager_instance.attach_transcripts(user_id, recent_entries)
         
         for i, entry in enumerate(recent_entries):
             date = entry.get('date', 'Unknown')
@@ -600,9 +618,8 @@ def show_dashboard(user_id, lang_code):
         
         with col1:
             if st.button("Test AWS Connection"):
-                from aws_services import test_aws_connection
                 with st.spinner("Testing AWS connection..."):
-                    test_aws_connection()
+                    check_aws_connectivity(force=True)
                 st.success("AWS connection test completed. Check console for details.")
             
             if st.button("Test Data Manager"):
@@ -674,7 +691,7 @@ def show_dashboard(user_id, lang_code):
                 try:
                     # Test the complete pipeline
                     emotion_analysis = emotion_agent.analyze_emotion(test_text)
-                    cognitive_metrics = analyze_cognitive_metrics(test_text)
+                    cognitive_metrics = cached_analyze_cognitive_metrics(test_text)
                     score_data = calculate_cognora_score(emotion_analysis, cognitive_metrics)
                     
                     st.write("**Analysis Results:**")
@@ -748,6 +765,15 @@ def show_text_input(user_id, lang_code):
         key="daily_checkin_text"
     )
     
+    # Live preview uses the fast metrics tier (tokenizer + word vectors, no parser)
+    if user_text.strip() and config.is_feature_enabled("fast_metrics_preview"):
+        preview = analyze_cognitive_metrics(user_text, tier="fast")
+        st.caption(get_text('live_preview', lang_code).format(
+            words=preview['word_count'],
+            sentences=preview['sentence_count'],
+            diversity=preview['lexical_diversity']
+        ))
+    
     # Sample prompts
     with st.expander(f"💡 {get_text('need_inspiration', lang_code)}"):
         st.markdown(f"""
@@ -886,24 +912,52 @@ def show_voice_input(user_id, lang_code):
     - 📱 **Use headphones** with a built-in microphone for better quality
     """)
 
+STREAMED_EMOTION_FIELDS = ('primary_emotion', 'confidence', 'intensity', 'stability', 'summary')
+
+def stream_analysis(text, lang_code, **kwargs):
+    """Runs the analysis, showing emotion fields as soon as the model streams them."""
+    placeholder = st.empty()
+    fields = {}
+    analysis = None
+    for kind, path, value in analysis_orchestrator.stream(text, **kwargs):
+        if kind == "result":
+            analysis = value
+            continue
+        # Top-level fields come from the EmotionAgent, nested ones from the combined prompt
+        if path[-1] in STREAMED_EMOTION_FIELDS and (len(path) == 1 or path[0] == "emotion"):
+            fields[path[-1]] = value
+            lines = [f"- **{name.replace('_', ' ').title()}**: {fields[name]}"
+                     for name in STREAMED_EMOTION_FIELDS if name in fields]
+            placeholder.info(f"💭 {get_text('streaming_emotion', lang_code)}\n\n" + "\n".join(lines))
+    placeholder.empty()
+    return analysis
+
 def analyze_user_input(user_id, text, lang_code, source='text'):
     """Analyzes user input and displays results."""
     with st.spinner(f"🤖 {get_text('momo_analyzing', lang_code)}"):
         try:
-            # Analyze emotions
-            emotion_analysis = emotion_agent.analyze_emotion(text)
-            
-            # Analyze cognitive metrics
-            cognitive_metrics = analyze_cognitive_metrics(text)
+            # Analyze emotions and cognitive metrics concurrently. Only the emotion
+            # analysis is used here, so no memory or alert sections are requested
+            # (the combined prompt mode only applies when several are needed)
+            if config.features.get("streaming_analysis", False):
+                analysis = stream_analysis(text, lang_code)
+            else:
+                analysis = analysis_orchestrator.analyze(text)
+            emotion_analysis = analysis['emotion_analysis']
+            cognitive_metrics = analysis['cognitive_metrics']
             
             # Calculate Cognora score
             score_data = calculate_cognora_score(emotion_analysis, cognitive_metrics)
+            if "error" in emotion_analysis or "error" in cognitive_metrics:
+                st.warning(f"⚠️ {get_text('analysis_incomplete', lang_code)}")
             
             # Store results in session state for later use
             st.session_state['analysis_results'] = {
                 'text': text,
                 'emotion_analysis': emotion_analysis,
                 'cognitive_metrics': cognitive_metrics,
+                'memory_analysis': analysis['memory_analysis'],
+                'alert_analysis': analysis['alert_analysis'],
                 'score_data': score_data
             }
             
@@ -922,12 +976,45 @@ def transcribe_and_analyze(user_id, audio_data, lang_code):
             # Handle different types of audio data
             if hasattr(audio_data, 'name'):
                 # File upload - use existing transcribe function
-                transcript = transcribe_audio_file(audio_data)
+                audio_file = audio_data
             else:
                 # Microphone recording - convert bytes to file-like object
                 audio_file = io.BytesIO(audio_data)
                 audio_file.name = "microphone_recording.wav"
-                transcript = transcribe_audio_file(audio_file)
+            
+            if config.transcription.normalize_audio:
+                # Local backends read WAV, so only transcode to FLAC for AWS Transcribe
+                audio_file, audio_stats = normalize_audio(
+                    audio_file,
+                    to_flac=config.transcription.transcode_flac and config.transcription.backend == "aws"
+                )
+                if audio_stats['normalized']:
+                    st.caption(
+                        f"🎚️ Audio optimized: {audio_stats['bytes_saved'] / 1024:.0f} KB and "
+                        f"{audio_stats['seconds_saved']:.1f}s of silence removed"
+                    )
+            
+            duration = audio_duration(audio_file)
+            if config.features.get("chunked_transcription") and duration and duration >= config.transcription.chunk_min_seconds:
+                # Long recordings are split at silences and transcribed as concurrent segments
+                progress_bar = st.progress(0.0)
+
+                def show_progress(completed, total):
+                    progress_bar.progress(completed / total, text=f"🧩 {completed}/{total}")
+
+                transcript = transcribe_chunked(audio_file, on_progress=show_progress)
+                progress_bar.empty()
+            else:
+                # The job is waited for on a worker thread; keep the page responsive meanwhile
+                future = transcribe_audio_file_async(audio_file)
+                progress = st.empty()
+                started = datetime.now()
+                while not future.done():
+                    elapsed = (datetime.now() - started).total_seconds()
+                    progress.caption(f"⏳ {elapsed:.0f}s")
+                    future_wait([future], timeout=0.5)
+                progress.empty()
+                transcript = future.result()
             
             if transcript:
                 st.success(f"✅ {get_text('audio_transcribed', lang_code)}")
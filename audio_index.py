@@ -0,0 +1,177 @@
+"""
+Audio Deduplication Index for Cognora+
+Content-addressed index of uploaded audio. Each entry maps the SHA-256 digest
+of a clip to the S3 key it was uploaded under and its finished transcript, so
+re-uploading the same recording (e.g. after the record-download-upload flow)
+returns the transcript instantly instead of starting another Transcribe job.
+Transcripts are keyed by digest, language and backend chain, so changing
+either transcribes the clip again. Held in an in-memory LRU tier backed by an
+on-disk SQLite tier readable only by the app user; entries expire after
+AUDIO_DEDUP_TTL_SECONDS.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from config import config
+
+HASH_CHUNK_BYTES = 1024 * 1024
+
+def audio_digest(audio) -> str:
+    """
+    SHA-256 of a clip's bytes, read in chunks so large uploads are not copied.
+    File-like objects are rewound before and after hashing.
+    """
+    digest = hashlib.sha256()
+    if isinstance(audio, (bytes, bytearray, memoryview)):
+        digest.update(audio)
+        return digest.hexdigest()
+    audio.seek(0)
+    while True:
+        chunk = audio.read(HASH_CHUNK_BYTES)
+        if not chunk:
+            break
+        digest.update(chunk)
+    audio.seek(0)
+    return digest.hexdigest()
+
+def transcript_key(digest: str, backends: Optional[List[str]] = None,
+                   language_code: Optional[str] = None) -> str:
+    """
+    Index key for a clip's transcript: the audio digest plus the language and
+    backend chain it was transcribed with (defaults to the configured ones).
+    """
+    settings = config.transcription
+    if backends is None:
+        backends = [settings.backend] + settings.fallback_backends
+    language_code = language_code or settings.language_code
+    return f"{digest}:{language_code}:{','.join(dict.fromkeys(backends))}"
+
+def unique_job_name(prefix: str = "cognora_transcription") -> str:
+    """Transcription job name that cannot collide, even for uploads in the same second."""
+    return f"{prefix}_{time.strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:12]}"
+
+class AudioIndex:
+    """Two-tier (LRU memory + SQLite disk) map of audio digest -> S3 key and transcript."""
+
+    def __init__(self, path: Optional[str] = None, max_entries: Optional[int] = None,
+                 ttl_seconds: Optional[float] = None):
+        settings = config.transcription
+        self.path = settings.dedup_index_path if path is None else path
+        self.max_entries = max_entries or settings.dedup_max_entries
+        self.ttl_seconds = settings.dedup_ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self.stats = {'transcript_hits': 0, 'upload_reuses': 0, 'misses': 0}
+
+        if self.path:
+            try:
+                # The index holds patient transcripts: private directory, owner-only file
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), mode=0o700, exist_ok=True)
+                self._conn = sqlite3.connect(self.path, check_same_thread=False)
+                os.chmod(self.path, 0o600)
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS audio ("
+                    "digest TEXT PRIMARY KEY, s3_key TEXT, transcript TEXT, "
+                    "backend TEXT, updated_at REAL NOT NULL)"
+                )
+                self._conn.execute("DELETE FROM audio WHERE updated_at < ?", (time.time() - self.ttl_seconds,))
+                self._conn.commit()
+            except (sqlite3.Error, OSError) as e:
+                print(f"WARNING: Audio index disk tier disabled ({self.path}): {e}")
+                self._conn = None
+
+    def get(self, digest: str) -> Optional[Dict[str, Any]]:
+        """Returns a copy of the unexpired entry for digest ({'s3_key', 'transcript', 'backend'}), or None."""
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            entry = self._memory.get(digest)
+            if entry is not None and entry['updated_at'] < cutoff:
+                del self._memory[digest]
+                entry = None
+            if entry is not None:
+                self._memory.move_to_end(digest)
+            elif self._conn is not None:
+                try:
+                    row = self._conn.execute(
+                        "SELECT s3_key, transcript, backend, updated_at FROM audio "
+                        "WHERE digest = ? AND updated_at >= ?", (digest, cutoff)
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    print(f"WARNING: Audio index read failed: {e}")
+                    row = None
+                if row:
+                    entry = {'s3_key': row[0], 'transcript': row[1], 'backend': row[2], 'updated_at': row[3]}
+                    self._remember(digest, entry)
+            if entry is None:
+                return None
+            entry = dict(entry)
+            del entry['updated_at']
+            return entry
+
+    def lookup_transcript(self, digest: str) -> Optional[str]:
+        """Finished transcript for digest in the configured language and backend chain, counting the hit or miss."""
+        entry = self.get(transcript_key(digest))
+        transcript = entry.get('transcript') if entry else None
+        with self._lock:
+            self.stats['transcript_hits' if transcript else 'misses'] += 1
+        return transcript
+
+    def lookup_upload(self, digest: str) -> Optional[str]:
+        """S3 key the same audio was already uploaded under, if any."""
+        entry = self.get(digest)
+        s3_key = entry.get('s3_key') if entry else None
+        if s3_key:
+            with self._lock:
+                self.stats['upload_reuses'] += 1
+        return s3_key
+
+    def record_upload(self, digest: str, s3_key: Optional[str]):
+        """Remembers (or, with None, forgets) the S3 key holding this audio."""
+        self._update(digest, s3_key=s3_key)
+
+    def record_transcript(self, digest: str, transcript: str, backend: Optional[str] = None):
+        """Remembers the finished transcript for this audio in the configured language and backend chain."""
+        self._update(transcript_key(digest), transcript=transcript, backend=backend)
+
+    def _update(self, digest: str, **fields):
+        entry = self.get(digest) or {'s3_key': None, 'transcript': None, 'backend': None}
+        entry.update(fields)
+        entry['updated_at'] = now = time.time()
+        with self._lock:
+            self._remember(digest, entry)
+            if self._conn is not None:
+                try:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO audio (digest, s3_key, transcript, backend, updated_at) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (digest, entry['s3_key'], entry['transcript'], entry['backend'], now)
+                    )
+                    self._conn.execute("DELETE FROM audio WHERE updated_at < ?", (now - self.ttl_seconds,))
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    print(f"WARNING: Audio index write failed: {e}")
+
+    def _remember(self, digest: str, entry: Dict[str, Any]):
+        self._memory[digest] = entry
+        self._memory.move_to_end(digest)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def clear(self):
+        """Empties both tiers."""
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM audio")
+                self._conn.commit()
+
+# Global instance
+audio_index = AudioIndex()
@@ -12,6 +12,205 @@ from datetime import datetime
 import base64
 from io import BytesIO
 
+from config import config
+
+VAD_FRAME_MS = 30
+
+def read_wav(data):
+    """
+    Decodes PCM WAV bytes to float samples in [-1, 1].
+
+    Returns:
+        (samples of shape (frames, channels), sample_rate), or None if the
+        data is not PCM WAV (compressed formats are passed through unchanged)
+    """
+    try:
+        with wave.open(BytesIO(data), 'rb') as wav:
+            channels = wav.getnchannels()
+            sample_width = wav.getsampwidth()
+            sample_rate = wav.getframerate()
+            frames = wav.readframes(wav.getnframes())
+    except (wave.Error, EOFError):
+        return None
+
+    if sample_width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif sample_width == 2:
+        samples = np.frombuffer(frames, dtype='<i2').astype(np.float32) / 32768
+    elif sample_width == 3:
+        raw = np.frombuffer(frames, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        values = raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16)
+        samples = np.where(values >= 1 << 23, values - (1 << 24), values).astype(np.float32) / (1 << 23)
+    elif sample_width == 4:
+        samples = np.frombuffer(frames, dtype='<i4').astype(np.float32) / (1 << 31)
+    else:
+        return None
+    return samples.reshape(-1, channels), sample_rate
+
+def write_wav(samples, sample_rate):
+    """Encodes mono float samples as 16-bit PCM WAV bytes."""
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype('<i2')
+    buffer = BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+def resample(samples, source_rate, target_rate):
+    """Resamples mono audio, low-pass filtering first when downsampling."""
+    if source_rate == target_rate or len(samples) == 0:
+        return samples
+    if target_rate < source_rate:
+        # Windowed-sinc low-pass at the new Nyquist frequency to avoid aliasing
+        cutoff = 0.5 * target_rate / source_rate
+        taps = np.arange(-32, 33)
+        kernel = 2 * cutoff * np.sinc(2 * cutoff * taps) * np.hamming(len(taps))
+        samples = np.convolve(samples, kernel / kernel.sum(), mode='same')
+    duration = len(samples) / source_rate
+    positions = np.arange(int(round(duration * target_rate))) * (source_rate / target_rate)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+def trim_silence(samples, sample_rate, threshold_db=-45.0, padding_ms=300):
+    """
+    Trims leading and trailing silence with an energy-based VAD.
+
+    Frames of VAD_FRAME_MS whose RMS level is below threshold_db (dBFS) count
+    as silence; padding_ms of audio is kept around the first and last voiced
+    frames so word onsets are not clipped. Clips with no voiced frame are
+    returned unchanged rather than emptied.
+    """
+    frame = max(1, int(sample_rate * VAD_FRAME_MS / 1000))
+    count = len(samples) // frame
+    if count == 0:
+        return samples
+    frames = samples[:count * frame].reshape(count, frame)
+    levels = 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-12)
+    voiced = np.flatnonzero(levels >= threshold_db)
+    if len(voiced) == 0:
+        return samples
+    padding = int(sample_rate * padding_ms / 1000)
+    start = max(0, voiced[0] * frame - padding)
+    end = min(len(samples), (voiced[-1] + 1) * frame + padding)
+    return samples[start:end]
+
+def encode_flac(samples, sample_rate):
+    """Encodes mono float samples as FLAC, or returns None if soundfile is not installed."""
+    try:
+        import soundfile
+    except ImportError:
+        print("WARNING: soundfile not installed, uploading WAV instead of FLAC")
+        return None
+    buffer = BytesIO()
+    soundfile.write(buffer, samples, sample_rate, format='FLAC', subtype='PCM_16')
+    return buffer.getvalue()
+
+def _stream_size(audio):
+    """Size in bytes of a seekable file object, without reading it."""
+    size = getattr(audio, 'size', None)
+    if size is not None:
+        return size
+    position = audio.tell()
+    audio.seek(0, os.SEEK_END)
+    size = audio.tell()
+    audio.seek(position)
+    return size
+
+def normalize_audio(audio, to_flac=None):
+    """
+    Prepares a clip for transcription: downmix to mono, downsample to
+    AUDIO_TARGET_SAMPLE_RATE, trim leading/trailing silence and optionally
+    transcode to FLAC.
+
+    Only WAV clips are decoded; other formats are returned as the same stream
+    so uploads stay streamed. Mono 16-bit WAV at or below the target rate is
+    not resampled but is still silence-trimmed, and is returned untouched
+    when there was nothing to trim or transcode. Audio is never upsampled,
+    and output that would be larger than the input without being shorter is
+    dropped in favour of the original.
+
+    Args:
+        audio: Uploaded file, file-like object or bytes
+        to_flac: Transcode to FLAC (defaults to AUDIO_TRANSCODE_FLAC)
+
+    Returns:
+        (audio file to upload, stats) where stats reports bytes and
+        transcription seconds saved.
+    """
+    settings = config.transcription
+    to_flac = settings.transcode_flac if to_flac is None else to_flac
+    name = getattr(audio, 'name', 'recording.wav')
+    if isinstance(audio, (bytes, bytearray, memoryview)):
+        audio = BytesIO(audio)
+        audio.name = name
+
+    audio.seek(0)
+    header = audio.read(12)
+    audio.seek(0)
+    params = None
+    if header[:4] == b'RIFF' and header[8:12] == b'WAVE':
+        try:
+            with wave.open(audio, 'rb') as wav:
+                params = wav.getparams()
+        except (wave.Error, EOFError):
+            params = None
+        audio.seek(0)
+
+    original_bytes = _stream_size(audio)
+    unchanged = {
+        'normalized': False,
+        'original_bytes': original_bytes,
+        'normalized_bytes': original_bytes,
+        'bytes_saved': 0,
+        'original_seconds': None,
+        'normalized_seconds': None,
+        'seconds_saved': 0.0
+    }
+    if params is None:
+        return audio, unchanged
+    needs_resample = not (params.nchannels == 1 and params.sampwidth == 2
+                          and params.framerate <= settings.target_sample_rate)
+
+    decoded = read_wav(audio.read())
+    audio.seek(0)
+    if decoded is None:
+        return audio, unchanged
+
+    samples, source_rate = decoded
+    target_rate = min(source_rate, settings.target_sample_rate)
+    original_seconds = len(samples) / source_rate
+    mono = samples.mean(axis=1) if samples.shape[1] > 1 else samples[:, 0]
+    if needs_resample:
+        mono = resample(mono, source_rate, target_rate)
+    untrimmed = len(mono)
+    mono = trim_silence(mono, target_rate, settings.vad_threshold_db, settings.vad_padding_ms)
+    trimmed = len(mono) < untrimmed
+    if not (needs_resample or trimmed or to_flac):
+        return audio, unchanged
+
+    encoded = encode_flac(mono, target_rate) if to_flac else None
+    extension = '.flac' if encoded is not None else '.wav'
+    if encoded is None:
+        encoded = write_wav(mono, target_rate)
+    if len(encoded) >= original_bytes and not trimmed:
+        return audio, unchanged
+
+    normalized = BytesIO(encoded)
+    normalized.name = os.path.splitext(name)[0] + extension
+    normalized_seconds = len(mono) / target_rate
+    stats = {
+        'normalized': True,
+        'original_bytes': original_bytes,
+        'normalized_bytes': len(encoded),
+        'bytes_saved': max(0, original_bytes - len(encoded)),
+        'original_seconds': round(original_seconds, 2),
+        'normalized_seconds': round(normalized_seconds, 2),
+        'seconds_saved': round(original_seconds - normalized_seconds, 2)
+    }
+    print(f"DEBUG: Normalized audio: {stats['bytes_saved']} bytes and {stats['seconds_saved']}s saved")
+    return normalized, stats
+
 def create_audio_recorder():
     """Creates an audio recorder using HTML5 Audio API."""
     
@@ -9,10 +9,10 @@ import secrets
 import re
 from datetime import datetime, timedelta
 from typing import Dict, Optional, Tuple
-import boto3
 from botocore.exceptions import ClientError
 from decimal import Decimal
 import streamlit as st
+from aws_clients import ThreadLocalTable, get_resource
 
 # AWS DynamoDB table for users
 users_table = None
@@ -32,22 +32,27 @@ def initialize_auth():
     """Initialize AWS DynamoDB connection for user authentication."""
     global users_table
     
+    # main() calls this on every Streamlit rerun; connect only once per process
+    if users_table is not None:
+        return
+    
     try:
-        # Initialize DynamoDB client
-        dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+        # Each thread gets its own Table resource (boto3 resources are not thread-safe)
+        table_name = 'cognora_users'
+        table = ThreadLocalTable(table_name, region_name='us-east-1')
         
         # Create or get users table
-        table_name = 'cognora_users'
         try:
-            users_table = dynamodb.Table(table_name)
             # Test if table exists
-            users_table.table_status
+            table.table_status
+            users_table = table
             print(f"✅ Users table '{table_name}' connected")
         except ClientError as e:
             if e.response['Error']['Code'] == 'ResourceNotFoundException':
                 # Create table if it doesn't exist
                 print(f"Creating users table '{table_name}'...")
-                users_table = dynamodb.create_table(
+                dynamodb = get_resource('dynamodb', region_name='us-east-1')
+                created = dynamodb.create_table(
                     TableName=table_name,
                     KeySchema=[
                         {
@@ -63,7 +68,8 @@ def initialize_auth():
                     ],
                     BillingMode='PAY_PER_REQUEST'
                 )
-                users_table.wait_until_exists()
+                created.wait_until_exists()
+                users_table = table
                 print(f"✅ Users table '{table_name}' created successfully")
             else:
                 raise e
@@ -0,0 +1,151 @@
+"""
+AWS Client Factory for Cognora+
+Creates boto3 clients once per process with a tuned botocore Config
+(connection pool size, TCP keep-alive, adaptive retries, timeouts), so
+connections are reused across Streamlit reruns and worker threads.
+
+Clients are thread-safe and shared; boto3 resources are not, so resources
+and DynamoDB Table objects are created once per thread instead.
+"""
+
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+
+from config import config
+
+_session = None
+_clients: Dict[Tuple, Any] = {}
+_lock = threading.Lock()
+_local = threading.local()
+_generation = 0
+
+def client_config(service_name: str) -> Config:
+    """Builds the botocore Config used for a service."""
+    settings = config.aws_clients
+    if service_name == 'bedrock-runtime':
+        # Completions can take minutes; throttling retries are owned by rate_limiter
+        return Config(
+            max_pool_connections=settings.max_pool_connections,
+            tcp_keepalive=True,
+            connect_timeout=settings.connect_timeout,
+            read_timeout=settings.bedrock_read_timeout,
+            retries={'mode': 'standard', 'max_attempts': 1}
+        )
+    return Config(
+        max_pool_connections=settings.max_pool_connections,
+        tcp_keepalive=True,
+        connect_timeout=settings.connect_timeout,
+        read_timeout=settings.read_timeout,
+        retries={'mode': 'adaptive', 'max_attempts': settings.max_attempts}
+    )
+
+def transfer_config() -> TransferConfig:
+    """S3 multipart settings for streamed uploads; memory stays near chunksize x concurrency."""
+    settings = config.aws_clients
+    return TransferConfig(
+        multipart_threshold=settings.multipart_threshold_mb * 1024 * 1024,
+        multipart_chunksize=settings.multipart_chunksize_mb * 1024 * 1024,
+        max_concurrency=settings.upload_concurrency,
+        use_threads=True
+    )
+
+def _get_session():
+    global _session
+    if _session is None:
+        _session = boto3.session.Session()
+    return _session
+
+def _create(kind: str, service_name: str, region_name: str, aws_access_key_id: Optional[str],
+            aws_secret_access_key: Optional[str]):
+    # boto3 sessions are not thread-safe, so callers hold the lock
+    factory = _get_session().client if kind == 'client' else _get_session().resource
+    return factory(
+        service_name,
+        region_name=region_name,
+        aws_access_key_id=aws_access_key_id,
+        aws_secret_access_key=aws_secret_access_key,
+        config=client_config(service_name)
+    )
+
+def _thread_cache() -> Dict[Tuple, Any]:
+    """This thread's resources, dropped when clear_clients() has been called since."""
+    if getattr(_local, 'generation', None) != _generation:
+        _local.generation = _generation
+        _local.objects = {}
+    return _local.objects
+
+def get_client(service_name: str, region_name: Optional[str] = None, aws_access_key_id: Optional[str] = None,
+               aws_secret_access_key: Optional[str] = None):
+    """
+    Returns the process-wide boto3 client for a service, creating it on first use.
+
+    Args:
+        service_name: e.g. 's3', 'transcribe', 'bedrock-runtime'
+        region_name: Defaults to config.aws_region
+        aws_access_key_id: Explicit credentials (default credential chain if omitted)
+        aws_secret_access_key: Explicit credentials
+
+    Returns:
+        A thread-safe boto3 client
+    """
+    region_name = region_name or config.aws_region
+    key = (service_name, region_name, aws_access_key_id)
+    with _lock:
+        if key not in _clients:
+            _clients[key] = _create('client', service_name, region_name, aws_access_key_id, aws_secret_access_key)
+            print(f"DEBUG: Created shared {service_name} client ({region_name})")
+        return _clients[key]
+
+def get_resource(service_name: str, region_name: Optional[str] = None, aws_access_key_id: Optional[str] = None,
+                 aws_secret_access_key: Optional[str] = None):
+    """
+    Returns the calling thread's boto3 resource for a service (e.g. 'dynamodb'),
+    creating it on first use. Resources are not thread-safe, so each thread
+    gets its own.
+    """
+    region_name = region_name or config.aws_region
+    key = ('resource', service_name, region_name, aws_access_key_id)
+    objects = _thread_cache()
+    if key not in objects:
+        with _lock:
+            objects[key] = _create('resource', service_name, region_name, aws_access_key_id, aws_secret_access_key)
+    return objects[key]
+
+def get_table(table_name: str, region_name: Optional[str] = None, aws_access_key_id: Optional[str] = None,
+              aws_secret_access_key: Optional[str] = None):
+    """Returns the calling thread's DynamoDB Table resource, creating it on first use."""
+    key = ('table', table_name, region_name or config.aws_region, aws_access_key_id)
+    objects = _thread_cache()
+    if key not in objects:
+        dynamodb = get_resource('dynamodb', region_name, aws_access_key_id, aws_secret_access_key)
+        objects[key] = dynamodb.Table(table_name)
+    return objects[key]
+
+class ThreadLocalTable:
+    """
+    Module-level stand-in for a DynamoDB Table: every attribute access is
+    forwarded to the calling thread's own Table resource (see get_table), so
+    one global can be shared by Streamlit, orchestrator and background threads.
+    """
+
+    def __init__(self, table_name: str, region_name: Optional[str] = None,
+                 aws_access_key_id: Optional[str] = None, aws_secret_access_key: Optional[str] = None):
+        self.table_name = table_name
+        self._args = (region_name, aws_access_key_id, aws_secret_access_key)
+
+    def __getattr__(self, name: str):
+        return getattr(get_table(self.table_name, *self._args), name)
+
+    def __repr__(self) -> str:
+        return f"ThreadLocalTable({self.table_name!r})"
+
+def clear_clients():
+    """Drops all cached clients and every thread's resources (e.g. after credentials change)."""
+    global _generation
+    with _lock:
+        _clients.clear()
+        _generation += 1
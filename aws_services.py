@@ -1,9 +1,18 @@
-import boto3
+import io
 import os
 import json
+import threading
 import time
 from decimal import Decimal
+from boto3.dynamodb.conditions import Key
 from dotenv import load_dotenv
+from config import config
+from aws_clients import ThreadLocalTable, get_client, transfer_config
+from llm_cache import response_cache
+from transcription import TranscriptionJobManager
+from audio_index import audio_digest, audio_index, unique_job_name
+from transcribers import transcribe_with_backends
+from rate_limiter import bedrock_limiter, CircuitOpenError, RateLimitTimeout, is_throttling_error
 
 load_dotenv()
 
@@ -49,43 +58,42 @@ aws_access_key_id, aws_secret_access_key, aws_region_name, s3_bucket_name, dynam
 # Initialize AWS clients only if configuration is valid
 if all([aws_access_key_id, aws_secret_access_key, aws_region_name]):
     try:
-        bedrock_runtime = boto3.client(
+        bedrock_runtime = get_client(
             service_name='bedrock-runtime',
             region_name=aws_region_name,
             aws_access_key_id=aws_access_key_id,
             aws_secret_access_key=aws_secret_access_key
         )
 
-        transcribe_client = boto3.client(
+        transcribe_client = get_client(
             service_name='transcribe',
             region_name=aws_region_name,
             aws_access_key_id=aws_access_key_id,
             aws_secret_access_key=aws_secret_access_key
         )
 
-        s3_client = boto3.client(
+        s3_client = get_client(
             service_name='s3',
             region_name=aws_region_name,
             aws_access_key_id=aws_access_key_id,
             aws_secret_access_key=aws_secret_access_key
         )
 
-        dynamodb = boto3.resource(
-            service_name='dynamodb',
-            region_name=aws_region_name,
-            aws_access_key_id=aws_access_key_id,
-            aws_secret_access_key=aws_secret_access_key
-        )
-        
         if dynamodb_table_name:
-            scores_table = dynamodb.Table(dynamodb_table_name)
+            # boto3 resources are not thread-safe; each thread uses its own Table
+            scores_table = ThreadLocalTable(
+                dynamodb_table_name,
+                region_name=aws_region_name,
+                aws_access_key_id=aws_access_key_id,
+                aws_secret_access_key=aws_secret_access_key
+            )
             print(f"DEBUG: DynamoDB table '{dynamodb_table_name}' initialized")
         else:
             scores_table = None
             print("WARNING: DynamoDB table name not configured")
 
         if sns_topic_arn:
-            sns_client = boto3.client(
+            sns_client = get_client(
                 service_name='sns',
                 region_name=aws_region_name,
                 aws_access_key_id=aws_access_key_id,
@@ -102,7 +110,6 @@ if all([aws_access_key_id, aws_secret_access_key, aws_region_name]):
         bedrock_runtime = None
         transcribe_client = None
         s3_client = None
-        dynamodb = None
         scores_table = None
         sns_client = None
 else:
@@ -110,12 +117,34 @@ else:
     bedrock_runtime = None
     transcribe_client = None
     s3_client = None
-    dynamodb = None
     scores_table = None
     sns_client = None
 
-def invoke_claude_sonnet(prompt):
-    """Invokes the Claude 3 Sonnet model via Bedrock."""
+transcription_manager = TranscriptionJobManager(transcribe_client, s3_client, s3_bucket_name)
+
+CLAUDE_MODEL_ID = 'anthropic.claude-3-sonnet-20240229-v1:0'
+
+def invoke_claude(prompt, max_tokens=1024, use_cache=True, cache_if=None):
+    """
+    Invokes the Claude 3 Sonnet model via Bedrock and reports token usage.
+    Responses are served from llm_cache.response_cache when possible.
+
+    Args:
+        prompt: The user prompt
+        max_tokens: Completion token limit
+        use_cache: Read and write the response cache
+        cache_if: Predicate on the completion text; only accepted completions
+            are cached, so a malformed response is not replayed for the TTL
+
+    Returns:
+        Dictionary with text, usage (input_tokens / output_tokens), latency
+        in seconds and cached (True for cache hits), or None if the call failed
+    """
+    if use_cache:
+        cached = response_cache.get(CLAUDE_MODEL_ID, max_tokens, prompt)
+        if cached is not None:
+            return dict(cached, latency=0.0, cached=True)
+
     if not bedrock_runtime:
         print("ERROR: Bedrock client not initialized")
         return None
@@ -123,7 +152,7 @@ def invoke_claude_sonnet(prompt):
     try:
         body = json.dumps({
             "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": 1024,
+            "max_tokens": max_tokens,
             "messages": [
                 {
                     "role": "user",
@@ -131,17 +160,114 @@ def invoke_claude_sonnet(prompt):
                 }
             ]
         })
-        modelId = 'anthropic.claude-3-sonnet-20240229-v1:0'
         accept = 'application/json'
         contentType = 'application/json'
 
-        response = bedrock_runtime.invoke_model(body=body, modelId=modelId, accept=accept, contentType=contentType)
+        started = time.time()
+        response = bedrock_limiter.call(
+            bedrock_runtime.invoke_model, body=body, modelId=CLAUDE_MODEL_ID, accept=accept, contentType=contentType
+        )
         response_body = json.loads(response.get('body').read())
-        return response_body['content'][0]['text']
+        result = {
+            'text': response_body['content'][0]['text'],
+            'usage': response_body.get('usage', {}),
+            'latency': time.time() - started,
+            'cached': False
+        }
+        if use_cache and (cache_if is None or cache_if(result['text'])):
+            response_cache.set(CLAUDE_MODEL_ID, max_tokens, prompt, result)
+        return result
     except Exception as e:
         print(f"ERROR: Failed to invoke Claude Sonnet: {e}")
         return None
 
+def invoke_claude_stream(prompt, max_tokens=1024, on_text=None, use_cache=True, cache_if=None):
+    """
+    Invokes Claude via Bedrock's response-stream API, passing each text delta to
+    on_text as it arrives. Falls back to invoke_claude if the stream cannot be
+    opened (e.g. missing bedrock:InvokeModelWithResponseStream permission).
+
+    Args:
+        prompt: The user prompt
+        max_tokens: Completion token limit
+        on_text: Callback receiving each text delta
+        use_cache: Read and write the response cache
+        cache_if: Predicate on the completion text; only accepted completions are cached
+
+    Returns:
+        Same dictionary as invoke_claude, or None if the call failed
+    """
+    on_text = on_text or (lambda text: None)
+    if use_cache:
+        cached = response_cache.get(CLAUDE_MODEL_ID, max_tokens, prompt)
+        if cached is not None:
+            on_text(cached['text'])
+            return dict(cached, latency=0.0, cached=True)
+
+    if not bedrock_runtime:
+        print("ERROR: Bedrock client not initialized")
+        return None
+
+    body = json.dumps({
+        "anthropic_version": "bedrock-2023-05-31",
+        "max_tokens": max_tokens,
+        "messages": [
+            {
+                "role": "user",
+                "content": [{"type": "text", "text": prompt}]
+            }
+        ]
+    })
+    started = time.time()
+    try:
+        response = bedrock_limiter.call(
+            bedrock_runtime.invoke_model_with_response_stream, body=body, modelId=CLAUDE_MODEL_ID
+        )
+    except (CircuitOpenError, RateLimitTimeout) as e:
+        print(f"ERROR: Failed to invoke Claude Sonnet: {e}")
+        return None
+    except Exception as e:
+        # Retrying a throttled request without streaming would only add load
+        if is_throttling_error(e):
+            print(f"ERROR: Failed to invoke Claude Sonnet: {e}")
+            return None
+        print(f"WARNING: Bedrock streaming unavailable, using invoke_model: {e}")
+        result = invoke_claude(prompt, max_tokens=max_tokens, use_cache=use_cache, cache_if=cache_if)
+        if result:
+            on_text(result['text'])
+        return result
+
+    parts = []
+    usage = {}
+    try:
+        for event in response.get('body'):
+            chunk = event.get('chunk')
+            if not chunk:
+                continue
+            payload = json.loads(chunk['bytes'])
+            if payload.get('type') == 'message_start':
+                usage.update(payload.get('message', {}).get('usage', {}))
+            elif payload.get('type') == 'content_block_delta':
+                text = payload.get('delta', {}).get('text', '')
+                if text:
+                    parts.append(text)
+                    on_text(text)
+            elif payload.get('type') == 'message_delta':
+                usage.update(payload.get('usage', {}))
+    except Exception as e:
+        print(f"ERROR: Claude Sonnet stream failed: {e}")
+        return None
+
+    result = {'text': "".join(parts), 'usage': usage, 'latency': time.time() - started, 'cached': False}
+    if use_cache and (cache_if is None or cache_if(result['text'])):
+        response_cache.set(CLAUDE_MODEL_ID, max_tokens, prompt, result)
+    return result
+
+def invoke_claude_sonnet(prompt):
+    """Invokes the Claude 3 Sonnet model via Bedrock."""
+    result = invoke_claude(prompt)
+    return result['text'] if result else None
+
 def transcribe_audio_file_fallback(audio_file):
     """Fallback transcription function for testing when AWS is not available."""
     print("WARNING: Using fallback transcription (mock data)")
@@ -158,103 +284,139 @@ def transcribe_audio_file_fallback(audio_file):
     import random
     return random.choice(sample_transcripts)
 
+def as_upload_stream(audio):
+    """
+    Returns a readable, rewound stream over audio without copying it.
+    Accepts a Streamlit UploadedFile, BytesIO or any file-like object, or raw
+    bytes (microphone recordings).
+    """
+    if isinstance(audio, (bytes, bytearray, memoryview)):
+        # BytesIO shares the bytes buffer until written to
+        return io.BytesIO(audio)
+    if hasattr(audio, 'seek'):
+        audio.seek(0)
+    return audio
+
+def upload_audio_fileobj(audio, s3_key, content_type=None):
+    """
+    Streams audio to S3 with upload_fileobj, using multipart uploads for large
+    files, so memory use stays bounded regardless of clip length.
+
+    Args:
+        audio: File-like object or bytes
+        s3_key: Destination key in the audio bucket
+        content_type: Optional Content-Type for the object
+    """
+    extra_args = {'ContentType': content_type} if content_type else None
+    s3_client.upload_fileobj(
+        as_upload_stream(audio), s3_bucket_name, s3_key,
+        ExtraArgs=extra_args, Config=transfer_config()
+    )
+    print(f"DEBUG: Audio file uploaded to S3: {s3_key}")
+
+def detect_media_format(audio_file):
+    """
+    Determines the file extension and AWS Transcribe media format from the file name.
+
+    Returns:
+        (file_extension, media_format)
+    """
+    file_extension = '.wav'  # default
+    if hasattr(audio_file, 'name'):
+        if audio_file.name.lower().endswith('.mp3'):
+            file_extension = '.mp3'
+        elif audio_file.name.lower().endswith('.m4a'):
+            file_extension = '.m4a'
+        elif audio_file.name.lower().endswith('.flac'):
+            file_extension = '.flac'
+        elif audio_file.name.lower().endswith('.webm'):
+            file_extension = '.webm'
+
+    # Map file extensions to AWS Transcribe media formats
+    media_format_map = {
+        '.wav': 'wav',
+        '.mp3': 'mp3',
+        '.m4a': 'mp4',
+        '.flac': 'flac',
+        '.webm': 'webm'
+    }
+    return file_extension, media_format_map.get(file_extension, 'wav')
+
+def transcribe_audio_file_aws(audio_file, media_format, job_name=None, digest=None):
+    """
+    Transcribes audio with AWS Transcribe (S3 upload + transcription job).
+    Audio already uploaded under a known digest is not uploaded again.
+    """
+    if job_name is None:
+        job_name = unique_job_name()
+    file_extension = detect_media_format(audio_file)[0]
+
+    s3_key = audio_index.lookup_upload(digest) if digest else None
+    if s3_key:
+        print(f"DEBUG: Reusing uploaded audio: {s3_key}")
+        transcript = transcription_manager.run_job(
+            job_name, f"s3://{s3_bucket_name}/{s3_key}", media_format, config.transcription.language_code
+        )
+        if transcript is not None:
+            return transcript
+        # The object may have expired; forget it and upload again under a fresh job
+        audio_index.record_upload(digest, None)
+        job_name = unique_job_name()
+
+    # Stream the upload straight from memory to S3 (no temp file)
+    s3_key = f"audio-uploads/{job_name}{file_extension}"
+    upload_audio_fileobj(audio_file, s3_key, content_type=f"audio/{media_format}")
+    if digest:
+        audio_index.record_upload(digest, s3_key)
+
+    media_uri = f"s3://{s3_bucket_name}/{s3_key}"
+    return transcription_manager.run_job(
+        job_name, media_uri, media_format, config.transcription.language_code
+    )
+
 def transcribe_audio_file(audio_file, job_name=None):
-    """Transcribes audio from a file object and returns the transcript."""
-    # Check if AWS services are available
-    if not transcribe_client or not s3_client:
-        print("WARNING: AWS services not available, using fallback transcription")
-        return transcribe_audio_file_fallback(audio_file)
-        
+    """
+    Transcribes audio from a file object and returns the transcript.
+
+    Dispatches through the configured speech-to-text backend chain
+    (TRANSCRIBER_BACKEND / TRANSCRIBER_FALLBACK). Returns None if no backend
+    produced a transcript; canned text is only returned when the mock backend
+    is configured explicitly, so it can never be scored as a real entry.
+    Identical audio that was transcribed before is answered from the audio
+    index without starting a job.
+    """
     try:
-        # Generate job name if not provided
-        if job_name is None:
-            job_name = f"cognora_transcription_{int(time.time())}"
-        
-        # Determine file format based on file name or content
-        file_extension = '.wav'  # default
-        if hasattr(audio_file, 'name'):
-            if audio_file.name.lower().endswith('.mp3'):
-                file_extension = '.mp3'
-            elif audio_file.name.lower().endswith('.m4a'):
-                file_extension = '.m4a'
-            elif audio_file.name.lower().endswith('.flac'):
-                file_extension = '.flac'
-            elif audio_file.name.lower().endswith('.webm'):
-                file_extension = '.webm'
-        
-        # Map file extensions to AWS Transcribe media formats
-        media_format_map = {
-            '.wav': 'wav',
-            '.mp3': 'mp3',
-            '.m4a': 'mp4',
-            '.flac': 'flac',
-            '.webm': 'webm'
-        }
-        media_format = media_format_map.get(file_extension, 'wav')
-        
-        # Save the file object to a temporary file
-        import tempfile
-        with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as temp_file:
-            # Write the file content to temporary file
-            if hasattr(audio_file, 'read'):
-                # It's a file-like object
-                temp_file.write(audio_file.read())
-            else:
-                # It's bytes
-                temp_file.write(audio_file)
-            temp_file_path = temp_file.name
-        
-        try:
-            # Upload audio file to S3
-            s3_key = f"audio-uploads/{job_name}{file_extension}"
-            s3_client.upload_file(temp_file_path, s3_bucket_name, s3_key)
-            print(f"DEBUG: Audio file uploaded to S3: {s3_key}")
-            
-            media_uri = f"s3://{s3_bucket_name}/{s3_key}"
+        digest = None
+        if config.transcription.dedup_enabled:
+            audio_file = as_upload_stream(audio_file)
+            digest = audio_digest(audio_file)
+            transcript = audio_index.lookup_transcript(digest)
+            if transcript:
+                print(f"DEBUG: Returning indexed transcript for duplicate audio {digest[:12]}")
+                return transcript
 
-            transcribe_client.start_transcription_job(
-                TranscriptionJobName=job_name,
-                Media={'MediaFileUri': media_uri},
-                MediaFormat=media_format,
-                LanguageCode='en-US'
-            )
+        media_format = detect_media_format(audio_file)[1]
+        transcript = transcribe_with_backends(audio_file, media_format, job_name, digest)
+        if transcript is not None:
+            print(f"DEBUG: Transcription completed successfully. Length: {len(transcript)} characters")
+        else:
+            print("ERROR: No transcription backend produced a transcript")
+        return transcript
 
-            print(f"DEBUG: Transcription job started: {job_name}")
-            
-            while True:
-                status = transcribe_client.get_transcription_job(TranscriptionJobName=job_name)
-                job_status = status['TranscriptionJob']['TranscriptionJobStatus']
-                if job_status in ['COMPLETED', 'FAILED']:
-                    break
-                print(f"Transcription in progress... Status: {job_status}")
-                time.sleep(5)
-
-            if job_status == 'COMPLETED':
-                transcript_uri = status['TranscriptionJob']['Transcript']['TranscriptFileUri']
-                content = s3_client.get_object(Bucket=s3_bucket_name, Key=transcript_uri.split(f"{s3_bucket_name}/")[-1])
-                transcript_data = json.loads(content['Body'].read().decode('utf-8'))
-                transcript = transcript_data['results']['transcripts'][0]['transcript']
-                print(f"DEBUG: Transcription completed successfully. Length: {len(transcript)} characters")
-                return transcript
-            else:
-                print(f"ERROR: Transcription failed with status: {job_status}")
-                if 'FailureReason' in status['TranscriptionJob']:
-                    print(f"Failure reason: {status['TranscriptionJob']['FailureReason']}")
-                return None
-                
-        finally:
-            # Clean up temporary file
-            try:
-                os.unlink(temp_file_path)
-            except:
-                pass  # Ignore cleanup errors
-            
     except Exception as e:
         print(f"ERROR: Failed during transcription: {e}")
         import traceback
         traceback.print_exc()
-        print("Falling back to mock transcription...")
-        return transcribe_audio_file_fallback(audio_file)
+        return None
+
+def transcribe_audio_file_async(audio_file, job_name=None):
+    """
+    Runs transcribe_audio_file on the transcription worker pool.
+
+    Returns:
+        Future resolving to the transcript (or None)
+    """
+    return transcription_manager.submit_call(transcribe_audio_file, audio_file, job_name)
 
 def transcribe_audio(audio_file_path, job_name):
     """Starts a transcription job and returns the transcript."""
@@ -270,28 +432,8 @@ def transcribe_audio(audio_file_path, job_name):
         
         media_uri = f"s3://{s3_bucket_name}/{s3_key}"
 
-        transcribe_client.start_transcription_job(
-            TranscriptionJobName=job_name,
-            Media={'MediaFileUri': media_uri},
-            MediaFormat='wav',  # Assuming WAV format, adjust as needed
-            LanguageCode='en-US'
-        )
-
-        while True:
-            status = transcribe_client.get_transcription_job(TranscriptionJobName=job_name)
-            if status['TranscriptionJob']['TranscriptionJobStatus'] in ['COMPLETED', 'FAILED']:
-                break
-            print("Transcription in progress...")
-            time.sleep(5)
-
-        if status['TranscriptionJob']['TranscriptionJobStatus'] == 'COMPLETED':
-            transcript_uri = status['TranscriptionJob']['Transcript']['TranscriptFileUri']
-            content = s3_client.get_object(Bucket=s3_bucket_name, Key=transcript_uri.split(f"{s3_bucket_name}/")[-1])
-            transcript_data = json.loads(content['Body'].read().decode('utf-8'))
-            return transcript_data['results']['transcripts'][0]['transcript']
-        else:
-            print(f"ERROR: Transcription failed with status: {status['TranscriptionJob']['TranscriptionJobStatus']}")
-            return None
+        # Assuming WAV format, adjust as needed
+        return transcription_manager.run_job(job_name, media_uri, 'wav')
     except Exception as e:
         print(f"ERROR: Failed during transcription: {e}")
         return None
@@ -326,7 +468,8 @@ def store_report_in_s3(user_id, date, report):
         print(f"ERROR: Failed to store report in S3: {e}")
         return None
 
-def save_to_dynamodb(user_id, date, transcript, emotion, score, feedback, cognitive_metrics, source='text'):
+def save_to_dynamodb(user_id, date, transcript, emotion, score, feedback, cognitive_metrics, source='text',
+                     score_breakdown=None, profile_version=None):
     """Saves analysis results to DynamoDB with improved error handling."""
     if not scores_table:
         print("ERROR: DynamoDB table not initialized")
@@ -355,6 +498,12 @@ def save_to_dynamodb(user_id, date, transcript, emotion, score, feedback, cognit
             'timestamp': str(time.time())  # Add timestamp for sorting
         }
         
+        # Keep the score components so entries can be re-scored under new profiles
+        if score_breakdown:
+            item_to_save['score_breakdown'] = {k: str(v) for k, v in score_breakdown.items()}
+        if profile_version:
+            item_to_save['profile_version'] = str(profile_version)
+        
         print(f"DEBUG: Saving item to DynamoDB: {item_to_save}")
         
         # Save to DynamoDB
@@ -368,38 +517,111 @@ def save_to_dynamodb(user_id, date, transcript, emotion, score, feedback, cognit
         print(f"ERROR: Item that failed to save: {item_to_save if 'item_to_save' in locals() else 'Not created'}")
         return False
 
-def get_user_data(user_id):
-    """Retrieves all data for a user from DynamoDB with better error handling."""
-    if not scores_table:
+# Enough for charts, scores and alerts; omits transcripts and cognitive metrics
+HISTORY_SUMMARY_ATTRIBUTES = ('user_id', 'date', 'score', 'emotion', 'source', 'timestamp', 'profile_version')
+
+def _projection(attributes):
+    """ProjectionExpression request parameters for the given attribute names."""
+    if not attributes:
+        return {}
+    # Placeholders keep reserved words such as date, source and timestamp usable
+    names = {f"#a{i}": name for i, name in enumerate(attributes)}
+    return {'ProjectionExpression': ", ".join(names), 'ExpressionAttributeNames': names}
+
+def query_user_history(user_id, start_date=None, end_date=None, limit=None, newest_first=True,
+                       attributes=None, page_size=100, table=None):
+    """
+    Lazily pages through a user's entries using the user_id/date key schema.
+
+    Args:
+        user_id: User identifier (partition key)
+        start_date: Earliest date to include (YYYY-MM-DD, inclusive)
+        end_date: Latest date to include (YYYY-MM-DD, inclusive)
+        limit: Maximum number of entries to yield
+        newest_first: Order by date descending (ScanIndexForward=False)
+        attributes: Attribute names to project (None fetches whole items)
+        page_size: Items per DynamoDB request
+        table: Table resource (defaults to the scores table)
+
+    Yields:
+        Entries with Decimal scores converted to float
+    """
+    table = scores_table if table is None else table
+    if not table:
         print("ERROR: DynamoDB table not initialized")
-        return []
-        
+        return
+
+    condition = Key('user_id').eq(str(user_id))
+    if start_date and end_date:
+        condition &= Key('date').between(str(start_date), str(end_date))
+    elif start_date:
+        condition &= Key('date').gte(str(start_date))
+    elif end_date:
+        condition &= Key('date').lte(str(end_date))
+
+    request = {'KeyConditionExpression': condition, 'ScanIndexForward': not newest_first}
+    request.update(_projection(attributes))
+
+    returned = 0
     try:
-        print(f"DEBUG: Retrieving data for user: {user_id}")
-        
-        response = scores_table.query(
-            KeyConditionExpression=boto3.dynamodb.conditions.Key('user_id').eq(str(user_id))
-        )
-        
-        items = response.get('Items', [])
-        print(f"DEBUG: Retrieved {len(items)} items for user {user_id}")
-        
-        # Debug: Show what fields are in each item
-        for i, item in enumerate(items[:3]):  # Show first 3 items
-            print(f"DEBUG: Item {i+1} fields: {list(item.keys())}")
-            print(f"DEBUG: Item {i+1} source: {item.get('source', 'NOT_FOUND')}")
-        
-        # Convert Decimal types back to regular numbers for JSON serialization
-        for item in items:
-            if 'score' in item and isinstance(item['score'], Decimal):
-                item['score'] = float(item['score'])
-        
-        return items
-        
+        while limit is None or returned < limit:
+            request['Limit'] = page_size if limit is None else min(page_size, limit - returned)
+            response = table.query(**request)
+            for item in response.get('Items', []):
+                if isinstance(item.get('score'), Decimal):
+                    item['score'] = float(item['score'])
+                returned += 1
+                yield item
+            last_key = response.get('LastEvaluatedKey')
+            if not last_key:
+                return
+            request['ExclusiveStartKey'] = last_key
     except Exception as e:
-        print(f"ERROR: Failed to retrieve data from DynamoDB: {e}")
+        print(f"ERROR: Failed to query history from DynamoDB: {e}")
+
+def get_user_entries(user_id, dates, attributes=None, table=None):
+    """
+    Reads a user's entries for specific dates by key, so pages that show a
+    few transcripts do not load every entry in full.
+
+    Args:
+        user_id: User identifier
+        dates: Dates (YYYY-MM-DD) to fetch
+        attributes: Attribute names to project (None fetches whole items)
+        table: Table resource (defaults to the scores table)
+
+    Returns:
+        The entries found, in the order of dates
+    """
+    table = scores_table if table is None else table
+    if not table:
+        print("ERROR: DynamoDB table not initialized")
         return []
 
+    projection = _projection(attributes)
+    items = []
+    for date in dict.fromkeys(str(date) for date in dates):
+        try:
+            item = table.get_item(Key={'user_id': str(user_id), 'date': date}, **projection).get('Item')
+        except Exception as e:
+            print(f"ERROR: Failed to get entry {date} from DynamoDB: {e}")
+            continue
+        if item:
+            if isinstance(item.get('score'), Decimal):
+                item['score'] = float(item['score'])
+            items.append(item)
+    return items
+
+def get_user_data(user_id, attributes=None):
+    """
+    Retrieves all data for a user from DynamoDB, following pagination so
+    histories over 1 MB are not truncated.
+    """
+    print(f"DEBUG: Retrieving data for user: {user_id}")
+    items = list(query_user_history(user_id, newest_first=False, attributes=attributes))
+    print(f"DEBUG: Retrieved {len(items)} items for user {user_id}")
+    return items
+
 def send_alert(subject, message):
     """Sends an alert via SNS with better error handling."""
     if not sns_client:
@@ -423,14 +645,21 @@ def send_alert(subject, message):
         return False
 
 def test_aws_connection():
-    """Test AWS connection and permissions."""
+    """
+    Test AWS connection and permissions.
+
+    Returns:
+        Dictionary of service name -> reachable
+    """
     print("=== AWS Connection Test ===")
+    results = {'s3': False, 'dynamodb': False, 'sns': False}
     
     # Test S3
     if s3_client and s3_bucket_name:
         try:
             s3_client.head_bucket(Bucket=s3_bucket_name)
             print(f"✅ S3 bucket '{s3_bucket_name}' accessible")
+            results['s3'] = True
         except Exception as e:
             print(f"❌ S3 bucket '{s3_bucket_name}' not accessible: {e}")
     else:
@@ -441,6 +670,7 @@ def test_aws_connection():
         try:
             scores_table.table_status
             print(f"✅ DynamoDB table '{dynamodb_table_name}' accessible")
+            results['dynamodb'] = True
         except Exception as e:
             print(f"❌ DynamoDB table '{dynamodb_table_name}' not accessible: {e}")
     else:
@@ -451,9 +681,28 @@ def test_aws_connection():
         try:
             sns_client.get_topic_attributes(TopicArn=sns_topic_arn)
             print(f"✅ SNS topic accessible")
+            results['sns'] = True
         except Exception as e:
             print(f"❌ SNS topic not accessible: {e}")
     else:
         print("❌ SNS not configured")
     
     print("=== End AWS Connection Test ===")
+    return results
+
+_connectivity = {'results': None, 'checked_at': 0.0}
+_connectivity_lock = threading.Lock()
+
+def check_aws_connectivity(max_age=None, force=False):
+    """
+    Runs test_aws_connection at most once per max_age seconds (default
+    HEALTH_CHECK_INTERVAL) and returns the latest results. Call it at startup
+    and from the health-check schedule rather than on request paths.
+    """
+    max_age = config.aws_clients.connectivity_check_interval if max_age is None else max_age
+    with _connectivity_lock:
+        stale = time.monotonic() - _connectivity['checked_at'] >= max_age
+        if force or _connectivity['results'] is None or stale:
+            _connectivity['results'] = test_aws_connection()
+            _connectivity['checked_at'] = time.monotonic()
+        return dict(_connectivity['results'])
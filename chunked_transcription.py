@@ -0,0 +1,200 @@
+"""
+Chunked Transcription for Cognora+
+Splits long WAV recordings at silences into overlapping segments, transcribes
+the segments concurrently on a bounded pool and stitches the transcripts back
+in order, removing the words repeated in the overlaps. Latency then follows
+the segment length instead of the recording length.
+"""
+
+import os
+import re
+import threading
+import wave
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from io import BytesIO
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from config import config
+from audio_index import audio_digest, audio_index, unique_job_name
+from audio_recorder import VAD_FRAME_MS, read_wav, write_wav
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_chunk_executor() -> ThreadPoolExecutor:
+    """Pool for segment jobs, separate from the transcription manager's pool so
+    a pipeline running there can fan out without waiting on itself."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=config.transcription.chunk_workers,
+                thread_name_prefix="cognora-chunk"
+            )
+        return _executor
+
+def audio_duration(audio) -> Optional[float]:
+    """Duration in seconds of a WAV file object (read from the header), or None for other formats."""
+    if not getattr(audio, 'name', '').lower().endswith('.wav'):
+        return None
+    try:
+        audio.seek(0)
+        with wave.open(audio, 'rb') as wav:
+            return wav.getnframes() / wav.getframerate()
+    except (wave.Error, EOFError):
+        return None
+    finally:
+        audio.seek(0)
+
+def find_split_points(samples: np.ndarray, sample_rate: int, chunk_seconds: float) -> List[int]:
+    """
+    Chooses segment boundaries near every chunk_seconds, each placed in the
+    quietest stretch within 20% of the target so words are not cut.
+
+    Returns:
+        Sample offsets, starting with 0 and ending with len(samples)
+    """
+    frame = max(1, int(sample_rate * VAD_FRAME_MS / 1000))
+    count = len(samples) // frame
+    levels = 10 * np.log10(np.mean(samples[:count * frame].reshape(count, frame) ** 2, axis=1) + 1e-12)
+    chunk = int(chunk_seconds * sample_rate)
+    search = int(chunk * 0.2)
+
+    boundaries = [0]
+    # Keep going while the remainder is clearly longer than one segment
+    while len(samples) - boundaries[-1] > chunk * 1.25:
+        target = boundaries[-1] + chunk
+        first = max(0, (target - search) // frame)
+        last = min(count, (target + search) // frame + 1)
+        # Of the frames within 3 dB of the quietest, cut at the one nearest the target
+        window = levels[first:last]
+        candidates = first + np.flatnonzero(window <= window.min() + 3)
+        nearest = candidates[np.argmin(np.abs(candidates * frame - target))]
+        boundaries.append(int(nearest) * frame + frame // 2)
+    boundaries.append(len(samples))
+    return boundaries
+
+def split_audio(samples: np.ndarray, sample_rate: int, chunk_seconds: float,
+                overlap_seconds: float) -> List[Tuple[int, int]]:
+    """Returns (start, end) sample ranges of overlapping segments covering the clip."""
+    overlap = int(overlap_seconds * sample_rate)
+    boundaries = find_split_points(samples, sample_rate, chunk_seconds)
+    return [
+        (max(0, start - overlap), min(len(samples), end + overlap))
+        for start, end in zip(boundaries, boundaries[1:])
+    ]
+
+def _normalize_word(word: str) -> str:
+    return re.sub(r"[^\w']", "", word.lower())
+
+def stitch_transcripts(parts: List[str], max_overlap_words: int = 20, min_overlap_words: int = 2) -> str:
+    """
+    Joins segment transcripts in order, dropping the words each segment repeats
+    from the end of the previous one. A partially heard word at either side of
+    the cut may differ, so up to one boundary word on each side is ignored
+    when matching. Overlaps shorter than min_overlap_words (one more when a
+    boundary word is ignored) are treated as chance repeats of common words
+    such as "the" and the segments are simply concatenated.
+    """
+    words: List[str] = []
+    for part in parts:
+        incoming = part.split()
+        if not words:
+            words = incoming
+            continue
+        best = None
+        for trim_tail in (0, 1):
+            for trim_head in (0, 1):
+                tail = [_normalize_word(w) for w in words[:len(words) - trim_tail]]
+                head = [_normalize_word(w) for w in incoming[trim_head:]]
+                # Trimmed matches need one extra word to be trusted
+                shortest = min_overlap_words if trim_tail == trim_head == 0 else min_overlap_words + 1
+                for size in range(min(max_overlap_words, len(tail), len(head)), shortest - 1, -1):
+                    if tail[-size:] == head[:size]:
+                        if best is None or size > best[0]:
+                            best = (size, trim_tail, trim_head)
+                        break
+        if best is None:
+            words.extend(incoming)
+        else:
+            size, trim_tail, trim_head = best
+            words = words[:len(words) - trim_tail] + incoming[trim_head + size:]
+    return " ".join(words)
+
+def transcribe_chunked(audio_file, job_name: Optional[str] = None,
+                       on_progress: Optional[Callable[[int, int], None]] = None,
+                       transcribe_fn: Optional[Callable] = None) -> Optional[str]:
+    """
+    Transcribes a long WAV recording as concurrent overlapping segments.
+
+    Args:
+        audio_file: WAV file object (other formats and short clips are transcribed whole)
+        job_name: Base job name; segments use <job_name>_p<NNN>
+        on_progress: Called as on_progress(completed, total) on the calling
+            thread as segments finish, so Streamlit elements can be updated
+        transcribe_fn: Transcribes one segment (defaults to aws_services.transcribe_audio_file)
+
+    Returns:
+        The stitched transcript, or None if any segment could not be
+        transcribed (a partial transcript must not be scored as the whole
+        recording)
+    """
+    if transcribe_fn is None:
+        from aws_services import transcribe_audio_file as transcribe_fn
+
+    settings = config.transcription
+    duration = audio_duration(audio_file)
+    decoded = None
+    if duration is not None and duration >= settings.chunk_min_seconds:
+        decoded = read_wav(audio_file.read())
+        audio_file.seek(0)
+    if decoded is None:
+        transcript = transcribe_fn(audio_file, job_name)
+        if on_progress:
+            on_progress(1, 1)
+        return transcript
+
+    digest = audio_digest(audio_file) if settings.dedup_enabled else None
+    transcript = audio_index.lookup_transcript(digest) if digest else None
+    if transcript:
+        if on_progress:
+            on_progress(1, 1)
+        return transcript
+
+    samples, sample_rate = decoded
+    mono = samples.mean(axis=1) if samples.shape[1] > 1 else samples[:, 0]
+    segments = split_audio(mono, sample_rate, settings.chunk_seconds, settings.chunk_overlap_seconds)
+    job_name = job_name or unique_job_name()
+    base_name = os.path.splitext(getattr(audio_file, 'name', 'recording.wav'))[0]
+    print(f"DEBUG: Transcribing {duration:.0f}s recording as {len(segments)} segments")
+
+    def transcribe_segment(index: int, start: int, end: int) -> Optional[str]:
+        segment = BytesIO(write_wav(mono[start:end], sample_rate))
+        segment.name = f"{base_name}_p{index:03d}.wav"
+        return transcribe_fn(segment, f"{job_name}_p{index:03d}")
+
+    executor = get_chunk_executor()
+    futures = {
+        executor.submit(transcribe_segment, index, start, end): index
+        for index, (start, end) in enumerate(segments)
+    }
+    transcripts: List[Optional[str]] = [None] * len(segments)
+    for completed, future in enumerate(as_completed(futures), start=1):
+        index = futures[future]
+        try:
+            transcripts[index] = future.result()
+        except Exception as e:
+            print(f"ERROR: Segment {index} transcription failed: {e}")
+        if on_progress:
+            on_progress(completed, len(segments))
+
+    missing = [index for index, text in enumerate(transcripts) if not text]
+    if missing:
+        print(f"ERROR: {len(missing)} of {len(segments)} segments produced no transcript: {missing}")
+        return None
+    transcript = stitch_transcripts(transcripts)
+    if digest:
+        audio_index.record_transcript(digest, transcript, backend="chunked")
+    return transcript
@@ -5,7 +5,8 @@ Handles environment variables, feature flags, and deployment settings.
 """
 
 import os
-from typing import Dict, Any, Optional
+import tempfile
+from typing import Dict, Any, Optional, List
 from dataclasses import dataclass
 from enum import Enum
 
@@ -44,6 +45,92 @@ class AnalyticsConfig:
     sentry_dsn: str
     log_level: str
 
+@dataclass
+class NLPConfig:
+    """SpaCy model configuration shared by the metrics modules."""
+    model_name: str
+    excluded_components: List[str]
+    metrics_cache_path: str
+    metrics_cache_size: int
+    streaming_threshold_chars: int
+    streaming_chunk_chars: int
+
+@dataclass
+class ScoringConfig:
+    """Scoring profile file settings."""
+    profile_path: str
+    reload_interval_seconds: float
+
+@dataclass
+class AWSClientConfig:
+    """Connection settings applied to every boto3 client."""
+    max_pool_connections: int
+    connect_timeout: float
+    read_timeout: float
+    max_attempts: int
+    bedrock_read_timeout: float
+    multipart_threshold_mb: int
+    multipart_chunksize_mb: int
+    upload_concurrency: int
+    connectivity_check_interval: float
+
+@dataclass
+class TranscriptionConfig:
+    """Speech-to-text job settings."""
+    max_workers: int
+    poll_initial_seconds: float
+    poll_max_seconds: float
+    poll_backoff: float
+    timeout_seconds: float
+    backend: str
+    fallback_backends: List[str]
+    language_code: str
+    local_model_path: Optional[str]
+    local_workers: int
+    normalize_audio: bool
+    target_sample_rate: int
+    vad_threshold_db: float
+    vad_padding_ms: int
+    transcode_flac: bool
+    chunk_min_seconds: float
+    chunk_seconds: float
+    chunk_overlap_seconds: float
+    chunk_workers: int
+    dedup_enabled: bool
+    dedup_index_path: str
+    dedup_max_entries: int
+    dedup_ttl_seconds: float
+
+@dataclass
+class AIConfig:
+    """AI analysis (Bedrock agents) configuration."""
+    max_workers: int
+    agent_timeout_seconds: float
+    metrics_timeout_seconds: float
+    cache_backend: str
+    cache_ttl_seconds: int
+    cache_max_entries: int
+    cache_path: str
+    cache_redis_url: str
+    cache_excluded_agents: List[str]
+    rate_limit_rps: float
+    rate_limit_burst: int
+    max_concurrency: int
+    max_retries: int
+    backoff_base_seconds: float
+    backoff_max_seconds: float
+    breaker_failure_threshold: int
+    breaker_reset_seconds: float
+
+@dataclass
+class HistoryCacheConfig:
+    """Per-user wellness history cache settings."""
+    max_users: int
+    ttl_seconds: float
+    invalidation: str
+    invalidation_path: str
+    redis_url: str
+
 class Config:
     """Main configuration class for Cognora+."""
     
@@ -56,6 +143,17 @@ class Config:
         self.aws_region = os.getenv("AWS_DEFAULT_REGION", "us-east-1")
         self.aws_access_key_id = os.getenv("AWS_ACCESS_KEY_ID")
         self.aws_secret_access_key = os.getenv("AWS_SECRET_ACCESS_KEY")
+        self.aws_clients = AWSClientConfig(
+            max_pool_connections=int(os.getenv("AWS_MAX_POOL_CONNECTIONS", "50")),
+            connect_timeout=float(os.getenv("AWS_CONNECT_TIMEOUT", "5")),
+            read_timeout=float(os.getenv("AWS_READ_TIMEOUT", "30")),
+            max_attempts=int(os.getenv("AWS_MAX_ATTEMPTS", "5")),
+            bedrock_read_timeout=float(os.getenv("BEDROCK_READ_TIMEOUT", "120")),
+            multipart_threshold_mb=int(os.getenv("S3_MULTIPART_THRESHOLD_MB", "8")),
+            multipart_chunksize_mb=int(os.getenv("S3_MULTIPART_CHUNKSIZE_MB", "8")),
+            upload_concurrency=int(os.getenv("S3_UPLOAD_CONCURRENCY", "4")),
+            connectivity_check_interval=float(os.getenv("HEALTH_CHECK_INTERVAL", "30"))
+        )
         
         # Database Configuration
         self.database = DatabaseConfig(
@@ -82,6 +180,83 @@ class Config:
             log_level=os.getenv("LOG_LEVEL", "INFO")
         )
         
+        # NLP Configuration (components the cognitive metrics never read are excluded)
+        self.nlp = NLPConfig(
+            model_name=os.getenv("SPACY_MODEL", "en_core_web_md"),
+            excluded_components=[c.strip() for c in os.getenv("SPACY_EXCLUDE", "lemmatizer").split(",") if c.strip()],
+            metrics_cache_path=os.getenv("METRICS_CACHE_PATH", os.path.join(tempfile.gettempdir(), "cognora_metrics_cache.sqlite3")),
+            metrics_cache_size=int(os.getenv("METRICS_CACHE_SIZE", "512")),
+            streaming_threshold_chars=int(os.getenv("NLP_STREAMING_THRESHOLD_CHARS", "20000")),
+            streaming_chunk_chars=int(os.getenv("NLP_STREAMING_CHUNK_CHARS", "4000"))
+        )
+        
+        # Scoring Configuration (profile JSON is hot-reloaded when the file changes)
+        self.scoring = ScoringConfig(
+            profile_path=os.getenv("SCORING_PROFILE_PATH", ""),
+            reload_interval_seconds=float(os.getenv("SCORING_PROFILE_RELOAD_SECONDS", "5"))
+        )
+        
+        # Transcription Configuration
+        self.transcription = TranscriptionConfig(
+            max_workers=int(os.getenv("TRANSCRIBE_MAX_WORKERS", "4")),
+            poll_initial_seconds=float(os.getenv("TRANSCRIBE_POLL_INITIAL_SECONDS", "0.5")),
+            poll_max_seconds=float(os.getenv("TRANSCRIBE_POLL_MAX_SECONDS", "5")),
+            poll_backoff=float(os.getenv("TRANSCRIBE_POLL_BACKOFF", "1.5")),
+            timeout_seconds=float(os.getenv("TRANSCRIBE_TIMEOUT_SECONDS", "900")),
+            backend=os.getenv("TRANSCRIBER_BACKEND", "aws").strip().lower(),
+            fallback_backends=[
+                name.strip().lower() for name in os.getenv("TRANSCRIBER_FALLBACK", "").split(",") if name.strip()
+            ],
+            language_code=os.getenv("TRANSCRIBE_LANGUAGE_CODE", "en-US"),
+            local_model_path=os.getenv("LOCAL_STT_MODEL_PATH"),
+            local_workers=int(os.getenv("LOCAL_STT_WORKERS", "2")),
+            normalize_audio=os.getenv("AUDIO_NORMALIZE", "true").lower() == "true",
+            target_sample_rate=int(os.getenv("AUDIO_TARGET_SAMPLE_RATE", "16000")),
+            vad_threshold_db=float(os.getenv("AUDIO_VAD_THRESHOLD_DB", "-45")),
+            vad_padding_ms=int(os.getenv("AUDIO_VAD_PADDING_MS", "300")),
+            transcode_flac=os.getenv("AUDIO_TRANSCODE_FLAC", "false").lower() == "true",
+            chunk_min_seconds=float(os.getenv("TRANSCRIBE_CHUNK_MIN_SECONDS", "120")),
+            chunk_seconds=float(os.getenv("TRANSCRIBE_CHUNK_SECONDS", "60")),
+            chunk_overlap_seconds=float(os.getenv("TRANSCRIBE_CHUNK_OVERLAP_SECONDS", "1.5")),
+            chunk_workers=int(os.getenv("TRANSCRIBE_CHUNK_WORKERS", "4")),
+            dedup_enabled=os.getenv("AUDIO_DEDUP_ENABLED", "true").lower() == "true",
+            # Holds patient transcripts, so it lives in a private directory rather than the shared temp dir
+            dedup_index_path=os.getenv("AUDIO_DEDUP_INDEX_PATH", os.path.join(os.path.expanduser("~"), ".cognora", "audio_index.sqlite3")),
+            dedup_max_entries=int(os.getenv("AUDIO_DEDUP_MAX_ENTRIES", "256")),
+            dedup_ttl_seconds=float(os.getenv("AUDIO_DEDUP_TTL_SECONDS", "86400"))
+        )
+        
+        # AI Analysis Configuration (agents and local metrics run concurrently)
+        self.ai = AIConfig(
+            max_workers=int(os.getenv("ANALYSIS_MAX_WORKERS", "8")),
+            agent_timeout_seconds=float(os.getenv("AGENT_TIMEOUT_SECONDS", "45")),
+            metrics_timeout_seconds=float(os.getenv("METRICS_TIMEOUT_SECONDS", "20")),
+            cache_backend=os.getenv("LLM_CACHE_BACKEND", "memory").lower(),
+            cache_ttl_seconds=int(os.getenv("LLM_CACHE_TTL_SECONDS", "3600")),
+            cache_max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024")),
+            # Completions quote patient transcripts; keep them out of the shared temp dir
+            cache_path=os.getenv("LLM_CACHE_PATH", os.path.join(os.path.expanduser("~"), ".cognora", "llm_cache.sqlite3")),
+            cache_redis_url=os.getenv("LLM_CACHE_REDIS_URL", os.getenv("REDIS_URL", "")),
+            cache_excluded_agents=[a.strip() for a in os.getenv("LLM_CACHE_EXCLUDE_AGENTS", "").split(",") if a.strip()],
+            rate_limit_rps=float(os.getenv("BEDROCK_RATE_LIMIT_RPS", "2")),
+            rate_limit_burst=int(os.getenv("BEDROCK_RATE_LIMIT_BURST", "5")),
+            max_concurrency=int(os.getenv("BEDROCK_MAX_CONCURRENCY", "4")),
+            max_retries=int(os.getenv("BEDROCK_MAX_RETRIES", "4")),
+            backoff_base_seconds=float(os.getenv("BEDROCK_BACKOFF_BASE_SECONDS", "0.5")),
+            backoff_max_seconds=float(os.getenv("BEDROCK_BACKOFF_MAX_SECONDS", "8")),
+            breaker_failure_threshold=int(os.getenv("BEDROCK_BREAKER_FAILURES", "5")),
+            breaker_reset_seconds=float(os.getenv("BEDROCK_BREAKER_RESET_SECONDS", "30"))
+        )
+        
+        # History Cache Configuration (recent entries per user, shared by dashboard, reports and alerts)
+        self.history_cache = HistoryCacheConfig(
+            max_users=int(os.getenv("HISTORY_CACHE_MAX_USERS", "256")),
+            ttl_seconds=float(os.getenv("HISTORY_CACHE_TTL_SECONDS", "300")),
+            invalidation=os.getenv("HISTORY_CACHE_INVALIDATION", "none").lower(),
+            invalidation_path=os.getenv("HISTORY_CACHE_INVALIDATION_PATH", os.path.join(tempfile.gettempdir(), "cognora_history_versions.sqlite3")),
+            redis_url=os.getenv("HISTORY_CACHE_REDIS_URL", os.getenv("REDIS_URL", ""))
+        )
+        
         # Feature Flags (Billing disabled)
         self.features = {
             "voice_recording": os.getenv("FEATURE_VOICE_RECORDING", "true").lower() == "true",
@@ -89,6 +264,10 @@ class Config:
             "caregiver_alerts": os.getenv("FEATURE_CAREGIVER_ALERTS", "true").lower() == "true",
             "reports": os.getenv("FEATURE_REPORTS", "true").lower() == "true",
             "multi_language": os.getenv("FEATURE_MULTI_LANGUAGE", "true").lower() == "true",
+            "fast_metrics_preview": os.getenv("FEATURE_FAST_METRICS_PREVIEW", "true").lower() == "true",
+            "combined_agent_prompt": os.getenv("FEATURE_COMBINED_AGENT_PROMPT", "false").lower() == "true",
+            "streaming_analysis": os.getenv("FEATURE_STREAMING_ANALYSIS", "true").lower() == "true",
+            "chunked_transcription": os.getenv("FEATURE_CHUNKED_TRANSCRIPTION", "true").lower() == "true",
             "subscription_billing": False,  # Disabled
             "mfa": os.getenv("FEATURE_MFA", "false").lower() == "true",
             "api_access": os.getenv("FEATURE_API_ACCESS", "false").lower() == "true"
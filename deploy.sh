@@ -119,7 +119,6 @@ source cognora-env/bin/activate
 
 # Install Python packages
 pip install -r requirements.txt
-python -m spacy download en_core_web_sm
 
 # Create systemd service
 sudo tee /etc/systemd/system/cognora.service > /dev/null << 'SERVICE_EOF'
@@ -0,0 +1,210 @@
+"""
+Wellness History Cache for Cognora+
+Bounded per-user cache of recent history entries, kept newest first. Users
+are evicted least recently used past a size bound and reloaded after a TTL.
+Saves are written through, and an optional invalidation channel lets other
+worker processes drop their copies when a user's history changes.
+
+Invalidation channels:
+    none    Per-process only (entries still expire after the TTL)
+    sqlite  Version stamps in a SQLite file shared by processes on one host
+    redis   Version counters on a Redis-compatible server (needs the redis package)
+"""
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from config import config
+
+class SQLiteInvalidation:
+    """Per-user version stamps in a SQLite file shared by processes on one host."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS history_versions ("
+            "user_id TEXT PRIMARY KEY, version INTEGER NOT NULL)"
+        )
+        self._conn.commit()
+
+    def version(self, user_id: str) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version FROM history_versions WHERE user_id = ?", (user_id,)
+            ).fetchone()
+            return row[0] if row else 0
+
+    def bump(self, user_id: str) -> int:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO history_versions (user_id, version) VALUES (?, 1) "
+                "ON CONFLICT(user_id) DO UPDATE SET version = version + 1", (user_id,)
+            )
+            self._conn.commit()
+            return self._conn.execute(
+                "SELECT version FROM history_versions WHERE user_id = ?", (user_id,)
+            ).fetchone()[0]
+
+class RedisInvalidation:
+    """Per-user version counters on a Redis-compatible client (get / incr)."""
+
+    def __init__(self, client, prefix: str = "cognora:history:"):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisInvalidation":
+        import redis
+        return cls(redis.Redis.from_url(url))
+
+    def version(self, user_id: str) -> int:
+        return int(self.client.get(self.prefix + user_id) or 0)
+
+    def bump(self, user_id: str) -> int:
+        return int(self.client.incr(self.prefix + user_id))
+
+class HistoryCache:
+    """
+    LRU/TTL cache of each user's most recent entries, ordered newest first.
+
+    An entry remembers how many of the newest items it was loaded with
+    (depth), or that it holds the user's whole history, so a request for more
+    days than were loaded is a miss rather than a short answer.
+    """
+
+    def __init__(self, max_users: Optional[int] = None, ttl: Optional[float] = None,
+                 invalidation=None):
+        settings = config.history_cache
+        self.max_users = settings.max_users if max_users is None else max_users
+        self.ttl = settings.ttl_seconds if ttl is None else ttl
+        self.invalidation = invalidation
+        self._users: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0}
+
+    def _version(self, user_id: str) -> Optional[int]:
+        if self.invalidation is None:
+            return None
+        try:
+            return self.invalidation.version(user_id)
+        except Exception as e:
+            print(f"WARNING: History cache invalidation check failed: {e}")
+            return None
+
+    def get(self, user_id: str, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """Returns the newest `limit` entries, or None if they are not all cached."""
+        user_id = str(user_id)
+        version = self._version(user_id)
+        with self._lock:
+            cached = self._users.get(user_id)
+            if cached is not None and cached['expires_at'] <= time.monotonic():
+                del self._users[user_id]
+                self.stats['expirations'] += 1
+                cached = None
+            if cached is not None and version is not None and version != cached['version']:
+                del self._users[user_id]
+                self.stats['invalidations'] += 1
+                cached = None
+            if cached is None or (not cached['complete'] and cached['depth'] < limit):
+                self.stats['misses'] += 1
+                return None
+            self._users.move_to_end(user_id)
+            self.stats['hits'] += 1
+            return [dict(entry) for entry in cached['entries'][:limit]]
+
+    def store(self, user_id: str, entries: List[Dict[str, Any]], depth: int):
+        """
+        Caches a freshly loaded history.
+
+        Args:
+            user_id: User identifier
+            entries: The newest entries, newest first
+            depth: How many entries were requested (fewer back means the history is complete)
+        """
+        user_id = str(user_id)
+        version = self._version(user_id)
+        ordered = sorted((dict(entry) for entry in entries), key=_entry_order, reverse=True)
+        with self._lock:
+            self._users[user_id] = {
+                'entries': ordered,
+                'depth': len(ordered),
+                'complete': len(ordered) < depth,
+                'version': version,
+                'expires_at': time.monotonic() + self.ttl
+            }
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def add_entry(self, user_id: str, entry: Dict[str, Any]):
+        """
+        Write-through for a saved entry: replaces any entry for the same date
+        (the table's key) and keeps date order. Other processes are told to
+        drop their copy.
+        """
+        user_id = str(user_id)
+        version = None
+        if self.invalidation is not None:
+            try:
+                version = self.invalidation.bump(user_id)
+            except Exception as e:
+                print(f"WARNING: History cache invalidation publish failed: {e}")
+        with self._lock:
+            cached = self._users.get(user_id)
+            if cached is None:
+                return
+            entries = [e for e in cached['entries'] if e.get('date') != entry.get('date')]
+            oldest = entries[-1] if entries else None
+            # An entry older than everything cached may have unseen neighbours; only keep it if complete
+            if cached['complete'] or oldest is None or _entry_order(entry) >= _entry_order(oldest):
+                entries.append(dict(entry))
+                entries.sort(key=_entry_order, reverse=True)
+            cached['entries'] = entries
+            cached['depth'] = len(entries)
+            cached['version'] = version
+            self._users.move_to_end(user_id)
+
+    def update_entry(self, user_id: str, date: str, fields: Dict[str, Any]):
+        """Adds fields (e.g. a transcript fetched on demand) to a cached entry, if present."""
+        with self._lock:
+            cached = self._users.get(str(user_id))
+            if cached is None:
+                return
+            for entry in cached['entries']:
+                if entry.get('date') == date:
+                    entry.update(fields)
+
+    def invalidate(self, user_id: str):
+        """Drops one user's cached history."""
+        with self._lock:
+            if self._users.pop(str(user_id), None) is not None:
+                self.stats['invalidations'] += 1
+
+    def cached_count(self, user_id: str) -> int:
+        with self._lock:
+            cached = self._users.get(str(user_id))
+            return len(cached['entries']) if cached else 0
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+def _entry_order(entry: Dict[str, Any]) -> tuple:
+    return (str(entry.get('date', '')), str(entry.get('timestamp', '')))
+
+def create_invalidation_channel():
+    """Builds the invalidation channel selected by HISTORY_CACHE_INVALIDATION."""
+    settings = config.history_cache
+    try:
+        if settings.invalidation == "sqlite":
+            return SQLiteInvalidation(settings.invalidation_path)
+        if settings.invalidation == "redis" and settings.redis_url:
+            return RedisInvalidation.from_url(settings.redis_url)
+    except Exception as e:
+        print(f"WARNING: History cache invalidation '{settings.invalidation}' unavailable, per-process only: {e}")
+    return None
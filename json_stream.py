@@ -0,0 +1,140 @@
+"""
+Incremental JSON Parsing for Cognora+
+Parses a JSON object while it is still being streamed from the model and
+reports each field as soon as its value is complete, so the UI can show
+e.g. primary_emotion before the rest of the completion has arrived.
+"""
+
+import json
+from typing import Any, Callable, Dict, Optional, Tuple
+
+Path = Tuple[str, ...]
+
+class IncrementalJSONParser:
+    """
+    Streaming parser for one JSON object.
+
+    Text before the first "{" (model preamble) is skipped. Every value whose
+    parent is an object is reported through on_field(path, value) as soon as it
+    is complete, where path is the tuple of keys from the root, e.g.
+    ("primary_emotion",) or ("emotion", "confidence") for nested sections.
+    Values inside arrays are reported only as part of the whole array.
+    """
+
+    def __init__(self, on_field: Optional[Callable[[Path, Any], None]] = None):
+        self.on_field = on_field
+        self.fields: Dict[Path, Any] = {}
+        self.document = None
+        self.done = False
+        self._text = ""
+        self._pos = 0
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._in_scalar = False
+        self._token_start = 0
+
+    def feed(self, chunk: str) -> Dict[Path, Any]:
+        """
+        Consumes the next piece of text.
+
+        Returns:
+            The fields completed by this chunk (path -> value)
+        """
+        completed = {}
+        if self.done or not chunk:
+            return completed
+        self._text += chunk
+        text = self._text
+
+        while self._pos < len(text) and not self.done:
+            ch = text[self._pos]
+
+            if not self._stack:
+                if ch == "{":
+                    self._stack.append({'kind': 'object', 'start': self._pos, 'path': (), 'expect': 'key'})
+                self._pos += 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._end_string(completed)
+                self._pos += 1
+                continue
+
+            if self._in_scalar:
+                if ch not in ",}] \t\r\n":
+                    self._pos += 1
+                    continue
+                # The terminator is handled below as structure
+                self._in_scalar = False
+                self._complete_value(self._text[self._token_start:self._pos], completed)
+
+            frame = self._stack[-1]
+            if ch == '"':
+                self._in_string = True
+                self._token_start = self._pos
+            elif ch in "{[":
+                self._stack.append({
+                    'kind': 'object' if ch == "{" else 'array',
+                    'start': self._pos,
+                    'path': self._child_path(frame),
+                    'expect': 'key' if ch == "{" else 'value'
+                })
+            elif ch in "}]":
+                closed = self._stack.pop()
+                value_text = text[closed['start']:self._pos + 1]
+                if not self._stack:
+                    self.done = True
+                    try:
+                        self.document = json.loads(value_text)
+                    except json.JSONDecodeError:
+                        self.document = None
+                else:
+                    self._complete_value(value_text, completed)
+            elif ch == ":":
+                frame['expect'] = 'value'
+            elif ch == ",":
+                frame['expect'] = 'key' if frame['kind'] == 'object' else 'value'
+            elif not ch.isspace():
+                self._in_scalar = True
+                self._token_start = self._pos
+            self._pos += 1
+
+        return completed
+
+    def _child_path(self, frame) -> Optional[Path]:
+        if frame['path'] is None or frame['kind'] != 'object':
+            return None
+        return frame['path'] + (frame.get('key'),)
+
+    def _end_string(self, completed):
+        frame = self._stack[-1]
+        token = self._text[self._token_start:self._pos + 1]
+        if frame['kind'] == 'object' and frame['expect'] == 'key':
+            try:
+                frame['key'] = json.loads(token)
+            except json.JSONDecodeError:
+                frame['key'] = token.strip('"')
+        else:
+            self._complete_value(token, completed)
+
+    def _complete_value(self, value_text: str, completed):
+        frame = self._stack[-1]
+        path = self._child_path(frame)
+        if path is None:
+            return
+        try:
+            value = json.loads(value_text)
+        except json.JSONDecodeError:
+            # e.g. the unfilled "true/false" placeholder; the full parse decides
+            return
+        self.fields[path] = value
+        completed[path] = value
+        if self.on_field:
+            self.on_field(path, value)
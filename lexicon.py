@@ -0,0 +1,107 @@
+"""
+Emotion Lexicon Matching for Cognora+
+Shared, precompiled weighted lexicons used by scoring.py and nlp_metrics.py.
+
+Each lexicon is compiled once into a single regex whose alternation is factored
+as a prefix trie, so large lexicons scan text in one pass. English terms match
+on word boundaries ("bad" does not match "badminton"); Japanese terms, which are
+not space-delimited, match anywhere.
+"""
+
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable
+
+# Term -> weight (0-1, how strongly the term signals the emotion)
+NEGATIVE_LEXICON: Dict[str, float] = {
+    # English
+    "sad": 0.8, "sadness": 0.8, "unhappy": 0.8, "lonely": 0.9, "loneliness": 0.9, "alone": 0.4,
+    "bad": 0.5, "terrible": 0.8, "horrible": 0.8, "awful": 0.8,
+    "confused": 0.7, "confusion": 0.7, "forgetful": 0.6,
+    "worried": 0.7, "worry": 0.6, "worrying": 0.7, "anxious": 0.8, "anxiety": 0.8, "nervous": 0.6,
+    "frustrated": 0.7, "frustration": 0.7, "angry": 0.8, "anger": 0.8, "upset": 0.6, "irritated": 0.6,
+    "depressed": 1.0, "hopeless": 1.0, "scared": 0.7, "afraid": 0.7, "tired": 0.3, "exhausted": 0.5,
+    # Japanese
+    "悲しい": 0.8, "寂しい": 0.9, "さみしい": 0.9, "孤独": 0.9, "不安": 0.8, "心配": 0.7,
+    "混乱": 0.7, "怒り": 0.8, "イライラ": 0.7, "つらい": 0.8, "辛い": 0.8, "落ち込": 0.9,
+    "憂鬱": 1.0, "絶望": 1.0, "怖い": 0.7, "疲れ": 0.3,
+}
+
+POSITIVE_LEXICON: Dict[str, float] = {
+    # English
+    "good": 0.5, "great": 0.7, "wonderful": 0.9, "happy": 0.8, "happiness": 0.8, "lovely": 0.7,
+    "beautiful": 0.7, "excellent": 0.9, "nice": 0.5, "calm": 0.6, "content": 0.6, "grateful": 0.9,
+    "glad": 0.7, "joy": 0.9, "energized": 0.7, "peaceful": 0.7, "relaxed": 0.6, "excited": 0.7,
+    # Japanese
+    "嬉しい": 0.8, "うれしい": 0.8, "楽しい": 0.8, "幸せ": 0.9, "良い": 0.5, "素晴らしい": 0.9,
+    "感謝": 0.9, "ありがとう": 0.7, "元気": 0.6, "穏やか": 0.6,
+}
+
+_WORD_TERM = re.compile(r"^[\w' -]+$", re.ASCII)
+
+def _trie_pattern(terms: Iterable[str]) -> str:
+    """Builds a regex alternation factored by common prefixes."""
+    trie: Dict = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict) -> str:
+        branches = []
+        optional = "" in node
+        for char in sorted(k for k in node if k):
+            branches.append(re.escape(char) + build(node[char]))
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # A term may end here, so the rest of the branch is optional
+        return "(?:" + body + ")?" if optional else body
+
+    return build(trie)
+
+@dataclass
+class LexiconScan:
+    """Result of scanning a text against one lexicon."""
+    count: int = 0
+    weight: float = 0.0
+    terms: Counter = field(default_factory=Counter)
+
+    def __bool__(self) -> bool:
+        return self.count > 0
+
+class LexiconMatcher:
+    """Precompiled single-pass matcher for a weighted lexicon."""
+
+    def __init__(self, lexicon: Dict[str, float]):
+        self.weights = {term.casefold(): weight for term, weight in lexicon.items()}
+        word_terms = [t for t in self.weights if _WORD_TERM.match(t)]
+        other_terms = [t for t in self.weights if not _WORD_TERM.match(t)]
+
+        parts = []
+        if word_terms:
+            parts.append(r"(?<!\w)" + _trie_pattern(word_terms) + r"(?!\w)")
+        if other_terms:
+            parts.append(_trie_pattern(other_terms))
+        self._regex = re.compile("|".join(parts), re.IGNORECASE) if parts else None
+
+    def search(self, text: str) -> bool:
+        """True if any lexicon term occurs in text."""
+        return bool(self._regex and text and self._regex.search(text))
+
+    def scan(self, text: str) -> LexiconScan:
+        """Counts every lexicon hit in text and sums their weights."""
+        result = LexiconScan()
+        if not self._regex or not text:
+            return result
+        for match in self._regex.finditer(text):
+            term = match.group(0).casefold()
+            result.count += 1
+            result.weight += self.weights.get(term, 0.0)
+            result.terms[term] += 1
+        return result
+
+negative_matcher = LexiconMatcher(NEGATIVE_LEXICON)
+positive_matcher = LexiconMatcher(POSITIVE_LEXICON)
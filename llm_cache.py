@@ -0,0 +1,207 @@
+"""
+Bedrock Response Cache for Cognora+
+Caches model completions keyed by model ID, max_tokens and a hash of the
+normalized prompt, so reruns, "Analyze Again" and test runs with the same
+input do not pay model latency and cost again. Entries expire after a TTL and
+backends are bounded in size.
+
+Backends:
+    memory  In-process LRU (default)
+    sqlite  On-disk, shared by processes on one host
+    redis   Any Redis-compatible server (needs the redis package)
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from config import config
+
+# agents.py stamps every prompt with the current time; it must not affect the key
+_TIMESTAMP_LINE = re.compile(r'^\s*"timestamp"\s*:\s*"[^"]*"\s*,?\s*$', re.MULTILINE)
+
+def normalize_prompt(prompt: str) -> str:
+    """Drops volatile timestamp lines and collapses whitespace."""
+    return " ".join(_TIMESTAMP_LINE.sub("", prompt or "").split())
+
+def response_cache_key(model_id: str, max_tokens: int, prompt: str) -> str:
+    """Builds the SHA-256 cache key for a model request."""
+    material = "\0".join([model_id, str(max_tokens), normalize_prompt(prompt)])
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+class MemoryCacheBackend:
+    """Thread-safe in-process LRU with per-entry expiry."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: int):
+        with self._lock:
+            self._entries[key] = (value, time.time() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class SQLiteCacheBackend:
+    """
+    On-disk cache; the least recently written entries are evicted past max_entries.
+    Completions are built from patient transcripts, so the file lives in a
+    private (0700) directory and is readable only by its owner.
+    """
+
+    def __init__(self, path: str, max_entries: int = 1024):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), mode=0o700, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        os.chmod(path, 0o600)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "expires_at REAL NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM responses WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+            return row[0] if row else None
+
+    def set(self, key: str, value: str, ttl: int):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at, created_at) VALUES (?, ?, ?, ?)",
+                (key, value, now + ttl, now)
+            )
+            self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+            self._conn.execute(
+                "DELETE FROM responses WHERE key NOT IN "
+                "(SELECT key FROM responses ORDER BY created_at DESC LIMIT ?)", (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+class RedisCacheBackend:
+    """
+    Cache backed by a Redis-compatible client (get / set(ex=) / scan_iter / delete).
+    Expiry is handled by the server; size is bounded by the server's maxmemory policy.
+    """
+
+    def __init__(self, client, prefix: str = "cognora:llm:"):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisCacheBackend":
+        import redis
+        return cls(redis.Redis.from_url(url))
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.client.get(self.prefix + key)
+        if isinstance(value, bytes):
+            value = value.decode("utf-8")
+        return value
+
+    def set(self, key: str, value: str, ttl: int):
+        self.client.set(self.prefix + key, value, ex=ttl)
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + "*"):
+            self.client.delete(key)
+
+class ResponseCache:
+    """Caches Bedrock completions (text and usage) in a pluggable backend."""
+
+    def __init__(self, backend=None, ttl: Optional[int] = None):
+        self.backend = backend
+        self.ttl = config.ai.cache_ttl_seconds if ttl is None else ttl
+        self.stats = {'hits': 0, 'misses': 0, 'errors': 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def get(self, model_id: str, max_tokens: int, prompt: str) -> Optional[Dict[str, Any]]:
+        """Returns the cached response for a request, or None."""
+        if not self.enabled:
+            return None
+        try:
+            value = self.backend.get(response_cache_key(model_id, max_tokens, prompt))
+        except Exception as e:
+            print(f"WARNING: LLM cache read failed: {e}")
+            self.stats['errors'] += 1
+            return None
+        if value is None:
+            self.stats['misses'] += 1
+            return None
+        self.stats['hits'] += 1
+        return json.loads(value)
+
+    def set(self, model_id: str, max_tokens: int, prompt: str, response: Dict[str, Any]):
+        """Stores a response's text and usage."""
+        if not self.enabled:
+            return
+        value = json.dumps({'text': response['text'], 'usage': response.get('usage', {})})
+        try:
+            self.backend.set(response_cache_key(model_id, max_tokens, prompt), value, self.ttl)
+        except Exception as e:
+            print(f"WARNING: LLM cache write failed: {e}")
+            self.stats['errors'] += 1
+
+    def clear(self):
+        if self.enabled:
+            self.backend.clear()
+
+def create_response_cache() -> ResponseCache:
+    """Builds the response cache selected by config.ai.cache_backend."""
+    backend_name = config.ai.cache_backend
+    backend = None
+    try:
+        if backend_name == "memory":
+            backend = MemoryCacheBackend(config.ai.cache_max_entries)
+        elif backend_name == "sqlite":
+            backend = SQLiteCacheBackend(config.ai.cache_path, config.ai.cache_max_entries)
+        elif backend_name == "redis":
+            backend = RedisCacheBackend.from_url(config.ai.cache_redis_url)
+        elif backend_name != "none":
+            print(f"WARNING: Unknown LLM cache backend '{backend_name}', caching disabled")
+    except ImportError:
+        print("WARNING: redis package not installed, LLM caching disabled")
+    except Exception as e:
+        print(f"WARNING: LLM cache backend '{backend_name}' unavailable, caching disabled: {e}")
+    return ResponseCache(backend)
+
+# Global instance
+response_cache = create_response_cache()
@@ -0,0 +1,199 @@
+"""
+Cognitive Metrics Cache for Cognora+
+Content-addressed cache for nlp_metrics results. Entries are keyed by a hash of
+the normalized transcript plus the model fingerprint and metrics version, held
+in an in-memory LRU tier backed by an on-disk SQLite tier.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from config import config
+from nlp_metrics import (
+    METRICS_VERSION, analyze_cognitive_metrics, analyze_cognitive_metrics_batch,
+    analyze_cognitive_metrics_stream
+)
+from nlp_models import model_fingerprint
+
+def normalize_transcript(text: str) -> str:
+    """
+    Normalizes a transcript so trivially different copies share a cache entry.
+    Applies Unicode NFC normalization and collapses runs of whitespace.
+    """
+    return " ".join(unicodedata.normalize("NFC", text or "").split())
+
+def metrics_cache_key(normalized_text: str, fingerprint: str, coherence_window: int = 1,
+                      mode: str = "full") -> str:
+    """Builds the SHA-256 cache key for an already normalized transcript."""
+    material = "\0".join([METRICS_VERSION, fingerprint, str(coherence_window), mode, normalized_text])
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+class MetricsCache:
+    """Two-tier (LRU memory + SQLite disk) cache of cognitive metrics."""
+
+    def __init__(self, path: Optional[str] = None, max_entries: Optional[int] = None):
+        self.path = config.nlp.metrics_cache_path if path is None else path
+        self.max_entries = max_entries or config.nlp.metrics_cache_size
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._purged_fingerprint = None
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0}
+
+        if self.path:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self._conn = sqlite3.connect(self.path, check_same_thread=False)
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS metrics ("
+                    "key TEXT PRIMARY KEY, fingerprint TEXT NOT NULL, "
+                    "metrics TEXT NOT NULL, created_at REAL NOT NULL)"
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                print(f"WARNING: Metrics cache disk tier disabled ({self.path}): {e}")
+                self._conn = None
+
+    def _purge_stale(self, fingerprint: str):
+        """Drops disk entries written by a different model (called once per fingerprint)."""
+        if self._conn is None or self._purged_fingerprint == fingerprint:
+            return
+        self._conn.execute("DELETE FROM metrics WHERE fingerprint != ?", (fingerprint,))
+        self._conn.commit()
+        self._purged_fingerprint = fingerprint
+
+    def get(self, key: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Returns a copy of the cached metrics for key, or None."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                return dict(self._memory[key])
+
+            if self._conn is not None:
+                try:
+                    self._purge_stale(fingerprint)
+                    row = self._conn.execute("SELECT metrics FROM metrics WHERE key = ?", (key,)).fetchone()
+                except sqlite3.Error as e:
+                    print(f"WARNING: Metrics cache read failed: {e}")
+                    row = None
+                if row:
+                    metrics = json.loads(row[0])
+                    self._remember(key, metrics)
+                    self.stats['disk_hits'] += 1
+                    return dict(metrics)
+
+            self.stats['misses'] += 1
+            return None
+
+    def set(self, key: str, fingerprint: str, metrics: Dict[str, Any]):
+        """Stores metrics in both tiers."""
+        with self._lock:
+            self._remember(key, dict(metrics))
+            if self._conn is not None:
+                try:
+                    self._purge_stale(fingerprint)
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO metrics (key, fingerprint, metrics, created_at) VALUES (?, ?, ?, ?)",
+                        (key, fingerprint, json.dumps(metrics), time.time())
+                    )
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    print(f"WARNING: Metrics cache write failed: {e}")
+
+    def _remember(self, key: str, metrics: Dict[str, Any]):
+        self._memory[key] = metrics
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def clear(self):
+        """Empties both tiers."""
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM metrics")
+                self._conn.commit()
+
+def _is_cacheable(metrics: Dict[str, Any]) -> bool:
+    # Never persist the placeholder returned when the model is missing
+    return "error" not in metrics
+
+def cached_analyze_cognitive_metrics(text: str, coherence_window: int = 1,
+                                     cache: Optional[MetricsCache] = None) -> Dict[str, Any]:
+    """
+    Cached drop-in for nlp_metrics.analyze_cognitive_metrics.
+    The normalized transcript is what gets analyzed, so a hit and a miss
+    always return the same result for the same key. Transcripts longer than
+    config.nlp.streaming_threshold_chars go through the streaming accumulator.
+
+    Args:
+        text: The user's transcript.
+        coherence_window: Passed through to the coherence engine.
+        cache: Cache instance (defaults to the process-wide metrics_cache)
+
+    Returns:
+        Metrics dictionary
+    """
+    cache = cache or metrics_cache
+    normalized = normalize_transcript(text)
+    fingerprint = model_fingerprint()
+    # Long voice transcripts are parsed in bounded chunks instead of one huge Doc
+    streamed = coherence_window == 1 and len(normalized) > config.nlp.streaming_threshold_chars
+    mode = f"stream:{config.nlp.streaming_chunk_chars}" if streamed else "full"
+    key = metrics_cache_key(normalized, fingerprint, coherence_window, mode)
+
+    metrics = cache.get(key, fingerprint)
+    if metrics is not None:
+        return metrics
+
+    if streamed:
+        metrics = analyze_cognitive_metrics_stream([normalized], config.nlp.streaming_chunk_chars)
+    else:
+        metrics = analyze_cognitive_metrics(normalized, coherence_window)
+    if _is_cacheable(metrics):
+        cache.set(key, fingerprint, metrics)
+    return metrics
+
+def cached_analyze_cognitive_metrics_batch(texts: Iterable[str], n_process: int = 1, batch_size: int = 64,
+                                           coherence_window: int = 1,
+                                           cache: Optional[MetricsCache] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Cached version of nlp_metrics.analyze_cognitive_metrics_batch for re-scoring jobs.
+    Only cache misses are sent through nlp.pipe; results are yielded in input order.
+    """
+    cache = cache or metrics_cache
+    fingerprint = model_fingerprint()
+    iterator = iter(texts)
+
+    while True:
+        chunk = [normalize_transcript(text) for text in islice(iterator, batch_size)]
+        if not chunk:
+            return
+
+        keys = [metrics_cache_key(text, fingerprint, coherence_window) for text in chunk]
+        results = [cache.get(key, fingerprint) for key in keys]
+        misses = [i for i, result in enumerate(results) if result is None]
+
+        if misses:
+            computed = analyze_cognitive_metrics_batch(
+                (chunk[i] for i in misses), n_process=n_process,
+                batch_size=batch_size, coherence_window=coherence_window
+            )
+            for i, metrics in zip(misses, computed):
+                if _is_cacheable(metrics):
+                    cache.set(keys[i], fingerprint, metrics)
+                results[i] = metrics
+
+        yield from results
+
+# Global instance
+metrics_cache = MetricsCache()
@@ -5,6 +5,7 @@ Production-ready monitoring with error tracking, performance metrics, and user a
 """
 
 import logging
+import threading
 import time
 import json
 from datetime import datetime, timedelta
@@ -176,6 +177,84 @@ class PerformanceMonitor:
         durations = [op.get('duration', 0) for op in self.metrics.values()]
         return sum(durations) / len(durations) if durations else 0.0
 
+class LLMUsageMonitor:
+    """Tracks Bedrock token usage, latency and combined-prompt savings."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.agents = {}
+        self.cache_hits = {}
+        self.parsing = {}
+        self.savings = {
+            'combined_calls': 0,
+            'combined_failures': 0,
+            'calls_saved': 0,
+            'input_tokens_saved': 0,
+            'latency_saved': 0.0
+        }
+    
+    def record_call(self, agent: str, input_tokens: int, output_tokens: int, latency: float):
+        """Record one model call made on behalf of an agent."""
+        with self._lock:
+            stats = self.agents.setdefault(agent, {
+                'calls': 0, 'input_tokens': 0, 'output_tokens': 0, 'total_latency': 0.0
+            })
+            stats['calls'] += 1
+            stats['input_tokens'] += input_tokens
+            stats['output_tokens'] += output_tokens
+            stats['total_latency'] += latency
+    
+    def record_cache_hit(self, agent: str):
+        """Record a model call served from the response cache."""
+        with self._lock:
+            self.cache_hits[agent] = self.cache_hits.get(agent, 0) + 1
+    
+    def record_parse(self, agent: str, outcome: str):
+        """Record how an agent's response was parsed: ok, extracted, repaired or failed."""
+        with self._lock:
+            stats = self.parsing.setdefault(agent, {'ok': 0, 'extracted': 0, 'repaired': 0, 'failed': 0})
+            stats[outcome] += 1
+    
+    def parse_failure_rates(self) -> Dict[str, float]:
+        """Share of each agent's responses that needed a repair call or could not be parsed."""
+        with self._lock:
+            rates = {}
+            for agent, stats in self.parsing.items():
+                total = sum(stats.values())
+                rates[agent] = (stats['repaired'] + stats['failed']) / total if total else 0.0
+            return rates
+    
+    def average_latency(self, agent: str) -> Optional[float]:
+        """Average latency of an agent's calls, or None before its first call."""
+        with self._lock:
+            stats = self.agents.get(agent)
+            return stats['total_latency'] / stats['calls'] if stats and stats['calls'] else None
+    
+    def record_combined_savings(self, calls_saved: int, input_tokens_saved: int, latency_saved: Optional[float]):
+        """Record what one combined call saved compared with separate agent calls."""
+        with self._lock:
+            self.savings['combined_calls'] += 1
+            self.savings['calls_saved'] += calls_saved
+            self.savings['input_tokens_saved'] += input_tokens_saved
+            if latency_saved is not None:
+                self.savings['latency_saved'] += latency_saved
+        logger.info(f"Combined prompt saved {calls_saved} calls, ~{input_tokens_saved} input tokens")
+    
+    def record_combined_failure(self):
+        """Record a combined call that fell back to separate agent calls."""
+        with self._lock:
+            self.savings['combined_failures'] += 1
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get usage and savings metrics."""
+        with self._lock:
+            return {
+                'agents': {name: dict(stats) for name, stats in self.agents.items()},
+                'cache_hits': dict(self.cache_hits),
+                'parsing': {name: dict(stats) for name, stats in self.parsing.items()},
+                'savings': dict(self.savings)
+            }
+
 class UserAnalytics:
     """Tracks user behavior and engagement."""
     
@@ -273,14 +352,27 @@ class HealthCheck:
     def check_aws_services(self) -> bool:
         """Check AWS services connectivity."""
         try:
-            import boto3
-            from aws_services import test_aws_connection
-            
-            # This would run actual AWS connectivity tests
-            return True
+            # Uses the shared clients from aws_clients rather than creating new ones
+            from aws_services import bedrock_runtime, s3_client, scores_table
+            return all(client is not None for client in (bedrock_runtime, s3_client, scores_table))
         except Exception:
             return False
     
+    def check_aws_connectivity(self) -> bool:
+        """Check that S3, DynamoDB and SNS answer (rate-limited to HEALTH_CHECK_INTERVAL)."""
+        try:
+            from aws_services import check_aws_connectivity
+            return all(check_aws_connectivity().values())
+        except Exception:
+            return False
+    
+    def check_bedrock_limiter(self) -> bool:
+        """Check that the Bedrock circuit breaker is not rejecting calls."""
+        from rate_limiter import bedrock_limiter
+        metrics = bedrock_limiter.get_metrics()
+        logger.info(f"Bedrock limiter: {metrics}")
+        return metrics['breaker_state'] != 'open'
+    
     def check_database(self) -> bool:
         """Check database connectivity."""
         try:
@@ -301,11 +393,14 @@ class HealthCheck:
 # Global instances
 analytics_manager = AnalyticsManager()
 performance_monitor = PerformanceMonitor()
+llm_usage_monitor = LLMUsageMonitor()
 user_analytics = UserAnalytics()
 health_check = HealthCheck()
 
 # Add default health checks
 health_check.add_check('aws_services', health_check.check_aws_services)
+health_check.add_check('aws_connectivity', health_check.check_aws_connectivity)
+health_check.add_check('bedrock_limiter', health_check.check_bedrock_limiter)
 health_check.add_check('database', health_check.check_database)
 health_check.add_check('external_apis', health_check.check_external_apis)
 
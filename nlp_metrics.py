@@ -1,63 +1,103 @@
-import spacy
 from collections import Counter
 import re
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Iterable, Iterator, Tuple
+import numpy as np
+from nlp_models import get_nlp
+from lexicon import negative_matcher, positive_matcher
 
-# Load the SpaCy model
-# Ensure you have run: python -m spacy download en_core_web_md
-try:
-    nlp = spacy.load("en_core_web_md")
-except OSError:
-    print("Spacy model 'en_core_web_md' not found. Please run 'python -m spacy download en_core_web_md'")
-    nlp = None
+# Bump whenever the metric definitions change so cached results are invalidated
+METRICS_VERSION = "1"
 
-def analyze_cognitive_metrics(text: str) -> Dict[str, Any]:
+# "fast" runs only the tokenizer and static word vectors (live preview);
+# "full" runs the tagger, parser and NER (saved entries)
+METRICS_TIERS = ("fast", "full")
+SENTENCE_TERMINATORS = {".", "!", "?"}
+
+def _empty_metrics() -> Dict[str, Any]:
+    """Returns the metrics dictionary used when there is nothing to analyze."""
+    return {
+        "error": "NLP model not loaded or text is empty.",
+        "word_count": 0,
+        "unique_word_count": 0,
+        "lexical_diversity": 0,
+        "sentence_count": 0,
+        "avg_sentence_length": 0,
+        "noun_ratio": 0,
+        "verb_ratio": 0,
+        "adj_ratio": 0,
+        "named_entity_count": 0,
+        "coherence_score": 0,
+    }
+
+def sentence_vector_matrix(sentences) -> Tuple[np.ndarray, np.ndarray]:
     """
-    Analyzes a text to extract a wide range of cognitive and linguistic indicators.
+    Stacks sentence vectors into a single matrix and normalizes every row once.
     
     Args:
-        text: The user's transcript.
+        sentences: Sequence of SpaCy Spans (e.g. list(doc.sents))
     
     Returns:
-        A dictionary containing up to 10 cognitive metrics.
+        Tuple of (unit-length row matrix, boolean mask of rows with a usable vector)
     """
-    if not nlp or not text.strip():
-        return {
-            "error": "NLP model not loaded or text is empty.",
-            "word_count": 0,
-            "unique_word_count": 0,
-            "lexical_diversity": 0,
-            "sentence_count": 0,
-            "avg_sentence_length": 0,
-            "noun_ratio": 0,
-            "verb_ratio": 0,
-            "adj_ratio": 0,
-            "named_entity_count": 0,
-            "coherence_score": 0,
-        }
-
-    doc = nlp(text)
+    vectors = [sent.vector if sent.has_vector else None for sent in sentences]
+    width = next((len(v) for v in vectors if v is not None), 0)
+    if not width:
+        return np.zeros((len(vectors), 0)), np.zeros(len(vectors), dtype=bool)
     
-    words = [token.text.lower() for token in doc if token.is_alpha]
-    sentences = list(doc.sents)
+    matrix = np.zeros((len(vectors), width), dtype=np.float64)
+    for row, vector in enumerate(vectors):
+        if vector is not None:
+            matrix[row] = vector
     
-    # 1. Word Count
-    word_count = len(words)
+    norms = np.linalg.norm(matrix, axis=1)
+    valid = norms > 0
+    matrix[valid] /= norms[valid, None]
+    return matrix, valid
+
+def _coherence_sums(unit_vectors: np.ndarray, valid: np.ndarray, window: int = 1) -> Tuple[float, int]:
+    """Sum of similarities and number of usable pairs for offsets 1..window."""
+    total = 0.0
+    pairs = 0
+    for offset in range(1, max(1, window) + 1):
+        if offset >= len(unit_vectors):
+            break
+        pair_valid = valid[:-offset] & valid[offset:]
+        if not pair_valid.any():
+            continue
+        similarities = np.einsum("ij,ij->i", unit_vectors[:-offset], unit_vectors[offset:])
+        total += float(similarities[pair_valid].sum())
+        pairs += int(pair_valid.sum())
+    return total, pairs
+
+def coherence_from_matrix(unit_vectors: np.ndarray, valid: np.ndarray, window: int = 1) -> float:
+    """
+    Average cosine similarity between each sentence and the next `window` sentences.
     
-    # 2. Unique Word Count
-    unique_word_count = len(set(words))
+    With window=1 this is the classic adjacent-sentence coherence. All pairs at a
+    given offset are scored in one vectorized step on the pre-normalized matrix.
+    
+    Args:
+        unit_vectors: Row-normalized sentence matrix from sentence_vector_matrix
+        valid: Mask of rows that have a non-zero vector
+        window: Number of following sentences each sentence is compared with
     
+    Returns:
+        Mean similarity over all usable pairs (0 if there are none)
+    """
+    total, pairs = _coherence_sums(unit_vectors, valid, window)
+    return total / pairs if pairs else 0
+
+def _build_metrics(word_count: int, unique_word_count: int, sentence_count: int,
+                   pos_counts: Counter, named_entity_count: int,
+                   coherence_score: float) -> Dict[str, Any]:
+    """Turns raw counts into the metrics dictionary shared by every analysis mode."""
     # 3. Lexical Diversity (Type-Token Ratio)
     lexical_diversity = unique_word_count / word_count if word_count > 0 else 0
     
-    # 4. Sentence Count
-    sentence_count = len(sentences)
-    
     # 5. Average Sentence Length
     avg_sentence_length = word_count / sentence_count if sentence_count > 0 else 0
     
     # Part-of-Speech Ratios
-    pos_counts = Counter(token.pos_ for token in doc)
     total_pos = sum(pos_counts.values())
     
     # 6. Noun Ratio
@@ -68,21 +108,6 @@ def analyze_cognitive_metrics(text: str) -> Dict[str, Any]:
     
     # 8. Adjective Ratio
     adj_ratio = pos_counts.get("ADJ", 0) / total_pos if total_pos > 0 else 0
-    
-    # 9. Named Entity Count (people, places, organizations)
-    named_entity_count = len(doc.ents)
-    
-    # 10. Coherence Score (simple measure: average similarity between adjacent sentences)
-    coherence_score = 0
-    if sentence_count > 1:
-        similarities = []
-        for i in range(len(sentences) - 1):
-            s1 = sentences[i]
-            s2 = sentences[i+1]
-            # Ensure vectors are available
-            if s1.has_vector and s2.has_vector and s1.vector_norm and s2.vector_norm:
-                similarities.append(s1.similarity(s2))
-        coherence_score = sum(similarities) / len(similarities) if similarities else 0
 
     return {
         "word_count": word_count,
@@ -97,17 +122,291 @@ def analyze_cognitive_metrics(text: str) -> Dict[str, Any]:
         "coherence_score": round(coherence_score, 3),
     }
 
+def _metrics_from_doc(doc, coherence_window: int = 1) -> Dict[str, Any]:
+    """
+    Computes the cognitive metrics for an already parsed SpaCy Doc.
+    
+    Args:
+        doc: A Doc produced by the loaded pipeline.
+        coherence_window: If greater than 1, also report windowed k-sentence coherence.
+    
+    Returns:
+        A dictionary containing up to 10 cognitive metrics.
+    """
+    words = [token.text.lower() for token in doc if token.is_alpha]
+    sentences = list(doc.sents)
+    
+    # 1. Word Count / 2. Unique Word Count
+    word_count = len(words)
+    unique_word_count = len(set(words))
+    
+    # 4. Sentence Count
+    sentence_count = len(sentences)
+    
+    # 9. Named Entity Count (people, places, organizations)
+    named_entity_count = len(doc.ents)
+    
+    # 10. Coherence Score (simple measure: average similarity between adjacent sentences)
+    coherence_score = 0
+    windowed_coherence_score = 0
+    if sentence_count > 1:
+        unit_vectors, valid = sentence_vector_matrix(sentences)
+        coherence_score = coherence_from_matrix(unit_vectors, valid)
+        if coherence_window > 1:
+            windowed_coherence_score = coherence_from_matrix(unit_vectors, valid, coherence_window)
+
+    metrics = _build_metrics(
+        word_count, unique_word_count, sentence_count,
+        Counter(token.pos_ for token in doc), named_entity_count, coherence_score
+    )
+    if coherence_window > 1:
+        metrics["windowed_coherence_score"] = round(windowed_coherence_score, 3)
+    return metrics
+
+def _fast_metrics_from_doc(doc) -> Dict[str, Any]:
+    """
+    Computes the fast-tier metrics for a tokenizer-only Doc (nlp.make_doc).
+    
+    Sentences are split on terminal punctuation (as in scoring.analyze_text_metrics)
+    and coherence uses the static word vectors. POS ratios and entity counts need
+    the tagger and NER, so they are reported as 0.
+    """
+    words = [token.text.lower() for token in doc if token.is_alpha]
+    
+    sentences = []
+    start = 0
+    for token in doc:
+        if token.text in SENTENCE_TERMINATORS and (token.i + 1 == len(doc) or doc[token.i + 1].text not in SENTENCE_TERMINATORS):
+            sentences.append(doc[start:token.i + 1])
+            start = token.i + 1
+    if start < len(doc) and any(not token.is_space for token in doc[start:]):
+        sentences.append(doc[start:])
+    
+    coherence_score = 0
+    if len(sentences) > 1:
+        unit_vectors, valid = sentence_vector_matrix(sentences)
+        coherence_score = coherence_from_matrix(unit_vectors, valid)
+    
+    metrics = _build_metrics(len(words), len(set(words)), len(sentences), Counter(), 0, coherence_score)
+    metrics["metrics_tier"] = "fast"
+    return metrics
+
+def analyze_cognitive_metrics(text: str, coherence_window: int = 1, tier: str = "full") -> Dict[str, Any]:
+    """
+    Analyzes a text to extract a wide range of cognitive and linguistic indicators.
+    
+    Args:
+        text: The user's transcript.
+        coherence_window: If greater than 1, also report coherence averaged over
+            each sentence and its next k sentences ("windowed_coherence_score").
+        tier: "full" (tagger, parser, NER) or "fast" (tokenizer and word vectors only).
+    
+    Returns:
+        A dictionary containing up to 10 cognitive metrics.
+    """
+    if tier not in METRICS_TIERS:
+        raise ValueError(f"Unknown metrics tier '{tier}', expected one of {METRICS_TIERS}")
+    
+    nlp = get_nlp()
+    if not nlp or not text.strip():
+        return _empty_metrics()
+
+    if tier == "fast":
+        return _fast_metrics_from_doc(nlp.make_doc(text))
+    return _metrics_from_doc(nlp(text), coherence_window)
+
+def compare_metrics_tiers(texts: Iterable[str]) -> Dict[str, float]:
+    """
+    Mean absolute difference between the fast and full tiers for each metric.
+    Used to document the accuracy delta, e.g. against samples/sample_transcripts.json.
+    
+    Args:
+        texts: Transcripts to compare on.
+    
+    Returns:
+        Dictionary mapping metric name to mean absolute difference.
+    """
+    totals = Counter()
+    count = 0
+    for text in texts:
+        fast = analyze_cognitive_metrics(text, tier="fast")
+        full = analyze_cognitive_metrics(text, tier="full")
+        for key, value in full.items():
+            if isinstance(value, (int, float)):
+                totals[key] += abs(value - fast.get(key, 0))
+        count += 1
+    return {key: round(total / count, 3) for key, total in totals.items()} if count else {}
+
+def analyze_cognitive_metrics_batch(texts: Iterable[str], n_process: int = 1,
+                                    batch_size: int = 64,
+                                    coherence_window: int = 1) -> Iterator[Dict[str, Any]]:
+    """
+    Analyzes many transcripts through a single streamed SpaCy pipeline.
+    
+    Results are yielded lazily, in input order, and are identical to calling
+    analyze_cognitive_metrics on each text. Use this for re-scoring jobs and
+    backfills that walk a user's whole history.
+    
+    Args:
+        texts: Iterable of transcripts (may itself be a generator).
+        n_process: Number of worker processes for nlp.pipe (-1 uses every core).
+        batch_size: Number of texts buffered per batch.
+        coherence_window: Passed through to the coherence engine.
+    
+    Yields:
+        One metrics dictionary per input text.
+    """
+    nlp = get_nlp()
+    if not nlp:
+        for _ in texts:
+            yield _empty_metrics()
+        return
+
+    for doc in nlp.pipe(texts, n_process=n_process, batch_size=batch_size):
+        # Empty texts still go through the pipe so output order is preserved
+        if not doc.text.strip():
+            yield _empty_metrics()
+        else:
+            yield _metrics_from_doc(doc, coherence_window)
+
+class StreamingCognitiveMetrics:
+    """
+    Incrementally accumulates cognitive metrics over a long transcript.
+    
+    Text is buffered and parsed in sentence-sized chunks; only running counts,
+    the type set, and the previous sentence vector are kept between chunks, so
+    peak memory is bounded by chunk_chars rather than the transcript length.
+    A sentence still being written is never consumed: long unpunctuated text
+    stays buffered until a sentence boundary appears or the stream ends, so
+    the counts match analyze_cognitive_metrics. The result has the same keys.
+    """
+    
+    def __init__(self, chunk_chars: int = 4000):
+        self.chunk_chars = chunk_chars
+        self._buffer = ""
+        # Buffer length at which to re-parse after finding no sentence boundary
+        self._retry_chars = 0
+        self._word_count = 0
+        self._types = set()
+        self._pos_counts = Counter()
+        self._named_entity_count = 0
+        self._sentence_count = 0
+        self._similarity_total = 0.0
+        self._similarity_pairs = 0
+        self._previous_vector = None
+        self._previous_valid = False
+    
+    def feed(self, text: str):
+        """Adds text to the stream, parsing complete sentences once a chunk is full."""
+        # Slice large inputs so no single parse is much bigger than chunk_chars
+        for start in range(0, len(text), self.chunk_chars):
+            self._buffer += text[start:start + self.chunk_chars]
+            while len(self._buffer) >= max(self.chunk_chars, self._retry_chars):
+                if not self._consume(final=False):
+                    break
+    
+    def _consume(self, final: bool) -> bool:
+        """Parses the buffer and folds every complete sentence into the running counts."""
+        nlp = get_nlp()
+        if not nlp:
+            self._buffer = ""
+            return False
+        if not self._buffer.strip():
+            if final:
+                self._buffer = ""
+            return False
+        
+        doc = nlp(self._buffer)
+        sentences = list(doc.sents)
+        if not final and len(sentences) < 2:
+            # No complete sentence yet; wait for the buffer to double before parsing again
+            self._retry_chars = 2 * len(self._buffer)
+            return False
+        self._retry_chars = 0
+        if not final:
+            # Keep the trailing (possibly unfinished) sentence for the next chunk
+            remainder = sentences[-1]
+            sentences = sentences[:-1]
+            end = remainder.start
+            self._buffer = self._buffer[remainder.start_char:]
+        else:
+            end = len(doc)
+            self._buffer = ""
+        
+        for token in doc[:end]:
+            self._pos_counts[token.pos_] += 1
+            if token.is_alpha:
+                self._word_count += 1
+                self._types.add(token.text.lower())
+        self._named_entity_count += sum(1 for ent in doc.ents if ent.end <= end)
+        self._sentence_count += len(sentences)
+        
+        unit_vectors, valid = sentence_vector_matrix(sentences)
+        if self._previous_vector is not None and unit_vectors.shape[1] == len(self._previous_vector):
+            unit_vectors = np.vstack([self._previous_vector, unit_vectors])
+            valid = np.concatenate([[self._previous_valid], valid])
+        total, pairs = _coherence_sums(unit_vectors, valid)
+        self._similarity_total += total
+        self._similarity_pairs += pairs
+        if len(unit_vectors) and unit_vectors.shape[1]:
+            self._previous_vector = unit_vectors[-1]
+            self._previous_valid = bool(valid[-1])
+        return True
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Returns the metrics for everything consumed so far (excluding buffered text)."""
+        if not self._word_count and not self._sentence_count:
+            return _empty_metrics()
+        coherence_score = self._similarity_total / self._similarity_pairs if self._similarity_pairs else 0
+        return _build_metrics(
+            self._word_count, len(self._types), self._sentence_count,
+            self._pos_counts, self._named_entity_count, coherence_score
+        )
+    
+    def result(self) -> Dict[str, Any]:
+        """Flushes the buffer and returns the final metrics."""
+        self._consume(final=True)
+        return self.snapshot()
+
+def analyze_cognitive_metrics_stream(chunks: Iterable[str], chunk_chars: int = 4000) -> Dict[str, Any]:
+    """
+    Computes cognitive metrics over a stream of text pieces with bounded memory.
+    
+    Args:
+        chunks: Iterable of text pieces (e.g. transcript segments as they arrive).
+        chunk_chars: Approximate number of characters parsed at a time.
+    
+    Returns:
+        The same dictionary as analyze_cognitive_metrics.
+    """
+    accumulator = StreamingCognitiveMetrics(chunk_chars)
+    for chunk in chunks:
+        accumulator.feed(chunk)
+    return accumulator.result()
+
+def sentiment_lexicon_scan(text: str) -> Dict[str, Any]:
+    """
+    Scans text once per shared lexicon (see lexicon.py) and returns hit counts
+    and summed weights that can feed the score.
+    """
+    positive = positive_matcher.scan(text)
+    negative = negative_matcher.scan(text)
+    return {
+        "positive_count": positive.count,
+        "positive_weight": round(positive.weight, 3),
+        "negative_count": negative.count,
+        "negative_weight": round(negative.weight, 3),
+    }
+
 def has_positive_sentiment(text: str) -> bool:
     """
     A simple check for positive sentiment to guide conversation.
-    This is a placeholder and can be replaced with a more sophisticated model.
+    Uses the shared word-boundary lexicon in lexicon.py.
     """
-    positive_words = ["good", "great", "wonderful", "happy", "lovely", "beautiful", "excellent", "nice"]
-    return any(word in text.lower() for word in positive_words)
+    return positive_matcher.search(text)
 
 def has_negative_sentiment(text: str) -> bool:
     """
     A simple check for negative sentiment to guide conversation away from sensitive topics.
     """
-    negative_words = ["sad", "lonely", "bad", "terrible", "horrible", "confused", "worried", "anxious", "frustrated"]
-    return any(word in text.lower() for word in negative_words) 
\ No newline at end of file
+    return negative_matcher.search(text)
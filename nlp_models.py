@@ -0,0 +1,122 @@
+"""
+Shared SpaCy model registry for Cognora+
+Loads each configured pipeline once per process, on first use, so Streamlit
+workers hold a single model in memory and the first page render is not blocked.
+"""
+
+import sys
+import threading
+from typing import Any, Dict, Optional
+
+from config import config
+
+_models: Dict[str, Any] = {}
+_failed_models = set()
+_lock = threading.Lock()
+_warm_up_lock = threading.Lock()
+_warm_up_thread: Optional[threading.Thread] = None
+
+def get_nlp(model_name: Optional[str] = None):
+    """
+    Returns the shared SpaCy pipeline, loading it on first use.
+
+    Args:
+        model_name: Optional model override (defaults to config.nlp.model_name)
+
+    Returns:
+        The loaded Language object, or None if the model is not installed
+    """
+    name = model_name or config.nlp.model_name
+    model = _models.get(name)
+    if model is not None or name in _failed_models:
+        return model
+
+    with _lock:
+        # Another thread may have finished loading while we waited
+        if name in _models or name in _failed_models:
+            return _models.get(name)
+
+        try:
+            import spacy
+            model = spacy.load(name, exclude=config.nlp.excluded_components)
+            _models[name] = model
+            print(f"DEBUG: SpaCy model '{name}' loaded (pipeline: {model.pipe_names})")
+        except (ImportError, OSError):
+            print(f"Spacy model '{name}' not found. Please run 'python -m spacy download {name}'")
+            _failed_models.add(name)
+            model = None
+
+    return model
+
+def register_nlp(pipeline, model_name: Optional[str] = None):
+    """
+    Registers an already constructed pipeline under a model name.
+    Useful for tests and for callers that build custom pipelines.
+
+    Args:
+        pipeline: SpaCy Language object (or None to clear the entry)
+        model_name: Registry key (defaults to config.nlp.model_name)
+    """
+    name = model_name or config.nlp.model_name
+    with _lock:
+        _failed_models.discard(name)
+        if pipeline is None:
+            _models.pop(name, None)
+        else:
+            _models[name] = pipeline
+
+def model_fingerprint(model_name: Optional[str] = None) -> str:
+    """
+    Identifies the model that produces metrics, without loading it if possible.
+    Used to key caches so entries are invalidated when the model changes.
+
+    Args:
+        model_name: Optional model override (defaults to config.nlp.model_name)
+
+    Returns:
+        String of the form "name@version|exclude=..."
+    """
+    name = model_name or config.nlp.model_name
+    model = _models.get(name)
+    if model is not None:
+        version = model.meta.get("version", "unknown")
+    else:
+        try:
+            from spacy.util import get_package_version
+            version = get_package_version(name) or "unknown"
+        except ImportError:
+            version = "unknown"
+    excluded = ",".join(sorted(config.nlp.excluded_components))
+    return f"{name}@{version}|exclude={excluded}"
+
+def warm_up(background: bool = False) -> bool:
+    """
+    Loads the configured model and runs a tiny document through it so the
+    first real request does not pay the cold-start cost.
+
+    Args:
+        background: Load on a daemon thread and return immediately
+
+    Returns:
+        True if the model is (or is being) loaded
+    """
+    global _warm_up_thread
+
+    if background:
+        if config.nlp.model_name in _models:
+            return True
+        with _warm_up_lock:
+            if _warm_up_thread is None or not _warm_up_thread.is_alive():
+                _warm_up_thread = threading.Thread(target=warm_up, name="nlp-warm-up", daemon=True)
+                _warm_up_thread.start()
+        return True
+
+    nlp = get_nlp()
+    if nlp is None:
+        return False
+    nlp("Warm up.")
+    return True
+
+if __name__ == "__main__":
+    # Container entrypoint hook: fail fast if the configured model is missing
+    sys.exit(0 if warm_up() else 1)
@@ -0,0 +1,263 @@
+"""
+Analysis Orchestrator for Cognora+
+Fans out the independent parts of a check-in analysis (Bedrock agents and the
+local spaCy metrics) onto a shared, bounded thread pool so that end-to-end
+latency is roughly that of the slowest call rather than the sum of all calls.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from config import config
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_executor() -> ThreadPoolExecutor:
+    """Returns the process-wide analysis thread pool, creating it on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=config.ai.max_workers, thread_name_prefix="cognora-analysis"
+            )
+        return _executor
+
+class AnalysisOrchestrator:
+    """Runs the agents and local metrics for one check-in concurrently."""
+
+    def __init__(self, emotion_agent=None, memory_agent=None, alert_agent=None,
+                 metrics_fn: Optional[Callable[[str], Dict[str, Any]]] = None,
+                 executor: Optional[ThreadPoolExecutor] = None,
+                 agent_timeout: Optional[float] = None, metrics_timeout: Optional[float] = None,
+                 combined_agent=None, max_workers: Optional[int] = None):
+        if emotion_agent is None or memory_agent is None or alert_agent is None or combined_agent is None:
+            from agents import EmotionAgent, MemoryAgent, AlertAgent, CombinedAnalysisAgent
+            emotion_agent = emotion_agent or EmotionAgent()
+            memory_agent = memory_agent or MemoryAgent()
+            alert_agent = alert_agent or AlertAgent()
+            combined_agent = combined_agent or CombinedAnalysisAgent(emotion_agent, memory_agent, alert_agent)
+        if metrics_fn is None:
+            from metrics_cache import cached_analyze_cognitive_metrics
+            metrics_fn = cached_analyze_cognitive_metrics
+
+        self.emotion_agent = emotion_agent
+        self.memory_agent = memory_agent
+        self.alert_agent = alert_agent
+        self.combined_agent = combined_agent
+        self.metrics_fn = metrics_fn
+        self.executor = executor
+        self.agent_timeout = config.ai.agent_timeout_seconds if agent_timeout is None else agent_timeout
+        self.metrics_timeout = config.ai.metrics_timeout_seconds if metrics_timeout is None else metrics_timeout
+        # Size of the executor; calls still running past their deadline hold workers
+        self.max_workers = config.ai.max_workers if max_workers is None else max_workers
+        self._abandoned = set()
+        self._abandoned_lock = threading.Lock()
+
+    @property
+    def abandoned_calls(self) -> int:
+        """Timed-out calls that are still running and occupying a pool worker."""
+        with self._abandoned_lock:
+            return len(self._abandoned)
+
+    def analyze(self, transcript: str, user_context: str = "", include_memory: bool = False,
+                include_alert: bool = False, recent_scores=None, combined: Optional[bool] = None,
+                on_field: Optional[Callable] = None) -> Dict[str, Any]:
+        """
+        Analyzes a transcript with all independent components in parallel.
+        A component that fails or exceeds its timeout is replaced by an error
+        placeholder ({"error": ...}) so the rest of the analysis still completes.
+
+        In combined mode (config.features["combined_agent_prompt"]) the agent
+        sections are requested from the model in one call; if that call fails
+        or does not validate, the separate agents are called instead.
+
+        Args:
+            transcript: The user's transcript
+            user_context: Extra context passed to the agents
+            include_memory: Also run the MemoryAgent analysis
+            include_alert: Also run the AlertAgent evaluation
+            recent_scores: Recent Cognora Scores for the alert evaluation
+            combined: Override the combined prompt mode setting
+            on_field: Stream the emotion (or combined) call, calling
+                on_field(path, value) from a worker thread per decoded field
+
+        Returns:
+            Dictionary with emotion_analysis, cognitive_metrics, memory_analysis
+            and alert_analysis (None unless requested), mode ("combined" or
+            "separate"), timings (seconds per component plus total) and errors
+            (component -> message)
+        """
+        if combined is None:
+            combined = config.features.get("combined_agent_prompt", False)
+        sections = ("emotion",) + (("cognitive",) if include_memory else ()) + (("alert",) if include_alert else ())
+        metrics_task = (self.metrics_fn, (transcript,), self.metrics_timeout)
+        stream_args = (on_field,) if on_field else ()
+
+        results, timings, errors = {}, {}, {}
+        mode = "separate"
+        # A single section gains nothing from the combined prompt
+        if combined and len(sections) > 1:
+            results, timings, errors = self._run({
+                'combined': (self.combined_agent.analyze,
+                             (transcript, user_context, recent_scores, sections) + stream_args, self.agent_timeout),
+                'cognitive_metrics': metrics_task,
+            })
+            combined_result = results.pop('combined')
+            if combined_result and "error" not in combined_result:
+                mode = "combined"
+                results['emotion_analysis'] = combined_result["emotion"]
+                results['memory_analysis'] = combined_result.get("cognitive")
+                results['alert_analysis'] = combined_result.get("alert")
+            else:
+                errors.pop('combined', None)
+                print("WARNING: Combined analysis unavailable, using separate agent calls")
+
+        if mode == "separate":
+            tasks = {
+                'emotion_analysis': (self.emotion_agent.analyze_emotion,
+                                     (transcript, user_context) + stream_args, self.agent_timeout),
+            }
+            if 'cognitive_metrics' not in results:
+                tasks['cognitive_metrics'] = metrics_task
+            if include_memory:
+                tasks['memory_analysis'] = (
+                    self.memory_agent.analyze_cognitive_patterns, (transcript, user_context), self.agent_timeout
+                )
+            separate_results, separate_timings, separate_errors = self._run(tasks)
+            total = timings.get('total', 0.0) + separate_timings.pop('total')
+            results.update(separate_results)
+            timings.update(separate_timings)
+            errors.update(separate_errors)
+            timings['total'] = round(total, 3)
+
+            if include_alert:
+                started = time.perf_counter()
+                cognitive_analysis = results.get('memory_analysis') or results['cognitive_metrics']
+                results['alert_analysis'] = self.evaluate_alert(
+                    results['emotion_analysis'], cognitive_analysis, recent_scores, user_context
+                )
+                timings['alert_analysis'] = round(time.perf_counter() - started, 3)
+                timings['total'] = round(timings['total'] + timings['alert_analysis'], 3)
+
+        results.setdefault('memory_analysis', None)
+        results.setdefault('alert_analysis', None)
+        results['mode'] = mode
+        results['timings'] = timings
+        results['errors'] = errors
+        return results
+
+    def stream(self, transcript: str, **kwargs) -> Iterator[Tuple[str, Any, Any]]:
+        """
+        Runs analyze() on a background thread and yields its progress on the
+        calling thread, which is where Streamlit elements must be updated.
+
+        Yields:
+            ("field", path, value) for each streamed field, then
+            ("result", None, analysis) once the analysis is complete
+        """
+        updates = queue.Queue()
+        outcome = {}
+
+        def run():
+            try:
+                outcome['result'] = self.analyze(
+                    transcript, on_field=lambda path, value: updates.put((path, value)), **kwargs
+                )
+            except Exception as e:
+                outcome['error'] = e
+            finally:
+                updates.put(None)
+
+        threading.Thread(target=run, name="cognora-analysis-stream", daemon=True).start()
+        while True:
+            update = updates.get()
+            if update is None:
+                break
+            yield ("field",) + update
+
+        if 'error' in outcome:
+            raise outcome['error']
+        yield ("result", None, outcome['result'])
+
+    def evaluate_alert(self, emotion_analysis: Dict[str, Any], cognitive_analysis: Dict[str, Any],
+                       recent_scores, user_context: str = "") -> Dict[str, Any]:
+        """Runs the AlertAgent (which depends on the other results) with the agent timeout."""
+        results, _, _ = self._run({
+            'alert': (self.alert_agent.evaluate_alert_conditions,
+                      (emotion_analysis, cognitive_analysis, recent_scores, user_context), self.agent_timeout)
+        })
+        return results['alert']
+
+    def _run(self, tasks: Dict[str, tuple]):
+        executor = self.executor or get_executor()
+        started = time.perf_counter()
+        abandoned = self.abandoned_calls
+        if abandoned >= self.max_workers:
+            # Every worker is held by a timed-out call that cannot be interrupted;
+            # new calls would only queue until their own deadlines, so fail fast
+            message = f"analysis pool busy with {abandoned} timed-out calls"
+            print(f"WARNING: {message}, skipping {', '.join(tasks)}")
+            timings = {name: 0.0 for name in tasks}
+            timings['total'] = round(time.perf_counter() - started, 3)
+            return ({name: {"error": "busy"} for name in tasks}, timings, {name: message for name in tasks})
+        futures = {}
+        for name, (fn, args, _) in tasks.items():
+            futures[executor.submit(self._timed, fn, *args)] = name
+
+        results, timings, errors = {}, {}, {}
+        deadlines = {name: started + timeout for name, (_, _, timeout) in tasks.items()}
+        pending = set(futures)
+
+        while pending:
+            now = time.perf_counter()
+            # Expire whatever has passed its own deadline
+            for future in [f for f in pending if deadlines[futures[f]] <= now]:
+                name = futures[future]
+                pending.discard(future)
+                # A running call cannot be interrupted; its result is simply discarded
+                if not future.cancel():
+                    self._abandon(future)
+                timeout = tasks[name][2]
+                print(f"WARNING: {name} timed out after {timeout:.1f}s")
+                errors[name] = f"timeout after {timeout:.1f}s"
+                results[name] = {"error": "timeout"}
+                timings[name] = round(timeout, 3)
+            if not pending:
+                break
+
+            next_deadline = min(deadlines[futures[f]] for f in pending)
+            done, pending = wait(pending, timeout=max(0.0, next_deadline - now), return_when=FIRST_COMPLETED)
+            for future in done:
+                name = futures[future]
+                try:
+                    results[name], timings[name] = future.result()
+                except Exception as e:
+                    print(f"ERROR: {name} failed: {e}")
+                    errors[name] = str(e)
+                    results[name] = {"error": str(e)}
+                    timings[name] = round(time.perf_counter() - started, 3)
+
+        timings['total'] = round(time.perf_counter() - started, 3)
+        print(f"DEBUG: Analysis timings: {timings}")
+        return results, timings, errors
+
+    def _abandon(self, future):
+        """Tracks a timed-out call until it finishes and frees its worker."""
+        with self._abandoned_lock:
+            self._abandoned.add(future)
+
+        def release(done):
+            with self._abandoned_lock:
+                self._abandoned.discard(done)
+
+        future.add_done_callback(release)
+
+    @staticmethod
+    def _timed(fn, *args):
+        started = time.perf_counter()
+        result = fn(*args)
+        return result, round(time.perf_counter() - started, 3)
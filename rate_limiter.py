@@ -0,0 +1,248 @@
+"""
+Bedrock Rate Limiting for Cognora+
+Process-wide client-side limiter for model calls: an adaptive token bucket,
+a concurrency cap, jittered exponential backoff on throttling and a circuit
+breaker, with queue-depth metrics. Keeps throughput near the account quota
+instead of letting throttled calls turn into retry storms.
+"""
+
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from config import config
+
+THROTTLING_ERROR_CODES = {
+    "ThrottlingException", "TooManyRequestsException", "ServiceUnavailableException",
+    "ModelNotReadyException", "RequestLimitExceeded", "Throttling"
+}
+
+class CircuitOpenError(Exception):
+    """Raised when the circuit breaker is rejecting calls."""
+
+class RateLimitTimeout(Exception):
+    """Raised when a call could not be admitted within the wait timeout."""
+
+def is_throttling_error(error: Exception) -> bool:
+    """True for botocore ClientErrors (or modeled exceptions) that signal throttling."""
+    response = getattr(error, 'response', None) or {}
+    code = response.get('Error', {}).get('Code') or type(error).__name__
+    return code in THROTTLING_ERROR_CODES
+
+class TokenBucket:
+    """Token bucket whose refill rate can be adjusted while in use."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Takes one token, waiting up to timeout seconds. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+    def set_rate(self, rate: float):
+        with self._lock:
+            self._refill()
+            self.rate = rate
+
+class CircuitBreaker:
+    """Opens after consecutive failures and lets one trial call through after reset_timeout."""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> Tuple[bool, bool]:
+        """
+        Returns (allowed, trial). trial is True for the one caller that moved
+        the breaker to half open; it is decided under the lock, so concurrent
+        callers can never both get it.
+        """
+        with self._lock:
+            if self.state == "open":
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False, False
+                self.state = "half_open"
+                return True, True
+            # Only the single trial call may run while half open
+            return self.state == "closed", False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self.state = "closed"
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == "half_open" or self._failures >= self.failure_threshold:
+                if self.state != "open":
+                    print(f"WARNING: Bedrock circuit breaker opened after {self._failures} failures")
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
+class AdaptiveRateLimiter:
+    """
+    Admits model calls through a token bucket and a concurrency cap, retries
+    throttled calls with full-jitter exponential backoff, and adapts its rate
+    (halving on throttling, creeping back up on success).
+    """
+
+    def __init__(self, rate: Optional[float] = None, burst: Optional[int] = None,
+                 max_concurrency: Optional[int] = None, max_retries: Optional[int] = None,
+                 backoff_base: Optional[float] = None, backoff_max: Optional[float] = None,
+                 breaker: Optional[CircuitBreaker] = None, wait_timeout: Optional[float] = None,
+                 sleep: Callable[[float], None] = time.sleep):
+        ai = config.ai
+        self.max_rate = ai.rate_limit_rps if rate is None else rate
+        self.min_rate = self.max_rate / 8
+        self.bucket = TokenBucket(self.max_rate, ai.rate_limit_burst if burst is None else burst)
+        self.max_concurrency = ai.max_concurrency if max_concurrency is None else max_concurrency
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self.max_retries = ai.max_retries if max_retries is None else max_retries
+        self.backoff_base = ai.backoff_base_seconds if backoff_base is None else backoff_base
+        self.backoff_max = ai.backoff_max_seconds if backoff_max is None else backoff_max
+        self.breaker = breaker or CircuitBreaker(ai.breaker_failure_threshold, ai.breaker_reset_seconds)
+        self.wait_timeout = ai.agent_timeout_seconds if wait_timeout is None else wait_timeout
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self.metrics = {
+            'queue_depth': 0,
+            'max_queue_depth': 0,
+            'in_flight': 0,
+            'calls': 0,
+            'throttled': 0,
+            'retries': 0,
+            'failures': 0,
+            'rejected': 0,
+            'timeouts': 0
+        }
+
+    def _update(self, **deltas):
+        with self._lock:
+            for key, delta in deltas.items():
+                self.metrics[key] += delta
+            self.metrics['max_queue_depth'] = max(self.metrics['max_queue_depth'], self.metrics['queue_depth'])
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given retry attempt (0-based)."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Runs fn under the limiter.
+
+        Raises:
+            CircuitOpenError: The breaker is open
+            RateLimitTimeout: The call waited longer than wait_timeout to be admitted
+            Exception: The last error from fn once retries are exhausted
+        """
+        # The breaker lets a half-open trial through once; its retries must not
+        # ask again, and every way out of the trial has to close or reopen it
+        trial = self._check_breaker()
+        attempt = 0
+        while True:
+            if attempt and not trial:
+                self._check_breaker()
+
+            try:
+                self._admit()
+            except RateLimitTimeout:
+                if trial:
+                    self.breaker.record_failure()
+                raise
+            try:
+                self._update(calls=1)
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                if is_throttling_error(e) and attempt < self.max_retries:
+                    self._update(throttled=1, retries=1)
+                    self._on_throttle()
+                    delay = self.backoff_delay(attempt)
+                    attempt += 1
+                    print(f"WARNING: Bedrock throttled, retry {attempt}/{self.max_retries} in {delay:.2f}s")
+                    self._release()
+                    self._sleep(delay)
+                    continue
+                if is_throttling_error(e):
+                    self._update(throttled=1)
+                    self._on_throttle()
+                self._update(failures=1)
+                self.breaker.record_failure()
+                self._release()
+                raise
+            self.breaker.record_success()
+            self._on_success()
+            self._release()
+            return result
+
+    def _check_breaker(self) -> bool:
+        """Raises CircuitOpenError if the breaker rejects the call; returns whether it is the half-open trial."""
+        allowed, trial = self.breaker.allow()
+        if not allowed:
+            self._update(rejected=1)
+            raise CircuitOpenError("Bedrock circuit breaker is open")
+        return trial
+
+    def _admit(self):
+        self._update(queue_depth=1)
+        started = time.monotonic()
+        try:
+            if not self.bucket.acquire(timeout=self.wait_timeout):
+                self._update(timeouts=1)
+                raise RateLimitTimeout("Timed out waiting for a Bedrock rate limit token")
+            remaining = max(0.0, self.wait_timeout - (time.monotonic() - started))
+            if not self._slots.acquire(timeout=remaining):
+                self._update(timeouts=1)
+                raise RateLimitTimeout("Timed out waiting for a Bedrock concurrency slot")
+        finally:
+            self._update(queue_depth=-1)
+        self._update(in_flight=1)
+
+    def _release(self):
+        self._update(in_flight=-1)
+        self._slots.release()
+
+    def _on_throttle(self):
+        self.bucket.set_rate(max(self.min_rate, self.bucket.rate / 2))
+
+    def _on_success(self):
+        if self.bucket.rate < self.max_rate:
+            self.bucket.set_rate(min(self.max_rate, self.bucket.rate + self.max_rate / 20))
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Counters plus the current rate and breaker state."""
+        with self._lock:
+            metrics = dict(self.metrics)
+        metrics['rate'] = round(self.bucket.rate, 3)
+        metrics['breaker_state'] = self.breaker.state
+        return metrics
+
+# Global instance
+bedrock_limiter = AdaptiveRateLimiter()
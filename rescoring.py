@@ -0,0 +1,163 @@
+"""
+Background Re-scoring for Cognora+
+Recomputes stored Cognora Scores for a new scoring profile version in bulk and
+writes them alongside the original scores (as score_<version> / zone_<version>).
+"""
+
+import threading
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Optional
+
+import pandas as pd
+from boto3.dynamodb.conditions import Key
+
+from scoring import ScoringProfile, calculate_cognora_scores, BREAKDOWN_DEFAULTS
+
+def profile_score_attributes(version: str) -> Dict[str, str]:
+    """Attribute names a profile version's results are stored under."""
+    return {'score': f"score_{version}", 'zone': f"zone_{version}"}
+
+def iter_scored_entries(table, user_id: Optional[str] = None, page_size: int = 500) -> Iterator[Dict[str, Any]]:
+    """
+    Pages through stored entries, projecting only what re-scoring needs.
+
+    Args:
+        table: DynamoDB Table resource
+        user_id: Restrict to one user (query) instead of the whole table (scan)
+        page_size: Items per DynamoDB request
+
+    Yields:
+        Items with user_id, date, emotion, score_breakdown and cognitive_metrics
+    """
+    request = {
+        'ProjectionExpression': "user_id, #d, emotion, score_breakdown, cognitive_metrics",
+        'ExpressionAttributeNames': {'#d': 'date'},
+        'Limit': page_size
+    }
+    if user_id:
+        request['KeyConditionExpression'] = Key('user_id').eq(str(user_id))
+
+    while True:
+        response = table.query(**request) if user_id else table.scan(**request)
+        yield from response.get('Items', [])
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            return
+        request['ExclusiveStartKey'] = last_key
+
+def breakdown_frame(items: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Builds the calculate_cognora_scores input from stored items. The stored
+    sentence fluency already applied the old profile's ideal sentence length,
+    so the raw avg_sentence_length is passed too and fluency is recomputed
+    from it wherever it was stored.
+    """
+    rows = []
+    for item in items:
+        breakdown = item.get('score_breakdown') or {}
+        metrics = item.get('cognitive_metrics') or {}
+        row = {'user_id': item['user_id'], 'date': item['date'], 'primary_emotion': item.get('emotion', '')}
+        for column in BREAKDOWN_DEFAULTS:
+            if column in breakdown:
+                row[column] = float(breakdown[column])
+        try:
+            row['avg_sentence_length'] = float(metrics['avg_sentence_length'])
+        except (KeyError, TypeError, ValueError):
+            row['avg_sentence_length'] = None
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+class RescoreJob:
+    """Re-scores stored entries for one profile version on a background thread."""
+
+    def __init__(self, profile: ScoringProfile, table=None, user_id: Optional[str] = None,
+                 batch_size: int = 200):
+        if table is None:
+            from aws_services import scores_table
+            table = scores_table
+        self.profile = profile
+        self.table = table
+        self.user_id = user_id
+        self.batch_size = batch_size
+        self.status = {
+            'state': 'pending',
+            'profile_version': profile.version,
+            'processed': 0,
+            'updated': 0,
+            'skipped': 0,
+            'errors': []
+        }
+        self._thread = None
+
+    def start(self) -> 'RescoreJob':
+        """Starts the job on a daemon thread and returns immediately."""
+        self._thread = threading.Thread(target=self.run, name=f"rescore-{self.profile.version}", daemon=True)
+        self._thread.start()
+        return self
+
+    def wait(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Blocks until the job finishes (or the timeout passes) and returns its status."""
+        if self._thread:
+            self._thread.join(timeout)
+        return self.status
+
+    def run(self) -> Dict[str, Any]:
+        """Runs the job synchronously."""
+        if self.table is None:
+            self.status['state'] = 'failed'
+            self.status['errors'].append("DynamoDB table not initialized")
+            return self.status
+
+        self.status['state'] = 'running'
+        try:
+            batch = []
+            for item in iter_scored_entries(self.table, self.user_id):
+                self.status['processed'] += 1
+                # Entries saved before breakdowns were stored cannot be re-scored faithfully
+                if not item.get('score_breakdown'):
+                    self.status['skipped'] += 1
+                    continue
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    self._write_batch(batch)
+                    batch = []
+            if batch:
+                self._write_batch(batch)
+            self.status['state'] = 'completed'
+        except Exception as e:
+            print(f"ERROR: Re-score for profile {self.profile.version} failed: {e}")
+            self.status['state'] = 'failed'
+            self.status['errors'].append(str(e))
+        print(f"DEBUG: Re-score status: {self.status}")
+        return self.status
+
+    def _write_batch(self, items: List[Dict[str, Any]]):
+        frame = breakdown_frame(items)
+        scores = calculate_cognora_scores(frame, self.profile)
+        attributes = profile_score_attributes(self.profile.version)
+
+        for (_, entry), (_, result) in zip(frame.iterrows(), scores.iterrows()):
+            try:
+                self.table.update_item(
+                    Key={'user_id': entry['user_id'], 'date': entry['date']},
+                    UpdateExpression="SET #score = :score, #zone = :zone",
+                    ExpressionAttributeNames={'#score': attributes['score'], '#zone': attributes['zone']},
+                    ExpressionAttributeValues={':score': Decimal(str(result['score'])), ':zone': result['zone']}
+                )
+                self.status['updated'] += 1
+            except Exception as e:
+                self.status['errors'].append(f"{entry['user_id']}/{entry['date']}: {e}")
+
+def start_rescore(profile: ScoringProfile, user_id: Optional[str] = None, table=None) -> RescoreJob:
+    """
+    Starts a background re-score of stored entries for a profile version.
+
+    Args:
+        profile: The new scoring profile
+        user_id: Optional single user to re-score
+        table: DynamoDB table (defaults to aws_services.scores_table)
+
+    Returns:
+        The running RescoreJob (poll .status or call .wait())
+    """
+    return RescoreJob(profile, table=table, user_id=user_id).start()
@@ -1,20 +1,155 @@
 import json
+import math
+import os
 import re
-from typing import Dict, Any
+import threading
+import time
+from dataclasses import dataclass, asdict, fields
+from typing import Dict, Any, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+from config import config
 from nlp_metrics import analyze_cognitive_metrics
-import spacy
+from lexicon import negative_matcher
 
-def calculate_cognora_score(emotion_analysis, cognitive_metrics: dict) -> dict:
+@dataclass(frozen=True)
+class ScoringProfile:
+    """Versioned weights and thresholds used to compute the Cognora Score."""
+    version: str = "v1"
+    # Final score = emotion * emotion_weight + cognitive * cognitive_weight
+    emotion_weight: float = 0.5
+    cognitive_weight: float = 0.5
+    # Emotion component
+    confidence_weight: float = 0.5
+    stability_weight: float = 0.5
+    negative_emotion_penalty: float = 20
+    # Cognitive component
+    lexical_diversity_weight: float = 0.4
+    fluency_weight: float = 0.3
+    coherence_weight: float = 0.3
+    ideal_sentence_length: float = 15
+    # Wellness zones (also used for UI colors and emojis)
+    green_threshold: float = 75
+    yellow_threshold: float = 50
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ScoringProfile':
+        """
+        Builds a profile from a dict, ignoring unknown keys.
+        
+        Raises:
+            ValueError: The version is not a string, a weight/threshold is not a
+                finite number, a weight is negative, ideal_sentence_length is
+                not positive, or yellow_threshold exceeds green_threshold
+        """
+        if not isinstance(data, dict):
+            raise ValueError(f"Scoring profile must be a JSON object, got {type(data).__name__}")
+        known = {f.name for f in fields(cls)}
+        values = {k: v for k, v in data.items() if k in known}
+        invalid = [
+            f"{name}={value!r}" for name, value in values.items()
+            if (not isinstance(value, str) if name == 'version'
+                else isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value))
+        ]
+        if invalid:
+            raise ValueError(f"Invalid scoring profile values: {', '.join(invalid)}")
+        profile = cls(**values)
+        problems = [
+            f"{name} must not be negative" for name in PROFILE_WEIGHT_FIELDS if getattr(profile, name) < 0
+        ]
+        if profile.ideal_sentence_length <= 0:
+            problems.append("ideal_sentence_length must be positive")
+        if profile.yellow_threshold > profile.green_threshold:
+            problems.append("yellow_threshold must not exceed green_threshold")
+        if problems:
+            raise ValueError(f"Invalid scoring profile: {'; '.join(problems)}")
+        return profile
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def zone_for(self, score: float) -> Tuple[str, str]:
+        """Returns (zone, zone_name) for a final score."""
+        if score >= self.green_threshold:
+            return "green", "Excellent"
+        elif score >= self.yellow_threshold:
+            return "yellow", "Good"
+        return "red", "Concerning"
+
+DEFAULT_SCORING_PROFILE = ScoringProfile()
+
+# Profile fields that scale a score component and so must not be negative
+PROFILE_WEIGHT_FIELDS = (
+    'emotion_weight', 'cognitive_weight', 'confidence_weight', 'stability_weight',
+    'negative_emotion_penalty', 'lexical_diversity_weight', 'fluency_weight', 'coherence_weight'
+)
+
+class ScoringProfileRegistry:
+    """
+    Holds the active scoring profile and hot-reloads it from a JSON file.
+    
+    The file (SCORING_PROFILE_PATH) is re-checked at most every `check_interval`
+    seconds (SCORING_PROFILE_RELOAD_SECONDS); when its mtime changes the new
+    profile is swapped in without a restart, so every worker picks up a new
+    version on its next request. An invalid file is rejected and the current
+    profile kept.
+    """
+    
+    def __init__(self, path: Optional[str] = None, check_interval: Optional[float] = None):
+        self.path = path if path is not None else config.scoring.profile_path
+        self.check_interval = config.scoring.reload_interval_seconds if check_interval is None else check_interval
+        self._profile = DEFAULT_SCORING_PROFILE
+        self._loaded_mtime = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+    
+    def get(self) -> ScoringProfile:
+        """Returns the active profile, reloading the file if it changed."""
+        if self.path and time.time() - self._last_check >= self.check_interval:
+            self._reload_if_changed()
+        return self._profile
+    
+    def set(self, profile: ScoringProfile):
+        """Swaps in a profile programmatically."""
+        with self._lock:
+            self._profile = profile
+    
+    def _reload_if_changed(self):
+        with self._lock:
+            self._last_check = time.time()
+            try:
+                mtime = os.path.getmtime(self.path)
+                if mtime == self._loaded_mtime:
+                    return
+                with open(self.path) as f:
+                    profile = ScoringProfile.from_dict(json.load(f))
+                self._profile = profile
+                self._loaded_mtime = mtime
+                print(f"DEBUG: Scoring profile '{profile.version}' loaded from {self.path}")
+            except (OSError, json.JSONDecodeError, TypeError, ValueError) as e:
+                print(f"ERROR: Rejected scoring profile from {self.path}, keeping "
+                      f"'{self._profile.version}': {e}")
+
+scoring_profiles = ScoringProfileRegistry()
+
+def get_active_profile() -> ScoringProfile:
+    """Returns the scoring profile currently in effect."""
+    return scoring_profiles.get()
+
+def calculate_cognora_score(emotion_analysis, cognitive_metrics: dict,
+                            profile: Optional[ScoringProfile] = None) -> dict:
     """
     Calculates the Cognora Score (0-100) based on emotional and cognitive analysis.
     
     Args:
         emotion_analysis: dict or JSON string from EmotionAgent
         cognitive_metrics: Dictionary of metrics from nlp_metrics.py
+        profile: Scoring profile to use (defaults to the active profile)
     
     Returns:
         Dictionary containing score, breakdown, and wellness zone
     """
+    profile = profile or get_active_profile()
     try:
         # Parse analysis results
         if isinstance(emotion_analysis, str):
@@ -25,7 +160,8 @@ def calculate_cognora_score(emotion_analysis, cognitive_metrics: dict) -> dict:
         # Extract metrics from NLP pipeline
         lexical_diversity = cognitive_metrics.get('lexical_diversity', 0.5)
         # Normalize sentence length (assuming avg 15 words is good)
-        sentence_fluency = 1 - abs(15 - cognitive_metrics.get('avg_sentence_length', 15)) / 15
+        ideal_length = profile.ideal_sentence_length
+        sentence_fluency = 1 - abs(ideal_length - cognitive_metrics.get('avg_sentence_length', ideal_length)) / ideal_length
         coherence = cognitive_metrics.get('coherence_score', 0.5)
 
         # Extract metrics from Emotion Agent
@@ -35,27 +171,19 @@ def calculate_cognora_score(emotion_analysis, cognitive_metrics: dict) -> dict:
         
         # Calculate component scores (0-100 each)
         # Emotional score is based on stability and confidence, penalized by intensity of negative emotions
-        emotion_score = (emotion_confidence * 0.5 + emotion_stability * 0.5) * 100
+        emotion_score = (emotion_confidence * profile.confidence_weight + emotion_stability * profile.stability_weight) * 100
         if has_negative_sentiment(emotion_data.get('primary_emotion', '')):
-             emotion_score -= emotion_intensity * 20 # Penalty for strong negative emotion
+             emotion_score -= emotion_intensity * profile.negative_emotion_penalty # Penalty for strong negative emotion
 
         # Cognitive score is based on vocabulary, fluency, and coherence
-        cognitive_score = (lexical_diversity * 0.4 + sentence_fluency * 0.3 + coherence * 0.3) * 100
+        cognitive_score = (lexical_diversity * profile.lexical_diversity_weight + sentence_fluency * profile.fluency_weight + coherence * profile.coherence_weight) * 100
         
-        # Weighted final score (emotion 50%, cognitive 50%)
-        final_score = (emotion_score * 0.5) + (cognitive_score * 0.5)
+        # Weighted final score (emotion 50%, cognitive 50% by default)
+        final_score = (emotion_score * profile.emotion_weight) + (cognitive_score * profile.cognitive_weight)
         final_score = max(0, min(100, final_score)) # Clamp score between 0 and 100
         
         # Determine wellness zone
-        if final_score >= 75:
-            zone = "green"
-            zone_name = "Excellent"
-        elif final_score >= 50:
-            zone = "yellow"
-            zone_name = "Good"
-        else:
-            zone = "red"
-            zone_name = "Concerning"
+        zone, zone_name = profile.zone_for(final_score)
         
         return {
             'score': round(final_score, 1),
@@ -63,6 +191,7 @@ def calculate_cognora_score(emotion_analysis, cognitive_metrics: dict) -> dict:
             'cognitive_score': round(cognitive_score, 1),
             'zone': zone,
             'zone_name': zone_name,
+            'profile_version': profile.version,
             'breakdown': {
                 'emotion_confidence': emotion_confidence,
                 'emotion_stability': emotion_stability,
@@ -85,12 +214,101 @@ def calculate_cognora_score(emotion_analysis, cognitive_metrics: dict) -> dict:
             'error': str(e)
         }
 
+# Defaults used by calculate_cognora_score when a component is missing
+BREAKDOWN_DEFAULTS = {
+    'emotion_confidence': 0.5,
+    'emotion_stability': 0.5,
+    'emotion_intensity': 0.5,
+    'lexical_diversity': 0.5,
+    'sentence_fluency': 1.0,
+    'coherence': 0.5
+}
+
+def calculate_cognora_scores(components: Union[pd.DataFrame, Dict[str, Any]],
+                             profile: Optional[ScoringProfile] = None) -> Union[pd.DataFrame, Dict[str, np.ndarray]]:
+    """
+    Vectorized Cognora Score for many entries at once (e.g. re-scoring history).
+    
+    Applies exactly the same arithmetic as calculate_cognora_score, in the same
+    order, so results are bit-compatible with the scalar function. Only the final
+    rounding is done with Python's round() per element, because numpy.round uses
+    a different rounding strategy for values such as x.x5.
+    
+    Args:
+        components: DataFrame (or dict of arrays) with the breakdown columns
+            emotion_confidence, emotion_stability, emotion_intensity (0-1),
+            lexical_diversity, sentence_fluency and/or avg_sentence_length
+            (preferred where present, so the profile's ideal length applies) and
+            coherence, plus either a boolean negative_emotion column or a
+            primary_emotion column.
+        profile: Scoring profile to use (defaults to the active profile)
+    
+    Returns:
+        DataFrame with score, emotion_score, cognitive_score, zone, zone_name and
+        profile_version (same index as the input), or a dict of arrays for array input.
+    """
+    profile = profile or get_active_profile()
+    is_frame = isinstance(components, pd.DataFrame)
+    frame = components if is_frame else pd.DataFrame(components)
+    
+    def column(name):
+        if name == 'sentence_fluency' and 'avg_sentence_length' in frame:
+            # Recompute from the raw length so the profile's ideal_sentence_length
+            # applies; rows without it keep any precomputed fluency
+            ideal_length = profile.ideal_sentence_length
+            avg_length = frame['avg_sentence_length'].to_numpy(dtype=float)
+            fluency = 1 - np.abs(ideal_length - avg_length) / ideal_length
+            fallback = (frame[name].fillna(BREAKDOWN_DEFAULTS[name]).to_numpy(dtype=float) if name in frame
+                        else np.full(len(frame), BREAKDOWN_DEFAULTS[name], dtype=float))
+            return np.where(np.isnan(avg_length), fallback, fluency)
+        if name not in frame:
+            return np.full(len(frame), BREAKDOWN_DEFAULTS[name], dtype=float)
+        return frame[name].fillna(BREAKDOWN_DEFAULTS[name]).to_numpy(dtype=float)
+    
+    emotion_confidence = column('emotion_confidence')
+    emotion_stability = column('emotion_stability')
+    emotion_intensity = column('emotion_intensity')
+    lexical_diversity = column('lexical_diversity')
+    sentence_fluency = column('sentence_fluency')
+    coherence = column('coherence')
+    
+    if 'negative_emotion' in frame:
+        negative = frame['negative_emotion'].fillna(False).to_numpy(dtype=bool)
+    elif 'primary_emotion' in frame:
+        # Evaluate the lexicon once per distinct emotion rather than per row
+        emotions = frame['primary_emotion'].fillna('').astype(str)
+        lookup = {emotion: has_negative_sentiment(emotion) for emotion in emotions.unique()}
+        negative = emotions.map(lookup).to_numpy(dtype=bool)
+    else:
+        negative = np.zeros(len(frame), dtype=bool)
+    
+    emotion_score = (emotion_confidence * profile.confidence_weight + emotion_stability * profile.stability_weight) * 100
+    emotion_score = np.where(negative, emotion_score - emotion_intensity * profile.negative_emotion_penalty, emotion_score)
+    cognitive_score = (lexical_diversity * profile.lexical_diversity_weight + sentence_fluency * profile.fluency_weight + coherence * profile.coherence_weight) * 100
+    final_score = np.clip((emotion_score * profile.emotion_weight) + (cognitive_score * profile.cognitive_weight), 0, 100)
+    
+    green = final_score >= profile.green_threshold
+    yellow = final_score >= profile.yellow_threshold
+    zone = np.where(green, 'green', np.where(yellow, 'yellow', 'red'))
+    zone_name = np.where(green, 'Excellent', np.where(yellow, 'Good', 'Concerning'))
+    
+    result = {
+        'score': np.array([round(v, 1) for v in final_score.tolist()]),
+        'emotion_score': np.array([round(v, 1) for v in emotion_score.tolist()]),
+        'cognitive_score': np.array([round(v, 1) for v in cognitive_score.tolist()]),
+        'zone': zone,
+        'zone_name': zone_name,
+        'profile_version': np.full(len(frame), profile.version, dtype=object)
+    }
+    if is_frame:
+        return pd.DataFrame(result, index=frame.index)
+    return result
+
 def has_negative_sentiment(emotion: str) -> bool:
     """
     Checks for negative emotions to apply score penalties.
     """
-    negative_emotions = ["sad", "lonely", "anxious", "angry", "worried", "frustrated", "confused"]
-    return any(neg_emotion in emotion.lower() for neg_emotion in negative_emotions)
+    return negative_matcher.search(emotion or "")
 
 def analyze_text_metrics(text: str) -> Dict[str, float]:
     """
@@ -151,12 +369,8 @@ def get_score_color(score: float) -> str:
     Returns:
         Color string for UI display
     """
-    if score >= 75:
-        return "#28a745"  # Green
-    elif score >= 60:
-        return "#ffc107"  # Yellow
-    else:
-        return "#dc3545"  # Red
+    zone, _ = get_active_profile().zone_for(score)
+    return {"green": "#28a745", "yellow": "#ffc107"}.get(zone, "#dc3545")
 
 def get_score_emoji(score: float) -> str:
     """
@@ -168,12 +382,8 @@ def get_score_emoji(score: float) -> str:
     Returns:
         Emoji string
     """
-    if score >= 75:
-        return "😊"
-    elif score >= 60:
-        return "😐"
-    else:
-        return "😔"
+    zone, _ = get_active_profile().zone_for(score)
+    return {"green": "😊", "yellow": "😐"}.get(zone, "😔")
 
 def generate_score_feedback(score_data: Dict[str, Any]) -> str:
     """
@@ -214,5 +424,3 @@ def check_alert_conditions(recent_scores: list, recent_emotions: list, recent_co
             'urgency': 'high'
         }
     # ... (rest of your logic if needed) ...
-
-nlp = spacy.load("en_core_web_lg")
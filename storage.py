@@ -4,17 +4,19 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 from fpdf import FPDF
 import pandas as pd
-from aws_services import get_user_data, store_data_in_s3, store_report_in_s3, send_alert, test_aws_connection
+from aws_services import (
+    HISTORY_SUMMARY_ATTRIBUTES, get_user_data, get_user_entries, query_user_history, store_data_in_s3,
+    store_report_in_s3, send_alert, check_aws_connectivity
+)
+from history_cache import HistoryCache, create_invalidation_channel
 import boto3
 
 class DataManager:
     """Manages data storage and retrieval operations."""
     
-    def __init__(self):
-        self.cache = {}
-        # Test AWS connection on initialization
-        print("DEBUG: Initializing DataManager...")
-        test_aws_connection()
+    def __init__(self, cache: Optional[HistoryCache] = None):
+        # Connectivity is checked at startup and by the health checks, not per instance
+        self.cache = cache or HistoryCache(invalidation=create_invalidation_channel())
 
     def save_daily_entry(self, user_id: str, date: str, transcript: str, 
                         emotion_analysis: str, cognitive_metrics: Dict[str, Any], 
@@ -79,6 +81,7 @@ class DataManager:
                 'transcript': transcript,
                 'emotion_analysis': emotion_analysis,
                 'cognitive_metrics': json.dumps(cognitive_metrics),
+                'emotion': primary_emotion,
                 'score': score_data['score'],
                 'emotion_score': score_data.get('emotion_score', score_data['score']),
                 'cognitive_score': score_data.get('cognitive_score', score_data['score']),
@@ -114,7 +117,9 @@ class DataManager:
                 score=score_data['score'],
                 feedback=feedback,
                 cognitive_metrics=cognitive_metrics,
-                source=source  # Pass the source parameter
+                source=source,  # Pass the source parameter
+                score_breakdown=score_data.get('breakdown'),
+                profile_version=score_data.get('profile_version')
             )
             
             if not success:
@@ -123,11 +128,13 @@ class DataManager:
             
             print("DEBUG: Successfully saved to DynamoDB")
             
-            # Step 4: Update cache
+            # Step 4: Update cache (write-through, kept in date order); the
+            # analysis blobs are left out like they are on reads
             print("DEBUG: Step 4 - Updating cache...")
-            if user_id not in self.cache:
-                self.cache[user_id] = []
-            self.cache[user_id].append(entry_data)
+            self.cache.add_entry(user_id, {
+                key: value for key, value in entry_data.items()
+                if key not in ('emotion_analysis', 'cognitive_metrics')
+            })
             
             print(f"DEBUG: save_daily_entry - SUCCESS! Entry saved for user {user_id} on {date} from {source}")
             return True
@@ -147,33 +154,30 @@ class DataManager:
             days: Number of days to retrieve
         
         Returns:
-            List of historical entries
+            List of historical entries, newest first. Entries carry the summary
+            fields (see HISTORY_SUMMARY_ATTRIBUTES); use attach_transcripts for text.
         """
         print(f"DEBUG: get_user_history called - User: {user_id}, Days: {days}")
         
         try:
             # Try cache first
-            if user_id in self.cache:
-                cached_data = self.cache[user_id][-days:]
+            cached_data = self.cache.get(user_id, days)
+            if cached_data is not None:
                 print(f"DEBUG: Returning {len(cached_data)} items from cache")
                 return cached_data
             
-            # Fetch from DynamoDB
+            # Fetch only the newest entries' summary fields from DynamoDB, newest first
             print("DEBUG: Cache miss - fetching from DynamoDB...")
-            data = get_user_data(user_id)
+            result = list(query_user_history(user_id, limit=days, attributes=HISTORY_SUMMARY_ATTRIBUTES))
             
-            if not data:
+            if not result:
                 print(f"DEBUG: No data found in DynamoDB for user {user_id}")
                 return []
             
-            # Sort by date and limit
-            data.sort(key=lambda x: x.get('date', ''), reverse=True)
-            result = data[:days]
-            
             print(f"DEBUG: Retrieved {len(result)} items from DynamoDB")
             
             # Update cache
-            self.cache[user_id] = data
+            self.cache.store(user_id, result, depth=days)
             
             return result
             
@@ -183,6 +187,32 @@ class DataManager:
             traceback.print_exc()
             return []
     
+    def attach_transcripts(self, user_id: str, entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Adds the transcript to each of the given history entries, fetching only
+        those not already cached, so pages load text just for what they show.
+        
+        Args:
+            user_id: User identifier
+            entries: Entries from get_user_history (updated in place)
+        
+        Returns:
+            The same entries
+        """
+        missing = [entry['date'] for entry in entries if 'transcript' not in entry and entry.get('date')]
+        if missing:
+            print(f"DEBUG: Fetching {len(missing)} transcripts for user {user_id}")
+            fetched = {
+                item['date']: item.get('transcript', '')
+                for item in get_user_entries(user_id, missing, attributes=('date', 'transcript'))
+            }
+            for date, transcript in fetched.items():
+                self.cache.update_entry(user_id, date, {'transcript': transcript})
+            for entry in entries:
+                if entry.get('date') in fetched:
+                    entry['transcript'] = fetched[entry['date']]
+        return entries
+    
     def get_recent_scores(self, user_id: str, days: int = 7) -> list:
         """
         Gets recent Cognora scores for alert evaluation.
@@ -249,16 +279,18 @@ class DataManager:
         
         result = {
             'user_id': user_id,
-            'cache_entries': len(self.cache.get(user_id, [])),
+            'cache_entries': self.cache.cached_count(user_id),
+            'cache_stats': dict(self.cache.stats),
             'dynamodb_entries': 0,
             'aws_connection': False,
             'errors': []
         }
         
         try:
-            # Test AWS connection
-            test_aws_connection()
-            result['aws_connection'] = True
+            # Latest scheduled connectivity results
+            connectivity = check_aws_connectivity()
+            result['aws_connection'] = all(connectivity.values())
+            result['aws_services'] = connectivity
             
             # Test DynamoDB retrieval
             data = get_user_data(user_id)
@@ -276,8 +308,9 @@ class DataManager:
 class ReportGenerator:
     """Generates wellness reports and exports."""
     
-    def __init__(self):
+    def __init__(self, data_manager: Optional[DataManager] = None):
         self.pdf = None
+        self.data_manager = data_manager or DataManager()
     
     def generate_weekly_report(self, user_id: str, week_start: str) -> Optional[Dict[str, Any]]:
         """
@@ -293,8 +326,7 @@ class ReportGenerator:
         try:
             # Get week's data
             week_end = (datetime.strptime(week_start, '%Y-%m-%d') + timedelta(days=6)).strftime('%Y-%m-%d')
-            data_manager = DataManager()
-            week_data = data_manager.get_user_history(user_id, 7)
+            week_data = self.data_manager.get_user_history(user_id, 7)
             
             if not week_data:
                 return None
@@ -367,8 +399,7 @@ class ReportGenerator:
             CSV data as string
         """
         try:
-            data_manager = DataManager()
-            history = data_manager.get_user_history(user_id, days)
+            history = self.data_manager.get_user_history(user_id, days)
             
             if not history:
                 return None
@@ -389,8 +420,9 @@ class ReportGenerator:
 class AlertManager:
     """Manages caregiver alerts and notifications."""
     
-    def __init__(self):
+    def __init__(self, data_manager: Optional[DataManager] = None):
         self.alert_history = []
+        self.data_manager = data_manager or DataManager()
     
     def check_and_send_alerts(self, user_id: str) -> Dict[str, Any]:
         """
@@ -403,10 +435,9 @@ class AlertManager:
             Alert status and details
         """
         try:
-            data_manager = DataManager()
-            recent_scores = data_manager.get_recent_scores(user_id, 7)
-            recent_emotions = data_manager.get_recent_emotions(user_id, 7)
-            recent_cognitive_scores = data_manager.get_recent_cognitive_scores(user_id, 7)
+            recent_scores = self.data_manager.get_recent_scores(user_id, 7)
+            recent_emotions = self.data_manager.get_recent_emotions(user_id, 7)
+            recent_cognitive_scores = self.data_manager.get_recent_cognitive_scores(user_id, 7)
             print("DEBUG: check_and_send_alerts - recent_scores:", recent_scores)
             from scoring import check_alert_conditions
             alert_status = check_alert_conditions(recent_scores, recent_emotions, recent_cognitive_scores)
@@ -471,5 +502,5 @@ class AlertManager:
 
 # Global instances
 data_manager = DataManager()
-report_generator = ReportGenerator()
-alert_manager = AlertManager()
+report_generator = ReportGenerator(data_manager)
+alert_manager = AlertManager(data_manager)
@@ -0,0 +1,167 @@
+"""
+Structured Output Parsing for Cognora+
+Shared layer that turns model completions into validated dictionaries:
+fast extraction of the first JSON object (tolerating prose and code fences),
+per-agent schema validation, and at most one targeted repair call.
+"""
+
+import json
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from monitoring import llm_usage_monitor
+
+NUMBER = (int, float)
+
+# Field -> (expected type(s), required)
+EMOTION_SCHEMA = {
+    "primary_emotion": (str, True),
+    "confidence": (NUMBER, True),
+    "intensity": (NUMBER, True),
+    "stability": (str, False),
+    "concerning_patterns": (list, False),
+    "summary": (str, False),
+}
+
+COGNITIVE_SCHEMA = {
+    "lexical_diversity": (NUMBER, False),
+    "sentence_fluency": (NUMBER, False),
+    "repetition_score": (NUMBER, False),
+    "memory_indicators": (list, False),
+    "cognitive_concerns": (list, False),
+    "overall_cognitive_health": (str, True),
+}
+
+ALERT_SCHEMA = {
+    "alert_needed": (bool, True),
+    "alert_reason": (str, False),
+    "urgency": (str, False),
+    "recommended_action": (str, False),
+}
+
+_decoder = json.JSONDecoder()
+
+def extract_json_object(text: Optional[str]) -> Tuple[Optional[Dict[str, Any]], bool]:
+    """
+    Finds the first JSON object in a completion.
+
+    Returns:
+        (object or None, extracted) where extracted is True when the object had
+        to be pulled out of surrounding prose or code fences
+    """
+    if not text:
+        return None, False
+    stripped = text.strip()
+    try:
+        document = json.loads(stripped)
+        if isinstance(document, dict):
+            return document, False
+    except json.JSONDecodeError:
+        pass
+
+    start = stripped.find("{")
+    while start != -1:
+        try:
+            document, _ = _decoder.raw_decode(stripped, start)
+            if isinstance(document, dict):
+                return document, True
+        except json.JSONDecodeError:
+            pass
+        start = stripped.find("{", start + 1)
+    return None, False
+
+def _matches(value: Any, expected) -> bool:
+    # bool is an int subclass, but true/false is never a valid number here
+    if expected is NUMBER or expected is int or expected is float:
+        return isinstance(value, NUMBER) and not isinstance(value, bool)
+    return isinstance(value, expected)
+
+def validate_schema(document: Dict[str, Any], schema: Dict[str, tuple]) -> List[str]:
+    """
+    Checks a parsed document against a schema, coercing numeric strings in place.
+
+    Returns:
+        List of problems (empty when the document is valid)
+    """
+    errors = []
+    for field, (expected, required) in schema.items():
+        if field not in document or document[field] is None:
+            if required:
+                errors.append(f"missing required field '{field}'")
+            continue
+        value = document[field]
+        if expected is NUMBER and isinstance(value, str):
+            try:
+                document[field] = value = float(value)
+            except ValueError:
+                pass
+        if not _matches(value, expected):
+            expected_name = "number" if expected is NUMBER else expected.__name__
+            errors.append(f"field '{field}' should be {expected_name}, got {type(value).__name__}")
+    return errors
+
+def conforms_to(schema: Dict[str, tuple]) -> Callable[[Optional[str]], bool]:
+    """Predicate for response caching: True when a completion holds a JSON object valid for schema."""
+    def conforms(text: Optional[str]) -> bool:
+        document, _ = extract_json_object(text)
+        return document is not None and not validate_schema(document, schema)
+    return conforms
+
+def describe_schema(schema: Dict[str, tuple]) -> str:
+    """One line per field, used in repair prompts."""
+    lines = []
+    for field, (expected, required) in schema.items():
+        expected_name = "number" if expected is NUMBER else expected.__name__
+        lines.append(f'- "{field}": {expected_name}{" (required)" if required else ""}')
+    return "\n".join(lines)
+
+def build_repair_prompt(response: Optional[str], errors: List[str], schema: Dict[str, tuple]) -> str:
+    return f"""
+        Your previous response could not be used: {'; '.join(errors)}.
+
+        Previous response:
+        {response}
+
+        Return only a single JSON object, with no other text, containing these fields:
+        {describe_schema(schema)}
+        """
+
+def parse_structured_output(agent: str, response: Optional[str], schema: Dict[str, tuple],
+                            repair: Optional[Callable[[str], Optional[str]]] = None) -> Dict[str, Any]:
+    """
+    Parses and validates an agent's completion, making at most one repair call.
+
+    Args:
+        agent: Agent name, for metrics
+        response: The model's completion text
+        schema: The agent's schema
+        repair: Function that sends a repair prompt and returns the new completion
+
+    Returns:
+        The validated dictionary, or {"error": "malformed_json" | "schema_validation",
+        "raw": ..., "details": [...]} if it could not be recovered
+    """
+    document, extracted = extract_json_object(response)
+    errors = validate_schema(document, schema) if document is not None else ["no JSON object found"]
+    if not errors:
+        llm_usage_monitor.record_parse(agent, "extracted" if extracted else "ok")
+        return document
+
+    if repair is not None:
+        print(f"WARNING: {agent} response invalid ({'; '.join(errors)}), requesting one repair")
+        repaired_response = repair(build_repair_prompt(response, errors, schema))
+        repaired, _ = extract_json_object(repaired_response)
+        repair_errors = validate_schema(repaired, schema) if repaired is not None else ["no JSON object found"]
+        if not repair_errors:
+            llm_usage_monitor.record_parse(agent, "repaired")
+            return repaired
+        errors = repair_errors
+        document = repaired if repaired is not None else document
+        response = repaired_response
+
+    llm_usage_monitor.record_parse(agent, "failed")
+    print(f"ERROR: {agent} response could not be parsed: {'; '.join(errors)}")
+    return {
+        "error": "schema_validation" if document is not None else "malformed_json",
+        "raw": response,
+        "details": errors
+    }
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test script for audio normalization before upload.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import io
+import wave
+
+import numpy as np
+
+from audio_recorder import normalize_audio, read_wav, trim_silence
+
+def make_wav(sample_rate=44100, channels=2, silence=2.0, speech=1.0):
+    """Stereo clip: silence, a 300 Hz tone standing in for speech, silence."""
+    t = np.arange(int(speech * sample_rate)) / sample_rate
+    tone = 0.5 * np.sin(2 * np.pi * 300 * t)
+    quiet = np.zeros(int(silence * sample_rate))
+    mono = np.concatenate([quiet, tone, quiet])
+    pcm = (np.repeat(mono, channels) * 32767).astype('<i2')
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+def test_normalize_stereo_wav():
+    """44.1 kHz stereo with silence becomes a trimmed 16 kHz mono WAV."""
+    print("=== Testing audio normalization ===")
+    data = make_wav()
+    upload = io.BytesIO(data)
+    upload.name = "checkin.wav"
+    normalized, stats = normalize_audio(upload, to_flac=False)
+
+    samples, sample_rate = read_wav(normalized.getvalue())
+    assert normalized.name == "checkin.wav"
+    assert sample_rate == 16000 and samples.shape[1] == 1
+    assert stats['original_seconds'] == 5.0
+    # One second of tone plus up to 300 ms of padding on each side
+    assert 1.0 <= stats['normalized_seconds'] <= 1.7, stats
+    assert stats['seconds_saved'] >= 3.3
+    assert stats['bytes_saved'] > 0.9 * len(data)
+    assert np.abs(samples).max() > 0.4
+    print(f"✅ Saved {stats['bytes_saved']} bytes and {stats['seconds_saved']}s")
+
+def test_passthrough_and_silent_clips():
+    """Compressed uploads are left alone and all-silent clips are not emptied."""
+    print("=== Testing passthrough ===")
+    upload = io.BytesIO(b"webm bytes")
+    upload.name = "recording.webm"
+    normalized, stats = normalize_audio(upload)
+    assert normalized is upload and normalized.tell() == 0
+    assert not stats['normalized'] and stats['original_bytes'] == 10 and stats['bytes_saved'] == 0
+
+    silence = np.zeros(16000, dtype=np.float32)
+    assert len(trim_silence(silence, 16000)) == 16000
+    print("✅ Passthrough and silent clips handled")
+
+def test_target_rate_mono_wav_is_trimmed():
+    """16 kHz mono 16-bit WAV skips resampling but still has its silence trimmed."""
+    print("=== Testing 16 kHz mono trimming ===")
+    data = make_wav(sample_rate=16000, channels=1, silence=10.0, speech=2.0)
+    upload = io.BytesIO(data)
+    upload.name = "mic.wav"
+    normalized, stats = normalize_audio(upload, to_flac=False)
+    samples, sample_rate = read_wav(normalized.getvalue())
+    assert stats['normalized'] and sample_rate == 16000
+    assert stats['original_seconds'] == 22.0 and stats['normalized_seconds'] <= 2.7, stats
+    assert len(normalized.getvalue()) < len(data) and stats['bytes_saved'] > 0
+
+    # Nothing to trim: the original stream is uploaded as is
+    upload = io.BytesIO(make_wav(sample_rate=16000, channels=1, silence=0.0, speech=2.0))
+    normalized, stats = normalize_audio(upload, to_flac=False)
+    assert normalized is upload and not stats['normalized'] and stats['bytes_saved'] == 0
+    print(f"✅ Trimmed {stats['seconds_saved']}s without resampling")
+
+def test_low_rate_audio_is_never_upsampled():
+    """Low-rate WAV keeps its own rate, whether mono or downmixed from stereo."""
+    print("=== Testing low sample rates ===")
+    upload = io.BytesIO(make_wav(sample_rate=8000, channels=1))
+    upload.name = "phone.wav"
+    normalized, stats = normalize_audio(upload, to_flac=False)
+    samples, sample_rate = read_wav(normalized.getvalue())
+    assert sample_rate == 8000 and stats['seconds_saved'] >= 3.3
+
+    upload = io.BytesIO(make_wav(sample_rate=8000, channels=2))
+    upload.name = "phone_stereo.wav"
+    normalized, stats = normalize_audio(upload, to_flac=False)
+    samples, sample_rate = read_wav(normalized.getvalue())
+    assert sample_rate == 8000 and samples.shape[1] == 1 and stats['bytes_saved'] > 0
+    print("✅ Low-rate clips kept at their own rate")
+
+if __name__ == "__main__":
+    test_normalize_stereo_wav()
+    test_passthrough_and_silent_clips()
+    test_target_rate_mono_wav_is_trimmed()
+    test_low_rate_audio_is_never_upsampled()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared boto3 client factory.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from concurrent.futures import ThreadPoolExecutor
+
+from aws_clients import ThreadLocalTable, clear_clients, client_config, get_client, get_resource, get_table
+from config import config
+
+def test_clients_are_cached_per_process():
+    """Every caller and thread gets the same client, each thread its own resources; settings come from config."""
+    print("=== Testing boto3 client factory ===")
+    clear_clients()
+    credentials = {'aws_access_key_id': 'test', 'aws_secret_access_key': 'test'}
+    first = get_client('s3', region_name='us-east-1', **credentials)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        clients = list(pool.map(lambda _: get_client('s3', region_name='us-east-1', **credentials), range(16)))
+    assert all(client is first for client in clients)
+    assert get_client('s3', region_name='us-west-2', **credentials) is not first
+
+    # Resources are not thread-safe: reused within a thread, never shared across threads
+    resource = get_resource('dynamodb', region_name='us-east-1', **credentials)
+    assert resource is get_resource('dynamodb', region_name='us-east-1', **credentials)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        other = pool.submit(get_resource, 'dynamodb', region_name='us-east-1', **credentials).result()
+    assert other is not resource
+
+    table = get_table('scores', region_name='us-east-1', **credentials)
+    assert table is get_table('scores', region_name='us-east-1', **credentials)
+    proxy = ThreadLocalTable('scores', region_name='us-east-1', **credentials)
+    assert proxy.name == 'scores'
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        assert pool.submit(lambda: proxy.meta.client).result() is not table.meta.client
+    assert proxy.meta.client is table.meta.client
+    clear_clients()
+    assert get_resource('dynamodb', region_name='us-east-1', **credentials) is not resource
+
+    tuned = first.meta.config
+    assert tuned.max_pool_connections == config.aws_clients.max_pool_connections
+    assert tuned.tcp_keepalive is True
+    assert tuned.retries['mode'] == 'adaptive'
+    assert client_config('bedrock-runtime').read_timeout == config.aws_clients.bedrock_read_timeout
+    clear_clients()
+    print("✅ Clients reused across threads with tuned config")
+
+if __name__ == "__main__":
+    test_clients_are_cached_per_process()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Test script for chunked parallel transcription.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import io
+import threading
+import time
+
+import numpy as np
+
+import chunked_transcription
+from audio_index import AudioIndex, audio_digest
+from audio_recorder import read_wav, write_wav
+from chunked_transcription import find_split_points, stitch_transcripts, transcribe_chunked
+from config import config
+
+SAMPLE_RATE = 8000
+
+def make_recording(words=35, word_seconds=0.8, gap_seconds=0.4):
+    """A word-like tone burst followed by a pause, repeated."""
+    t = np.arange(int(word_seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    word = 0.5 * np.sin(2 * np.pi * 250 * t)
+    gap = np.zeros(int(gap_seconds * SAMPLE_RATE))
+    return np.concatenate([np.concatenate([word, gap]) for _ in range(words)]).astype(np.float32)
+
+def test_split_points_fall_in_silence():
+    """Boundaries land in pauses, not inside words."""
+    print("=== Testing split points ===")
+    samples = make_recording()
+    boundaries = find_split_points(samples, SAMPLE_RATE, chunk_seconds=10)
+    assert boundaries[0] == 0 and boundaries[-1] == len(samples)
+    assert len(boundaries) == 5
+    for boundary in boundaries[1:-1]:
+        assert abs(samples[boundary]) < 1e-6, boundary
+    print(f"✅ Split at {[round(b / SAMPLE_RATE, 2) for b in boundaries]}s")
+
+def test_stitching_removes_overlap():
+    """Words repeated across a cut appear once, even with a garbled boundary word; lone common words are kept."""
+    print("=== Testing stitching ===")
+    assert stitch_transcripts([
+        "I went to the park today and",
+        "today and the weather was lovely.",
+    ]) == "I went to the park today and the weather was lovely."
+    assert stitch_transcripts([
+        "my daughter called me this morn",
+        "called me this morning about dinner",
+    ]) == "my daughter called me this morning about dinner"
+    assert stitch_transcripts(["hello there", "", "general kenobi"]) == "hello there general kenobi"
+    # A single common word at the cut is not enough evidence of overlap
+    assert stitch_transcripts([
+        "we walked to the",
+        "the river and back",
+    ]) == "we walked to the the river and back"
+    assert stitch_transcripts(["she said that", "x that was fine"]) == "she said that x that was fine"
+    print("✅ Overlaps de-duplicated")
+
+def test_segments_run_concurrently_in_order():
+    """Segments are transcribed in parallel and stitched back in order, with progress."""
+    print("=== Testing chunked transcription ===")
+    settings = config.transcription
+    original = (settings.chunk_min_seconds, settings.chunk_seconds, settings.chunk_overlap_seconds)
+    samples = make_recording()
+    recording = io.BytesIO(write_wav(samples, SAMPLE_RATE))
+    recording.name = "long_checkin.wav"
+
+    active, peak, lock = [0], [0], threading.Lock()
+    calls = []
+
+    def fake_transcribe(segment, job_name):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        assert read_wav(segment.getvalue())[1] == SAMPLE_RATE
+        calls.append(job_name)
+        time.sleep(0.2)
+        with lock:
+            active[0] -= 1
+        index = int(job_name.rsplit("_p", 1)[1])
+        # Each segment repeats the last word of the previous one
+        words = f"w{index}a w{index}b"
+        return f"w{index - 1}a w{index - 1}b {words}" if index else words
+
+    progress = []
+    original_index = chunked_transcription.audio_index
+    try:
+        chunked_transcription.audio_index = AudioIndex(path="")
+        settings.chunk_min_seconds, settings.chunk_seconds, settings.chunk_overlap_seconds = 20, 10, 0.5
+        started = time.monotonic()
+        transcript = transcribe_chunked(recording, job_name="job", transcribe_fn=fake_transcribe,
+                                        on_progress=lambda done, total: progress.append((done, total)))
+        elapsed = time.monotonic() - started
+
+        # The same recording again is answered from the audio index
+        assert sorted(calls) == ["job_p000", "job_p001", "job_p002", "job_p003"]
+        calls.clear()
+        assert transcribe_chunked(recording, transcribe_fn=fake_transcribe) == transcript
+        assert calls == []
+    finally:
+        chunked_transcription.audio_index = original_index
+        settings.chunk_min_seconds, settings.chunk_seconds, settings.chunk_overlap_seconds = original
+
+    assert transcript == "w0a w0b w1a w1b w2a w2b w3a w3b"
+    assert progress[-1] == (4, 4) and len(progress) == 4
+    assert peak[0] > 1 and elapsed < 0.7, (peak[0], elapsed)
+    print(f"✅ 4 segments in {elapsed:.2f}s (sequential: 0.80s), peak concurrency {peak[0]}")
+
+def test_failed_segment_fails_the_recording():
+    """A recording with a segment that produced no transcript returns None and is not indexed."""
+    print("=== Testing failed segment ===")
+    settings = config.transcription
+    original = (settings.chunk_min_seconds, settings.chunk_seconds, settings.chunk_overlap_seconds)
+    recording = io.BytesIO(write_wav(make_recording(), SAMPLE_RATE))
+    recording.name = "long_checkin.wav"
+
+    def flaky_transcribe(segment, job_name):
+        if job_name.endswith("_p002"):
+            raise RuntimeError("Transcribe job failed")
+        return f"segment {job_name}"
+
+    original_index = chunked_transcription.audio_index
+    try:
+        chunked_transcription.audio_index = index = AudioIndex(path="")
+        settings.chunk_min_seconds, settings.chunk_seconds, settings.chunk_overlap_seconds = 20, 10, 0.5
+        progress = []
+        assert transcribe_chunked(recording, job_name="job", transcribe_fn=flaky_transcribe,
+                                  on_progress=lambda done, total: progress.append(done)) is None
+        assert progress[-1] == 4
+        assert transcribe_chunked(recording, job_name="job", transcribe_fn=lambda s, j: None) is None
+        assert index.lookup_transcript(audio_digest(recording)) is None
+    finally:
+        chunked_transcription.audio_index = original_index
+        settings.chunk_min_seconds, settings.chunk_seconds, settings.chunk_overlap_seconds = original
+    print("✅ Partial transcripts are not returned")
+
+def test_short_clips_are_not_split():
+    print("=== Testing short clips ===")
+    recording = io.BytesIO(write_wav(make_recording(words=3), SAMPLE_RATE))
+    recording.name = "short.wav"
+    calls = []
+    assert transcribe_chunked(recording, transcribe_fn=lambda audio, job: calls.append(job) or "hi") == "hi"
+    assert calls == [None]
+    print("✅ Short clip transcribed whole")
+
+if __name__ == "__main__":
+    test_split_points_fall_in_silence()
+    test_stitching_removes_overlap()
+    test_segments_run_concurrently_in_order()
+    test_failed_segment_fails_the_recording()
+    test_short_clips_are_not_split()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Test script for the per-user wellness history cache.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import tempfile
+import time
+
+import aws_services
+import storage
+from aws_services import HISTORY_SUMMARY_ATTRIBUTES
+from history_cache import HistoryCache, SQLiteInvalidation
+
+def entry(day, score=60.0):
+    return {'user_id': 'alice', 'date': f"2024-03-{day:02d}", 'score': score, 'emotion': 'calm'}
+
+class FakeHistoryStore:
+    """Newest-first entries per user, counting queries like DynamoDB would be hit."""
+
+    def __init__(self, entries):
+        self.entries = sorted(entries, key=lambda e: e['date'], reverse=True)
+        self.queries = 0
+
+    def query_user_history(self, user_id, limit=None, attributes=None, **kwargs):
+        self.queries += 1
+        self.attributes = attributes
+        return iter([dict(e) for e in self.entries[:limit]])
+
+    def get_user_entries(self, user_id, dates, attributes=None):
+        self.fetched = list(dates)
+        return [{'date': date, 'transcript': f"notes for {date}"} for date in dates]
+
+    def save_to_dynamodb(self, user_id, date, **kwargs):
+        self.entries = [e for e in self.entries if e['date'] != date]
+        self.entries.append({'user_id': user_id, 'date': date, 'score': kwargs['score'], 'emotion': kwargs['emotion']})
+        self.entries.sort(key=lambda e: e['date'], reverse=True)
+        return True
+
+def test_newest_entries_and_bounds():
+    """Hits return the newest entries; deeper requests, TTL and LRU bounds force reloads."""
+    print("=== Testing history cache ===")
+    cache = HistoryCache(max_users=2, ttl=0.2)
+    cache.store('alice', [entry(day) for day in (10, 9, 8)], depth=3)
+    assert [e['date'] for e in cache.get('alice', 2)] == ["2024-03-10", "2024-03-09"]
+    assert cache.get('alice', 7) is None  # Only three entries were loaded
+
+    cache.store('bob', [entry(1)], depth=7)  # Fewer than requested: whole history
+    assert len(cache.get('bob', 30)) == 1
+    cache.store('carol', [], depth=7)
+    assert cache.get('alice', 1) is None and cache.stats['evictions'] == 1
+
+    time.sleep(0.25)
+    assert cache.get('bob', 1) is None and cache.stats['expirations'] == 1
+    print(f"✅ Cache stats: {cache.stats}")
+
+def test_write_through_keeps_date_order():
+    """Saved entries are placed by date and replace an entry for the same day."""
+    print("=== Testing write-through ===")
+    cache = HistoryCache(max_users=4, ttl=60)
+    cache.store('alice', [entry(day) for day in (10, 8, 6)], depth=3)
+    cache.add_entry('alice', entry(9, score=70.0))
+    cache.add_entry('alice', entry(10, score=80.0))
+    cache.add_entry('alice', entry(2))  # Older than anything cached: unknown neighbours
+    dates = [(e['date'], e['score']) for e in cache.get('alice', 4)]
+    assert dates == [("2024-03-10", 80.0), ("2024-03-09", 70.0), ("2024-03-08", 60.0), ("2024-03-06", 60.0)]
+    print("✅ Entries kept newest first")
+
+def test_cross_process_invalidation():
+    """A save in one process invalidates another process's copy through the shared channel."""
+    print("=== Testing cross-process invalidation ===")
+    path = os.path.join(tempfile.mkdtemp(), "versions.sqlite3")
+    worker_a = HistoryCache(ttl=60, invalidation=SQLiteInvalidation(path))
+    worker_b = HistoryCache(ttl=60, invalidation=SQLiteInvalidation(path))
+    for cache in (worker_a, worker_b):
+        cache.store('alice', [entry(10)], depth=7)
+
+    worker_a.add_entry('alice', entry(11))
+    assert len(worker_a.get('alice', 7)) == 2  # The writer keeps its updated copy
+    assert worker_b.get('alice', 7) is None and worker_b.stats['invalidations'] == 1
+    print("✅ Stale copy dropped in the other worker")
+
+def test_data_manager_returns_newest_entries():
+    """get_user_history returns the newest days, and saves show up without a reload."""
+    print("=== Testing DataManager history ===")
+    store = FakeHistoryStore([entry(day, score=float(day)) for day in range(1, 21)])
+    originals = (storage.query_user_history, storage.store_data_in_s3, aws_services.save_to_dynamodb,
+                 storage.get_user_entries)
+    try:
+        storage.query_user_history = store.query_user_history
+        storage.get_user_entries = store.get_user_entries
+        storage.store_data_in_s3 = lambda user_id, date, transcript: f"transcripts/{user_id}/{date}.txt"
+        aws_services.save_to_dynamodb = store.save_to_dynamodb
+        manager = storage.DataManager(cache=HistoryCache(ttl=60))
+
+        assert [e['date'] for e in manager.get_user_history('alice', 3)] == ["2024-03-20", "2024-03-19", "2024-03-18"]
+        assert manager.get_recent_scores('alice', 2) == [20.0, 19.0]
+        assert store.queries == 1 and store.attributes == HISTORY_SUMMARY_ATTRIBUTES
+
+        # Transcripts are fetched only for the entries shown, then served from the cache
+        shown = manager.get_user_history('alice', 3)[:2]
+        manager.attach_transcripts('alice', shown)
+        assert shown[1]['transcript'] == "notes for 2024-03-19" and store.fetched == ["2024-03-20", "2024-03-19"]
+        store.fetched = []
+        manager.attach_transcripts('alice', manager.get_user_history('alice', 2))
+        assert store.fetched == []
+
+        assert manager.save_daily_entry('alice', "2024-03-21", "Feeling good", {'primary_emotion': 'happy'},
+                                        {}, {'score': 90.0})
+        history = manager.get_user_history('alice', 3)
+        assert [e['date'] for e in history] == ["2024-03-21", "2024-03-20", "2024-03-19"]
+        assert history[0]['emotion'] == 'happy' and store.queries == 1
+        assert history[0]['transcript'] == "Feeling good" and 'emotion_analysis' not in history[0]
+        print(f"✅ {store.queries} query, cache stats: {manager.cache.stats}")
+    finally:
+        (storage.query_user_history, storage.store_data_in_s3, aws_services.save_to_dynamodb,
+         storage.get_user_entries) = originals
+
+if __name__ == "__main__":
+    test_newest_entries_and_bounds()
+    test_write_through_keeps_date_order()
+    test_cross_process_invalidation()
+    test_data_manager_returns_newest_entries()
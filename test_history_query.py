@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Test script for paginated, projected DynamoDB history queries.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+import aws_services
+from aws_services import HISTORY_SUMMARY_ATTRIBUTES, get_user_data, get_user_entries, query_user_history
+
+def _conditions(condition):
+    """Flattens an AND of key conditions into (operator, attribute, values) tuples."""
+    expression = condition.get_expression()
+    if expression['operator'] == 'AND':
+        return _conditions(expression['values'][0]) + _conditions(expression['values'][1])
+    key, *values = expression['values']
+    return [(expression['operator'], key.name, values)]
+
+class FakeScoresTable:
+    """In-memory stand-in for the user_id/date scores table with 1 MB-style paging."""
+
+    def __init__(self, items, max_page_items=3):
+        self.items = items
+        self.max_page_items = max_page_items
+        self.requests = []
+
+    def query(self, **request):
+        self.requests.append(dict(request))
+        matches = []
+        for item in self.items:
+            keep = True
+            for operator, attribute, values in _conditions(request['KeyConditionExpression']):
+                value = item[attribute]
+                if operator == '=':
+                    keep &= value == values[0]
+                elif operator == 'BETWEEN':
+                    keep &= values[0] <= value <= values[1]
+                elif operator == '>=':
+                    keep &= value >= values[0]
+                elif operator == '<=':
+                    keep &= value <= values[0]
+            if keep:
+                matches.append(item)
+        matches.sort(key=lambda item: item['date'], reverse=not request.get('ScanIndexForward', True))
+
+        start = 0
+        if 'ExclusiveStartKey' in request:
+            start = [item['date'] for item in matches].index(request['ExclusiveStartKey']['date']) + 1
+        # A page ends at Limit or at the service's size cap, whichever comes first
+        page = matches[start:start + min(request['Limit'], self.max_page_items)]
+        if 'ProjectionExpression' in request:
+            names = request['ExpressionAttributeNames']
+            fields = [names[token.strip()] for token in request['ProjectionExpression'].split(",")]
+            page = [{field: item[field] for field in fields if field in item} for item in page]
+        response = {'Items': page}
+        if start + len(page) < len(matches):
+            last = matches[start + len(page) - 1]
+            response['LastEvaluatedKey'] = {'user_id': last['user_id'], 'date': last['date']}
+        return response
+
+    def get_item(self, Key, **request):
+        self.requests.append(dict(request, Key=Key))
+        for item in self.items:
+            if item['user_id'] == Key['user_id'] and item['date'] == Key['date']:
+                names = request.get('ExpressionAttributeNames', {})
+                fields = [names[token.strip()] for token in request['ProjectionExpression'].split(",")] if names else item
+                return {'Item': {field: item[field] for field in fields if field in item}}
+        return {}
+
+def make_items(user_id, days=10):
+    first = date(2024, 3, 1)
+    return [{
+        'user_id': user_id,
+        'date': (first + timedelta(days=i)).isoformat(),
+        'score': Decimal(str(50 + i)),
+        'emotion': 'calm',
+        'source': 'voice',
+        'transcript': 'a long transcript ' * 100,
+        'cognitive_metrics': {'lexical_diversity': '0.5'}
+    } for i in range(days)]
+
+def test_history_pages_lazily_newest_first():
+    """Limits, date ranges and projections are pushed down to DynamoDB, one page at a time."""
+    print("=== Testing history query ===")
+    table = FakeScoresTable(make_items("alice") + make_items("bob"))
+
+    history = query_user_history("alice", limit=5, attributes=HISTORY_SUMMARY_ATTRIBUTES, table=table)
+    first = next(history)
+    assert first['date'] == "2024-03-10" and first['score'] == 59.0
+    assert 'transcript' not in first and 'cognitive_metrics' not in first
+    assert len(table.requests) == 1  # Nothing is fetched until needed
+    rest = list(history)
+    assert [item['date'] for item in rest] == ["2024-03-09", "2024-03-08", "2024-03-07", "2024-03-06"]
+    assert table.requests[0]['ScanIndexForward'] is False
+    assert [request['Limit'] for request in table.requests] == [5, 2]
+
+    table.requests.clear()
+    window = list(query_user_history("alice", start_date="2024-03-03", end_date="2024-03-05",
+                                     newest_first=False, table=table))
+    assert [item['date'] for item in window] == ["2024-03-03", "2024-03-04", "2024-03-05"]
+    assert all(item['user_id'] == "alice" for item in window)
+    print(f"✅ Paged with {len(table.requests)} request(s) for a 3-day window")
+
+def test_get_user_data_is_not_truncated():
+    """Every page is followed, so long histories are returned in full."""
+    print("=== Testing full history retrieval ===")
+    original = aws_services.scores_table
+    try:
+        aws_services.scores_table = table = FakeScoresTable(make_items("carol", days=25))
+        items = get_user_data("carol")
+        assert len(items) == 25 and len(table.requests) == 9
+        assert items[0]['date'] == "2024-03-01" and isinstance(items[0]['score'], float)
+    finally:
+        aws_services.scores_table = original
+    print("✅ Retrieved all 25 entries")
+
+def test_entries_fetched_by_date():
+    """Specific days are read by key with the requested projection."""
+    print("=== Testing entry lookup by date ===")
+    table = FakeScoresTable(make_items("alice"))
+    entries = get_user_entries("alice", ["2024-03-09", "2024-03-02", "2024-03-09", "2023-01-01"],
+                               attributes=('date', 'transcript'), table=table)
+    assert [entry['date'] for entry in entries] == ["2024-03-09", "2024-03-02"]
+    assert set(entries[0]) == {'date', 'transcript'} and len(table.requests) == 3
+    print("✅ Fetched 2 entries with 3 key lookups")
+
+if __name__ == "__main__":
+    test_history_pages_lazily_newest_first()
+    test_get_user_data_is_not_truncated()
+    test_entries_fetched_by_date()
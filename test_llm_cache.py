@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Test script for the Bedrock response cache.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import io
+import json
+import stat
+import tempfile
+import time
+
+import aws_services
+from agents import EmotionAgent
+from llm_cache import (
+    MemoryCacheBackend, RedisCacheBackend, ResponseCache, SQLiteCacheBackend, response_cache_key
+)
+
+class FakeBedrockRuntime:
+    """Counts invoke_model calls and returns a fixed completion."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def invoke_model(self, body, modelId, accept, contentType):
+        self.calls += 1
+        payload = {'content': [{'text': '{"primary_emotion": "calm"}'}],
+                   'usage': {'input_tokens': 120, 'output_tokens': 20}}
+        return {'body': io.BytesIO(json.dumps(payload).encode())}
+
+class FakeRedis:
+    """Minimal Redis-compatible client for the redis backend."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, name):
+        value, expires_at = self.data.get(name, (None, 0))
+        return value.encode() if value is not None and expires_at > time.time() else None
+
+    def set(self, name, value, ex=None):
+        self.data[name] = (value, time.time() + ex)
+
+    def scan_iter(self, match):
+        return [key for key in list(self.data) if key.startswith(match.rstrip("*"))]
+
+    def delete(self, name):
+        self.data.pop(name, None)
+
+def test_prompt_timestamp_excluded_from_key():
+    """Prompts that differ only in the injected timestamp share a key."""
+    print("=== Testing cache key normalization ===")
+    agent = EmotionAgent()
+    first = agent.build_prompt("I feel fine today")
+    time.sleep(0.01)
+    second = agent.build_prompt("I feel fine today")
+    assert first != second
+    assert response_cache_key("model", 1024, first) == response_cache_key("model", 1024, second)
+    assert response_cache_key("model", 1024, first) != response_cache_key("model", 512, first)
+    assert response_cache_key("model", 1024, first) != response_cache_key(
+        "model", 1024, agent.build_prompt("I feel tired today"))
+    print("✅ Timestamp lines do not affect cache keys")
+
+def test_backends_ttl_and_size_bounds():
+    """Every backend expires entries and the local ones stay within max_entries."""
+    print("=== Testing cache backends ===")
+    backends = {
+        'memory': MemoryCacheBackend(max_entries=3),
+        'sqlite': SQLiteCacheBackend(os.path.join(tempfile.mkdtemp(), "private", "llm.sqlite3"), max_entries=3),
+        'redis': RedisCacheBackend(FakeRedis()),
+    }
+    for name, backend in backends.items():
+        for i in range(5):
+            backend.set(f"k{i}", f"v{i}", ttl=60)
+            time.sleep(0.001)
+        assert backend.get("k4") == "v4", name
+        if name != 'redis':
+            assert backend.get("k0") is None, name
+        backend.set("short", "lived", ttl=0)
+        assert backend.get("short") is None, name
+        backend.clear()
+        assert backend.get("k4") is None, name
+    # Cached completions quote transcripts: owner-only file in a private directory
+    path = backends['sqlite'].path
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    assert not stat.S_IMODE(os.stat(os.path.dirname(path)).st_mode) & 0o077
+    print(f"✅ Backends verified: {', '.join(backends)}")
+
+def test_invoke_claude_serves_repeats_from_cache():
+    """Identical requests call Bedrock once; opting out always calls it."""
+    print("=== Testing cached invoke_claude ===")
+    original_runtime, original_cache = aws_services.bedrock_runtime, aws_services.response_cache
+    try:
+        aws_services.bedrock_runtime = runtime = FakeBedrockRuntime()
+        aws_services.response_cache = cache = ResponseCache(MemoryCacheBackend(), ttl=60)
+        prompt = EmotionAgent().build_prompt("We went to the market")
+
+        first = aws_services.invoke_claude(prompt)
+        again = aws_services.invoke_claude(EmotionAgent().build_prompt("We went to the market"))
+        assert runtime.calls == 1
+        assert again['cached'] and again['text'] == first['text']
+        assert again['usage'] == {'input_tokens': 120, 'output_tokens': 20}
+
+        aws_services.invoke_claude(prompt, use_cache=False)
+        assert runtime.calls == 2
+        assert cache.stats['hits'] == 1
+
+        # Completions rejected by cache_if are not replayed
+        other = EmotionAgent().build_prompt("The soup was cold")
+        for _ in range(2):
+            assert not aws_services.invoke_claude(other, cache_if=lambda text: False)['cached']
+        assert runtime.calls == 4
+        print(f"✅ Cache stats: {cache.stats}")
+    finally:
+        aws_services.bedrock_runtime, aws_services.response_cache = original_runtime, original_cache
+
+if __name__ == "__main__":
+    test_prompt_timestamp_excluded_from_key()
+    test_backends_ttl_and_size_bounds()
+    test_invoke_claude_serves_repeats_from_cache()
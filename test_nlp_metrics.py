@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Test script for the cognitive metrics pipeline in nlp_metrics.py.
+Uses a small in-memory SpaCy pipeline so it runs without a downloaded model.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import spacy
+
+import nlp_metrics
+import nlp_models
+from metrics_cache import MetricsCache, cached_analyze_cognitive_metrics
+
+SAMPLE_TEXTS = [
+    "Today I felt really good. I went for a walk in the park and enjoyed the sunshine.",
+    "",
+    "I'm feeling a bit tired today but overall okay. Work was busy but manageable. Looking forward to relaxing.",
+    "Had a wonderful conversation with my friend today.",
+]
+
+def build_test_pipeline():
+    """Builds a blank English pipeline with a sentencizer and random word vectors."""
+    nlp = spacy.blank("en")
+    nlp.add_pipe("sentencizer")
+    rng = np.random.default_rng(42)
+    words = {token.text for text in SAMPLE_TEXTS for token in nlp.make_doc(text)}
+    for word in sorted(words):
+        nlp.vocab.set_vector(word, rng.standard_normal(16).astype("float32"))
+    return nlp
+
+def test_batch_matches_single():
+    """Batch results must be identical to the single-text function, in order."""
+    print("=== Testing analyze_cognitive_metrics_batch ===")
+    nlp_models.register_nlp(build_test_pipeline())
+    try:
+        expected = [nlp_metrics.analyze_cognitive_metrics(text) for text in SAMPLE_TEXTS]
+        batched = list(nlp_metrics.analyze_cognitive_metrics_batch(iter(SAMPLE_TEXTS), batch_size=2))
+        assert batched == expected, f"Batch output differs: {batched} != {expected}"
+        print(f"✅ {len(batched)} batched results match single-text analysis")
+    finally:
+        nlp_models.register_nlp(None)
+
+def test_vectorized_coherence_matches_pairwise_similarity():
+    """The matrix coherence engine must agree with pairwise Span.similarity."""
+    print("=== Testing vectorized coherence ===")
+    nlp = build_test_pipeline()
+    doc = nlp(" ".join(SAMPLE_TEXTS))
+    sentences = list(doc.sents)
+    
+    pairwise = [sentences[i].similarity(sentences[i + 1]) for i in range(len(sentences) - 1)]
+    expected = sum(pairwise) / len(pairwise)
+    
+    unit_vectors, valid = nlp_metrics.sentence_vector_matrix(sentences)
+    assert valid.all()
+    assert abs(nlp_metrics.coherence_from_matrix(unit_vectors, valid) - expected) < 1e-6
+    
+    # Windowed mode averages every pair up to k sentences apart
+    windowed = [sentences[i].similarity(sentences[j])
+                for i in range(len(sentences)) for j in range(i + 1, min(i + 3, len(sentences)))]
+    windowed_expected = sum(windowed) / len(windowed)
+    assert abs(nlp_metrics.coherence_from_matrix(unit_vectors, valid, window=2) - windowed_expected) < 1e-6
+    print(f"✅ Coherence {expected:.3f}, windowed (k=2) {windowed_expected:.3f}")
+
+def test_metrics_cache_skips_spacy_on_repeat(tmp_path=None):
+    """Repeat analyses are served from cache, including from a fresh memory tier."""
+    print("=== Testing metrics cache ===")
+    import tempfile
+    path = os.path.join(str(tmp_path or tempfile.mkdtemp()), "metrics.sqlite3")
+    nlp_models.register_nlp(build_test_pipeline())
+    try:
+        cache = MetricsCache(path=path, max_entries=8)
+        first = cached_analyze_cognitive_metrics(SAMPLE_TEXTS[0], cache=cache)
+        again = cached_analyze_cognitive_metrics("  " + SAMPLE_TEXTS[0].replace(" ", "  "), cache=cache)
+        assert first == again == nlp_metrics.analyze_cognitive_metrics(SAMPLE_TEXTS[0])
+        assert cache.stats['misses'] == 1 and cache.stats['memory_hits'] == 1
+        
+        # A new process only has the disk tier
+        reopened = MetricsCache(path=path, max_entries=8)
+        assert cached_analyze_cognitive_metrics(SAMPLE_TEXTS[0], cache=reopened) == first
+        assert reopened.stats['disk_hits'] == 1
+        print(f"✅ Cache stats: {cache.stats}, reopened: {reopened.stats}")
+    finally:
+        nlp_models.register_nlp(None)
+
+def test_streaming_matches_full_analysis():
+    """Feeding a transcript in small pieces gives the same metrics as one parse."""
+    print("=== Testing streaming metrics ===")
+    nlp_models.register_nlp(build_test_pipeline())
+    try:
+        transcript = " ".join(text for text in SAMPLE_TEXTS if text) * 3
+        expected = nlp_metrics.analyze_cognitive_metrics(transcript)
+        pieces = [transcript[i:i + 25] for i in range(0, len(transcript), 25)]
+        streamed = nlp_metrics.analyze_cognitive_metrics_stream(pieces, chunk_chars=120)
+        assert streamed == expected, f"Streaming output differs: {streamed} != {expected}"
+        print(f"✅ Streaming metrics match: {streamed}")
+    finally:
+        nlp_models.register_nlp(None)
+
+def test_streaming_keeps_unfinished_sentences():
+    """A long unpunctuated run is not split mid-sentence, so it matches the one-shot metrics."""
+    print("=== Testing streaming without sentence boundaries ===")
+    nlp_models.register_nlp(build_test_pipeline())
+    try:
+        run = " ".join(SAMPLE_TEXTS[0].replace(".", "").lower().split() * 12)
+        transcript = f"{SAMPLE_TEXTS[3]} {run}. {SAMPLE_TEXTS[2]}"
+        for text in (run, transcript):
+            expected = nlp_metrics.analyze_cognitive_metrics(text)
+            pieces = [text[i:i + 25] for i in range(0, len(text), 25)]
+            streamed = nlp_metrics.analyze_cognitive_metrics_stream(pieces, chunk_chars=120)
+            assert streamed == expected, f"Streaming output differs: {streamed} != {expected}"
+        print(f"✅ Unpunctuated run streamed as one sentence: {streamed['sentence_count']} sentences")
+    finally:
+        nlp_models.register_nlp(None)
+
+def test_fast_tier_matches_tokenizer_metrics():
+    """The fast tier agrees with the full tier on tokenizer-derived metrics."""
+    print("=== Testing fast metrics tier ===")
+    nlp_models.register_nlp(build_test_pipeline())
+    try:
+        for text in SAMPLE_TEXTS[:1] + SAMPLE_TEXTS[2:]:
+            fast = nlp_metrics.analyze_cognitive_metrics(text, tier="fast")
+            full = nlp_metrics.analyze_cognitive_metrics(text, tier="full")
+            assert fast["metrics_tier"] == "fast"
+            for key in ("word_count", "unique_word_count", "lexical_diversity",
+                        "sentence_count", "avg_sentence_length", "coherence_score"):
+                assert fast[key] == full[key], f"{key}: fast {fast[key]} != full {full[key]}"
+        print(f"✅ Fast tier deltas: {nlp_metrics.compare_metrics_tiers(SAMPLE_TEXTS)}")
+    finally:
+        nlp_models.register_nlp(None)
+
+if __name__ == "__main__":
+    test_batch_matches_single()
+    test_vectorized_coherence_matches_pairwise_similarity()
+    test_metrics_cache_skips_spacy_on_repeat()
+    test_streaming_matches_full_analysis()
+    test_streaming_keeps_unfinished_sentences()
+    test_fast_tier_matches_tokenizer_metrics()
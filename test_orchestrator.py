@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Test script for the parallel analysis orchestrator.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import agents
+from agents import CombinedAnalysisAgent, EmotionAgent, MemoryAgent, AlertAgent
+from monitoring import llm_usage_monitor
+from orchestrator import AnalysisOrchestrator
+
+class SlowEmotionAgent:
+    def __init__(self, delay):
+        self.delay = delay
+
+    def analyze_emotion(self, transcript, user_context=""):
+        time.sleep(self.delay)
+        return {"primary_emotion": "calm", "confidence": 0.9}
+
+class SlowMemoryAgent:
+    def __init__(self, delay):
+        self.delay = delay
+
+    def analyze_cognitive_patterns(self, transcript, user_context=""):
+        time.sleep(self.delay)
+        return {"overall_cognitive_health": "good"}
+
+class FailingAlertAgent:
+    def evaluate_alert_conditions(self, *args):
+        raise RuntimeError("bedrock unavailable")
+
+def slow_metrics(delay):
+    def metrics(text):
+        time.sleep(delay)
+        return {"word_count": len(text.split())}
+    return metrics
+
+def test_fan_out_latency_is_slowest_component():
+    """Total latency tracks the slowest call, not the sum."""
+    print("=== Testing parallel fan-out ===")
+    orchestrator = AnalysisOrchestrator(
+        SlowEmotionAgent(0.4), SlowMemoryAgent(0.3), FailingAlertAgent(),
+        metrics_fn=slow_metrics(0.2), executor=ThreadPoolExecutor(max_workers=4),
+        agent_timeout=5, metrics_timeout=5
+    )
+    result = orchestrator.analyze("I walked to the park today", include_memory=True)
+
+    assert result['emotion_analysis']['primary_emotion'] == "calm"
+    assert result['cognitive_metrics']['word_count'] == 6
+    assert result['memory_analysis']['overall_cognitive_health'] == "good"
+    assert not result['errors']
+    # Sequential would take 0.9s
+    assert result['timings']['total'] < 0.75, result['timings']
+    print(f"✅ Timings: {result['timings']}")
+
+def test_timeouts_and_failures_degrade_gracefully():
+    """A slow or failing component yields an error placeholder, not an exception."""
+    print("=== Testing per-call timeouts ===")
+    orchestrator = AnalysisOrchestrator(
+        SlowEmotionAgent(2.0), SlowMemoryAgent(0.0), FailingAlertAgent(),
+        metrics_fn=slow_metrics(0.05), executor=ThreadPoolExecutor(max_workers=4),
+        agent_timeout=0.3, metrics_timeout=5
+    )
+    started = time.perf_counter()
+    result = orchestrator.analyze("Hello there")
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 1.0, elapsed
+    assert result['emotion_analysis'] == {"error": "timeout"}
+    assert result['cognitive_metrics']['word_count'] == 2
+    assert result['memory_analysis'] is None
+    assert 'emotion_analysis' in result['errors']
+
+    alert = orchestrator.evaluate_alert({}, {}, [])
+    assert alert == {"error": "bedrock unavailable"}
+    print(f"✅ Timed out after {elapsed:.2f}s with errors {result['errors']}")
+
+class FakeBedrock:
+    """Stand-in for aws_services.invoke_claude that answers by prompt type."""
+
+    def __init__(self, combined_response):
+        self.combined_response = combined_response
+        self.prompts = []
+
+    def __call__(self, prompt, max_tokens=1024, use_cache=True, cache_if=None):
+        self.prompts.append(prompt)
+        if "exactly these sections" in prompt:
+            text = self.combined_response
+        elif "caregiver alert assistant" in prompt:
+            text = json.dumps({"alert_needed": False, "urgency": "low"})
+        elif "cognitive health assistant" in prompt:
+            text = json.dumps({"overall_cognitive_health": "good"})
+        else:
+            text = json.dumps({"primary_emotion": "calm", "confidence": 0.8, "intensity": 3})
+        return {'text': text, 'usage': {'input_tokens': len(prompt) // 4, 'output_tokens': 50}, 'latency': 0.01}
+
+def make_orchestrator():
+    emotion, memory, alert = EmotionAgent(), MemoryAgent(), AlertAgent()
+    return AnalysisOrchestrator(
+        emotion, memory, alert, metrics_fn=slow_metrics(0.0),
+        executor=ThreadPoolExecutor(max_workers=4), agent_timeout=5, metrics_timeout=5,
+        combined_agent=CombinedAnalysisAgent(emotion, memory, alert)
+    )
+
+def test_timed_out_calls_filling_the_pool_fail_fast():
+    """When abandoned calls hold every worker, new analyses return at once instead of queueing."""
+    print("=== Testing pool held by timed-out calls ===")
+    release = threading.Event()
+
+    class BlockingEmotionAgent:
+        def analyze_emotion(self, transcript, user_context=""):
+            release.wait(5)
+            return {"primary_emotion": "calm", "confidence": 0.9}
+
+    def blocking_metrics(text):
+        release.wait(5)
+        return {"word_count": len(text.split())}
+
+    orchestrator = AnalysisOrchestrator(
+        BlockingEmotionAgent(), SlowMemoryAgent(0.0), FailingAlertAgent(), metrics_fn=blocking_metrics,
+        executor=ThreadPoolExecutor(max_workers=2), max_workers=2, agent_timeout=0.1, metrics_timeout=0.1
+    )
+    try:
+        first = orchestrator.analyze("Hello there")
+        assert first['emotion_analysis'] == {"error": "timeout"} and orchestrator.abandoned_calls == 2
+
+        started = time.perf_counter()
+        second = orchestrator.analyze("Hello again")
+        elapsed = time.perf_counter() - started
+        assert elapsed < 0.05, elapsed
+        assert second['emotion_analysis'] == {"error": "busy"} and second['cognitive_metrics'] == {"error": "busy"}
+        assert "timed-out calls" in second['errors']['emotion_analysis']
+    finally:
+        release.set()
+
+    deadline = time.monotonic() + 2
+    while orchestrator.abandoned_calls and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert orchestrator.abandoned_calls == 0
+    third = orchestrator.analyze("Hello once more")
+    assert third['cognitive_metrics']['word_count'] == 3 and not third['errors']
+    print(f"✅ Busy pool answered in {elapsed * 1000:.1f}ms, capacity back once calls finished")
+
+def test_combined_prompt_mode_and_fallback():
+    """One combined call replaces three agent calls; invalid output falls back."""
+    print("=== Testing combined prompt mode ===")
+    original = agents.invoke_claude
+    try:
+        combined = json.dumps({
+            "emotion": {"primary_emotion": "happy", "confidence": 0.9, "intensity": 5},
+            "cognitive": {"overall_cognitive_health": "good"},
+            "alert": {"alert_needed": False, "urgency": "low"}
+        })
+        agents.invoke_claude = bedrock = FakeBedrock(combined)
+        saved_before = llm_usage_monitor.get_metrics()['savings']['calls_saved']
+
+        result = make_orchestrator().analyze(
+            "I had tea with my sister today", include_memory=True, include_alert=True, combined=True
+        )
+        assert result['mode'] == "combined"
+        assert len(bedrock.prompts) == 1
+        assert result['emotion_analysis']['primary_emotion'] == "happy"
+        assert result['alert_analysis']['alert_needed'] is False
+        savings = llm_usage_monitor.get_metrics()['savings']
+        assert savings['calls_saved'] == saved_before + 2
+        assert savings['input_tokens_saved'] > 0
+
+        # A section missing from the combined answer triggers the separate agents
+        agents.invoke_claude = bedrock = FakeBedrock(json.dumps({"emotion": {"primary_emotion": "happy"}}))
+        result = make_orchestrator().analyze(
+            "I had tea with my sister today", include_memory=True, include_alert=True, combined=True
+        )
+        assert result['mode'] == "separate"
+        assert len(bedrock.prompts) == 4
+        assert result['emotion_analysis']['primary_emotion'] == "calm"
+        assert result['memory_analysis']['overall_cognitive_health'] == "good"
+        assert result['alert_analysis']['urgency'] == "low"
+
+        # An emotion-only check-in makes its single call and claims no savings
+        agents.invoke_claude = bedrock = FakeBedrock(combined)
+        saved_before = llm_usage_monitor.get_metrics()['savings']['calls_saved']
+        result = make_orchestrator().analyze("I had tea with my sister today", combined=True)
+        assert result['mode'] == "separate" and len(bedrock.prompts) == 1
+        assert "exactly these sections" not in bedrock.prompts[0]
+        assert llm_usage_monitor.get_metrics()['savings']['calls_saved'] == saved_before
+        print(f"✅ Savings recorded: {llm_usage_monitor.get_metrics()['savings']}")
+    finally:
+        agents.invoke_claude = original
+
+if __name__ == "__main__":
+    test_fan_out_latency_is_slowest_component()
+    test_timeouts_and_failures_degrade_gracefully()
+    test_timed_out_calls_filling_the_pool_fail_fast()
+    test_combined_prompt_mode_and_fallback()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Test script for the Bedrock rate limiter, backoff and circuit breaker.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import threading
+import time
+
+from botocore.exceptions import ClientError
+
+from rate_limiter import (
+    AdaptiveRateLimiter, CircuitBreaker, CircuitOpenError, RateLimitTimeout, TokenBucket,
+    is_throttling_error
+)
+
+def throttling_error():
+    return ClientError({'Error': {'Code': 'ThrottlingException', 'Message': 'Too many requests'}}, 'InvokeModel')
+
+class QuotaService:
+    """Fake Bedrock that throttles above a fixed number of calls per second."""
+
+    def __init__(self, quota_per_second):
+        self.quota = quota_per_second
+        self.window = int(time.monotonic())
+        self.used = 0
+        self.accepted = 0
+        self.throttled = 0
+        self.lock = threading.Lock()
+
+    def invoke_model(self):
+        with self.lock:
+            now = int(time.monotonic())
+            if now != self.window:
+                self.window, self.used = now, 0
+            if self.used >= self.quota:
+                self.throttled += 1
+                raise throttling_error()
+            self.used += 1
+            self.accepted += 1
+        return "ok"
+
+def test_token_bucket_paces_calls():
+    """A bucket of rate 20/s admits the burst immediately, then paces the rest."""
+    print("=== Testing token bucket ===")
+    bucket = TokenBucket(rate=20, capacity=5)
+    started = time.monotonic()
+    for _ in range(15):
+        assert bucket.acquire(timeout=2)
+    elapsed = time.monotonic() - started
+    assert 0.4 < elapsed < 1.0, elapsed
+    slow = TokenBucket(rate=0.1, capacity=1)
+    assert slow.acquire(timeout=0) and not slow.acquire(timeout=0)
+    print(f"✅ 15 tokens in {elapsed:.2f}s")
+
+def test_backoff_and_breaker():
+    """Throttles are retried with backoff; repeated failures open the breaker."""
+    print("=== Testing retries and circuit breaker ===")
+    assert is_throttling_error(throttling_error())
+    assert not is_throttling_error(ValueError("bad input"))
+
+    delays = []
+    limiter = AdaptiveRateLimiter(rate=100, burst=10, max_concurrency=2, max_retries=3,
+                                  backoff_base=0.1, backoff_max=1.0,
+                                  breaker=CircuitBreaker(failure_threshold=2, reset_timeout=0.2),
+                                  wait_timeout=1, sleep=delays.append)
+    attempts = iter([throttling_error(), throttling_error(), None])
+
+    def flaky():
+        error = next(attempts)
+        if error:
+            raise error
+        return "done"
+
+    assert limiter.call(flaky) == "done"
+    assert len(delays) == 2 and all(0 <= d <= 0.2 for d in delays)
+    assert limiter.bucket.rate < 100
+
+    def broken():
+        raise RuntimeError("model error")
+
+    for _ in range(2):
+        try:
+            limiter.call(broken)
+        except RuntimeError:
+            pass
+    try:
+        limiter.call(flaky)
+        assert False, "breaker should be open"
+    except CircuitOpenError:
+        pass
+    time.sleep(0.25)
+    assert limiter.call(lambda: "recovered") == "recovered"
+    metrics = limiter.get_metrics()
+    assert metrics['breaker_state'] == "closed" and metrics['rejected'] == 1 and metrics['retries'] == 2
+    print(f"✅ Limiter metrics: {metrics}")
+
+def test_half_open_trial_always_resolves():
+    """A throttled half-open trial is retried without being rejected, and the breaker closes or reopens."""
+    print("=== Testing half-open trial ===")
+    delays = []
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.1)
+    limiter = AdaptiveRateLimiter(rate=100, burst=10, max_concurrency=1, max_retries=2,
+                                  backoff_base=0.01, breaker=breaker, wait_timeout=0.2, sleep=delays.append)
+
+    def throttled_then(outcomes):
+        outcomes = iter(outcomes)
+
+        def call():
+            error = next(outcomes)
+            if error:
+                raise error
+            return "done"
+        return call
+
+    def broken():
+        raise RuntimeError("model error")
+
+    try:
+        limiter.call(broken)
+    except RuntimeError:
+        pass
+    assert breaker.state == "open"
+    time.sleep(0.15)
+    assert limiter.call(throttled_then([throttling_error(), None])) == "done"
+    assert breaker.state == "closed" and len(delays) == 1
+    assert limiter.call(lambda: "normal") == "normal"
+
+    # A trial that stays throttled reopens the breaker instead of leaving it half open
+    try:
+        limiter.call(broken)
+    except RuntimeError:
+        pass
+    time.sleep(0.15)
+    try:
+        limiter.call(throttled_then([throttling_error()] * 3))
+        assert False, "throttling should be raised once retries run out"
+    except Exception as e:
+        assert "ThrottlingException" in str(e)
+    assert breaker.state == "open"
+
+    # A trial that times out waiting for a slot reopens it too
+    time.sleep(0.15)
+    limiter._slots.acquire()
+    try:
+        limiter.call(lambda: "never runs")
+        assert False, "trial should time out"
+    except RateLimitTimeout:
+        pass
+    finally:
+        limiter._slots.release()
+    assert breaker.state == "open"
+    time.sleep(0.15)
+    assert limiter.call(lambda: "recovered") == "recovered" and breaker.state == "closed"
+    print(f"✅ Half-open trials resolved, metrics: {limiter.get_metrics()}")
+
+def test_only_one_concurrent_caller_gets_the_trial():
+    """When many threads race a breaker past its reset timeout, exactly one becomes the trial."""
+    print("=== Testing concurrent half-open trial ===")
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.1)
+    start, decisions = threading.Barrier(16), []
+
+    def racer():
+        start.wait()
+        decisions.append(breaker.allow())
+
+    threads = [threading.Thread(target=racer) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert decisions.count((True, True)) == 1 and decisions.count((False, False)) == 15, decisions
+
+    # Through the limiter: one slow trial runs, every concurrent caller is rejected
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    limiter = AdaptiveRateLimiter(rate=1000, burst=100, max_concurrency=16, breaker=breaker, wait_timeout=1)
+    breaker.record_failure()
+    time.sleep(0.1)
+    start, results = threading.Barrier(16), []
+
+    def caller():
+        start.wait()
+        try:
+            results.append(limiter.call(lambda: time.sleep(0.1) or "trial"))
+        except CircuitOpenError as e:
+            results.append(e)
+
+    threads = [threading.Thread(target=caller) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results.count("trial") == 1 and limiter.get_metrics()['rejected'] == 15, results
+    assert breaker.state == "closed"
+    print("✅ One trial among 16 concurrent callers")
+
+def test_throughput_stays_near_quota():
+    """Under a burst of 40 concurrent callers, calls succeed at roughly the quota."""
+    print("=== Testing throughput under load ===")
+    service = QuotaService(quota_per_second=10)
+    limiter = AdaptiveRateLimiter(rate=10, burst=5, max_concurrency=4, max_retries=6,
+                                  backoff_base=0.05, backoff_max=0.5, wait_timeout=30,
+                                  breaker=CircuitBreaker(failure_threshold=50))
+    results = []
+
+    def caller():
+        try:
+            results.append(limiter.call(service.invoke_model))
+        except Exception as e:
+            results.append(e)
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=caller) for _ in range(40)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    assert results.count("ok") == 40, results
+    assert service.throttled <= 10, service.throttled
+    assert limiter.get_metrics()['max_queue_depth'] > 0
+    print(f"✅ 40 calls in {elapsed:.1f}s with {service.throttled} throttles")
+
+if __name__ == "__main__":
+    test_token_bucket_paces_calls()
+    test_backoff_and_breaker()
+    test_half_open_trial_always_resolves()
+    test_only_one_concurrent_caller_gets_the_trial()
+    test_throughput_stays_near_quota()
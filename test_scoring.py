@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Test script for the Cognora Score calculations in scoring.py.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import random
+import pandas as pd
+
+from scoring import (
+    calculate_cognora_score, calculate_cognora_scores, ScoringProfile,
+    ScoringProfileRegistry, get_score_color, has_negative_sentiment
+)
+from rescoring import RescoreJob
+from lexicon import LexiconMatcher, negative_matcher, positive_matcher
+
+EMOTIONS = ["happy", "sad", "lonely", "calm", "anxious", "content", "frustrated", "grateful"]
+
+def make_entries(count=500, seed=7):
+    """Generates random emotion analyses and cognitive metrics."""
+    rng = random.Random(seed)
+    entries = []
+    for _ in range(count):
+        emotion = {
+            'primary_emotion': rng.choice(EMOTIONS),
+            'confidence': round(rng.random(), 2),
+            'intensity': rng.randint(1, 10),
+            'stability': rng.choice(['stable', 'unstable'])
+        }
+        metrics = {
+            'lexical_diversity': round(rng.random(), 3),
+            'avg_sentence_length': round(rng.uniform(3, 30), 2),
+            'coherence_score': round(rng.random(), 3)
+        }
+        entries.append((emotion, metrics))
+    return entries
+
+def test_bulk_scores_match_scalar():
+    """calculate_cognora_scores must be bit-compatible with calculate_cognora_score."""
+    print("=== Testing vectorized Cognora scoring ===")
+    entries = make_entries()
+    scalar = [calculate_cognora_score(emotion, metrics) for emotion, metrics in entries]
+
+    frame = pd.DataFrame([
+        dict(result['breakdown'], primary_emotion=emotion['primary_emotion'])
+        for (emotion, _), result in zip(entries, scalar)
+    ])
+    bulk = calculate_cognora_scores(frame)
+
+    for i, expected in enumerate(scalar):
+        row = bulk.iloc[i]
+        for key in ('score', 'emotion_score', 'cognitive_score', 'zone', 'zone_name'):
+            assert row[key] == expected[key], f"Row {i} {key}: {row[key]} != {expected[key]}"
+    print(f"✅ {len(scalar)} vectorized scores match the scalar function")
+
+def test_profile_hot_reload(tmp_path=None):
+    """A changed profile file is picked up without restarting."""
+    print("=== Testing scoring profile hot reload ===")
+    import json
+    import tempfile
+    path = os.path.join(str(tmp_path or tempfile.mkdtemp()), "profile.json")
+    with open(path, "w") as f:
+        json.dump({"version": "v2", "green_threshold": 80}, f)
+    
+    registry = ScoringProfileRegistry(path=path, check_interval=0)
+    assert registry.get().version == "v2"
+    assert registry.get().zone_for(78) == ("yellow", "Good")
+    
+    with open(path, "w") as f:
+        json.dump({"version": "v3", "green_threshold": 70}, f)
+    os.utime(path, (os.path.getmtime(path) + 10,) * 2)
+    assert registry.get().version == "v3"
+    assert registry.get().zone_for(78) == ("green", "Excellent")
+    
+    # A profile with non-numeric weights is rejected and the current one kept
+    with open(path, "w") as f:
+        json.dump({"version": "v4", "emotion_weight": "heavy", "green_threshold": True}, f)
+    os.utime(path, (os.path.getmtime(path) + 20,) * 2)
+    assert registry.get().version == "v3"
+    try:
+        ScoringProfile.from_dict({"version": "v4", "emotion_weight": "heavy"})
+        assert False, "non-numeric weight should be rejected"
+    except ValueError as e:
+        assert "emotion_weight='heavy'" in str(e)
+    
+    # Values that would break scoring are rejected too, keeping the last good profile
+    for bad in ({"ideal_sentence_length": 0}, {"fluency_weight": -0.3},
+                {"green_threshold": 40, "yellow_threshold": 60}, {"negative_emotion_penalty": float("nan")}):
+        try:
+            ScoringProfile.from_dict(dict(bad, version="v5"))
+            assert False, f"{bad} should be rejected"
+        except ValueError:
+            pass
+        with open(path, "w") as f:
+            json.dump(dict(bad, version="v5"), f)
+        os.utime(path, (os.path.getmtime(path) + 30,) * 2)
+        assert registry.get().version == "v3"
+    assert calculate_cognora_score({"confidence": 0.8}, {"avg_sentence_length": 12}, registry.get())['score'] > 0
+    
+    # UI colors follow the default profile's zone thresholds
+    assert get_score_color(55) == "#ffc107"
+    print("✅ Profile versions reloaded: v2 -> v3")
+
+class FakeScoresTable:
+    """In-memory stand-in for the DynamoDB scores table."""
+    
+    def __init__(self, items):
+        self.items = {(item['user_id'], item['date']): dict(item) for item in items}
+    
+    def scan(self, **kwargs):
+        keys = sorted(self.items)
+        start = keys.index(tuple(kwargs['ExclusiveStartKey'].values())) + 1 if 'ExclusiveStartKey' in kwargs else 0
+        page = keys[start:start + kwargs.get('Limit', 100)]
+        response = {'Items': [dict(self.items[key]) for key in page]}
+        if start + len(page) < len(keys):
+            response['LastEvaluatedKey'] = {'user_id': page[-1][0], 'date': page[-1][1]}
+        return response
+    
+    def update_item(self, Key, UpdateExpression, ExpressionAttributeNames, ExpressionAttributeValues):
+        item = self.items[(Key['user_id'], Key['date'])]
+        item[ExpressionAttributeNames['#score']] = ExpressionAttributeValues[':score']
+        item[ExpressionAttributeNames['#zone']] = ExpressionAttributeValues[':zone']
+
+def test_rescore_job_writes_alongside_old_scores():
+    """Re-scoring stores new-version scores next to the original ones."""
+    print("=== Testing re-score pipeline ===")
+    entries = make_entries(count=30)
+    items = []
+    for i, (emotion, metrics) in enumerate(entries):
+        result = calculate_cognora_score(emotion, metrics)
+        items.append({
+            'user_id': f"user_{i % 3}",
+            'date': f"2024-01-{i + 1:02d}",
+            'emotion': emotion['primary_emotion'],
+            'score': result['score'],
+            'score_breakdown': {k: str(v) for k, v in result['breakdown'].items()},
+            'cognitive_metrics': {k: str(v) for k, v in metrics.items()}
+        })
+    items.append({'user_id': 'user_legacy', 'date': '2023-12-31', 'emotion': 'happy', 'score': 70.0})
+    table = FakeScoresTable(items)
+    
+    # A new ideal sentence length must change fluency, not reuse the stored component
+    profile = ScoringProfile(version="v2", emotion_weight=0.6, cognitive_weight=0.4, ideal_sentence_length=10)
+    status = RescoreJob(profile, table=table, batch_size=7).start().wait(timeout=30)
+    
+    assert status['state'] == 'completed', status
+    assert status['updated'] == 30 and status['skipped'] == 1
+    for (emotion, metrics), item in zip(entries, items):
+        stored = table.items[(item['user_id'], item['date'])]
+        assert stored['score'] == item['score']
+        expected = calculate_cognora_score(emotion, metrics, profile)
+        assert float(stored['score_v2']) == expected['score']
+        assert stored['zone_v2'] == expected['zone']
+    print(f"✅ Re-score status: {status}")
+
+def test_lexicon_matcher_word_boundaries():
+    """Lexicon terms match whole words in English and substrings in Japanese."""
+    print("=== Testing lexicon matcher ===")
+    assert not negative_matcher.search("I played badminton with my grandson")
+    assert negative_matcher.search("It was a BAD day")
+    assert has_negative_sentiment("Sadness") and not has_negative_sentiment("calm")
+    
+    scan = negative_matcher.scan("Worried and worrying, I felt lonely. 今日は寂しいし不安です。")
+    assert scan.count == 5, scan
+    assert abs(scan.weight - (0.7 + 0.7 + 0.9 + 0.9 + 0.8)) < 1e-9
+    assert positive_matcher.scan("今日はとても楽しい一日でした。Great!").count == 2
+    
+    # Large weighted lexicons compile into one pattern
+    large = LexiconMatcher({f"term{i}": 0.5 for i in range(5000)})
+    assert large.scan("term42 and term4999 but not term42x").count == 2
+    print("✅ Lexicon matcher respects word boundaries")
+
+if __name__ == "__main__":
+    test_bulk_scores_match_scalar()
+    test_profile_hot_reload()
+    test_rescore_job_writes_alongside_old_scores()
+    test_lexicon_matcher_word_boundaries()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Test script for shared storage wiring: no AWS round trips on hot paths.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import aws_services
+import storage
+from history_cache import HistoryCache
+
+class CountingAWS:
+    """Stands in for the S3 client, DynamoDB table and SNS client, counting probe calls."""
+
+    table_status = 'ACTIVE'
+
+    def __init__(self):
+        self.probes = 0
+
+    def head_bucket(self, Bucket):
+        self.probes += 1
+
+    def get_topic_attributes(self, TopicArn):
+        self.probes += 1
+
+def test_connectivity_checked_once():
+    """Repeated checks inside the interval reuse the last results."""
+    print("=== Testing connectivity check ===")
+    fake = CountingAWS()
+    names = ('s3_client', 'sns_client', 'scores_table', 's3_bucket_name', 'sns_topic_arn')
+    originals = {name: getattr(aws_services, name) for name in names}
+    try:
+        aws_services.s3_client = aws_services.sns_client = aws_services.scores_table = fake
+        aws_services.s3_bucket_name, aws_services.sns_topic_arn = "bucket", "arn:aws:sns:topic"
+
+        results = aws_services.check_aws_connectivity(force=True)
+        assert results == {'s3': True, 'dynamodb': True, 'sns': True} and fake.probes == 2
+        for _ in range(5):
+            aws_services.check_aws_connectivity(max_age=60)
+        assert fake.probes == 2
+        aws_services.check_aws_connectivity(max_age=0)
+        assert fake.probes == 4
+
+        # Constructing managers and checking alerts makes no probe calls
+        manager = storage.DataManager(cache=HistoryCache(ttl=60))
+        storage.ReportGenerator(manager)
+        storage.AlertManager(manager)
+        assert fake.probes == 4
+        print("✅ Connectivity probed only when stale or forced")
+    finally:
+        for name, value in originals.items():
+            setattr(aws_services, name, value)
+        aws_services.check_aws_connectivity(force=True)
+
+def test_managers_share_one_history_cache():
+    """Reports and alerts read through the injected DataManager's cache."""
+    print("=== Testing shared DataManager ===")
+    queries = []
+
+    def fake_query(user_id, limit=None, **kwargs):
+        queries.append(limit)
+        return iter([{'user_id': user_id, 'date': f"2024-03-{day:02d}", 'score': 70.0, 'emotion': 'calm'}
+                     for day in range(20, 20 - limit, -1)])
+
+    original = storage.query_user_history
+    try:
+        storage.query_user_history = fake_query
+        manager = storage.DataManager(cache=HistoryCache(ttl=60))
+        alerts = storage.AlertManager(manager)
+        reports = storage.ReportGenerator(manager)
+
+        status = alerts.check_and_send_alerts('alice')
+        assert status['alert_sent'] is False
+        reports.export_data_csv('alice', days=7)
+        assert reports.data_manager is manager and alerts.data_manager is manager
+        assert queries == [7]
+        print(f"✅ One history query for alerts and exports, cache stats: {manager.cache.stats}")
+    finally:
+        storage.query_user_history = original
+
+if __name__ == "__main__":
+    test_connectivity_checked_once()
+    test_managers_share_one_history_cache()
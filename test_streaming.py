@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test script for streaming Bedrock responses and incremental JSON parsing.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import aws_services
+from agents import EmotionAgent, MemoryAgent, AlertAgent, CombinedAnalysisAgent
+from json_stream import IncrementalJSONParser
+from llm_cache import ResponseCache
+from orchestrator import AnalysisOrchestrator
+
+COMPLETION = (
+    'Here is the analysis:\n{"primary_emotion": "lonely", "confidence": 0.82, "intensity": 6, '
+    '"stability": "stable", "concerning_patterns": ["isolation", "low \\"energy\\""], '
+    '"summary": "Misses her daughter, 寂しい", "timestamp": "2024-01-01T00:00:00"}'
+)
+
+class FakeStreamingRuntime:
+    """Replays a completion as Bedrock response-stream events, a few characters at a time."""
+
+    def __init__(self, completion, chunk_size=7):
+        self.completion = completion
+        self.chunk_size = chunk_size
+        self.delivered = []
+
+    def _events(self):
+        yield {'chunk': {'bytes': json.dumps(
+            {'type': 'message_start', 'message': {'usage': {'input_tokens': 150}}}).encode()}}
+        for i in range(0, len(self.completion), self.chunk_size):
+            text = self.completion[i:i + self.chunk_size]
+            self.delivered.append(text)
+            yield {'chunk': {'bytes': json.dumps(
+                {'type': 'content_block_delta', 'delta': {'type': 'text_delta', 'text': text}}).encode()}}
+        yield {'chunk': {'bytes': json.dumps(
+            {'type': 'message_delta', 'usage': {'output_tokens': 60}}).encode()}}
+
+    def invoke_model_with_response_stream(self, body, modelId):
+        return {'body': self._events()}
+
+def test_parser_reports_fields_as_they_complete():
+    """Fields are reported before the object closes, for every chunking."""
+    print("=== Testing incremental JSON parser ===")
+    expected = json.loads(COMPLETION[COMPLETION.index("{"):])
+    for chunk_size in (1, 3, 16, len(COMPLETION)):
+        parser = IncrementalJSONParser()
+        first_seen = {}
+        for i in range(0, len(COMPLETION), chunk_size):
+            for path in parser.feed(COMPLETION[i:i + chunk_size]):
+                first_seen[path] = i + chunk_size
+        assert parser.done and parser.document == expected
+        assert {path[0]: value for path, value in parser.fields.items()} == expected
+        if chunk_size == 1:
+            assert first_seen[("primary_emotion",)] < COMPLETION.index('"confidence"')
+
+    nested = IncrementalJSONParser()
+    nested.feed('{"emotion": {"primary_emotion": "calm", "intensity": 3}, "alert": {"alert_needed": false}}')
+    assert nested.fields[("emotion", "primary_emotion")] == "calm"
+    assert nested.fields[("alert", "alert_needed")] is False
+    assert nested.fields[("emotion",)] == {"primary_emotion": "calm", "intensity": 3}
+    print("✅ Fields decoded incrementally")
+
+def test_streamed_agent_and_orchestrator():
+    """The emotion agent streams through the orchestrator; fields precede the result."""
+    print("=== Testing streamed analysis ===")
+    original_runtime, original_cache = aws_services.bedrock_runtime, aws_services.response_cache
+    try:
+        aws_services.bedrock_runtime = FakeStreamingRuntime(COMPLETION)
+        aws_services.response_cache = ResponseCache(None)
+
+        seen = []
+        result = aws_services.invoke_claude_stream("prompt", on_text=seen.append)
+        assert "".join(seen) == COMPLETION and result['text'] == COMPLETION
+        assert result['usage'] == {'input_tokens': 150, 'output_tokens': 60}
+
+        emotion, memory, alert = EmotionAgent(), MemoryAgent(), AlertAgent()
+        orchestrator = AnalysisOrchestrator(
+            emotion, memory, alert, metrics_fn=lambda text: {"word_count": len(text.split())},
+            executor=ThreadPoolExecutor(max_workers=2), agent_timeout=5, metrics_timeout=5,
+            combined_agent=CombinedAnalysisAgent(emotion, memory, alert)
+        )
+        events = list(orchestrator.stream("I miss my daughter"))
+        kinds = [kind for kind, _, _ in events]
+        assert kinds[-1] == "result" and kinds.count("result") == 1
+        fields = {path: value for kind, path, value in events if kind == "field"}
+        assert fields[("primary_emotion",)] == "lonely"
+        analysis = events[-1][2]
+        assert analysis['cognitive_metrics']['word_count'] == 4
+        print(f"✅ Streamed {len(fields)} fields before the result")
+    finally:
+        aws_services.bedrock_runtime, aws_services.response_cache = original_runtime, original_cache
+
+if __name__ == "__main__":
+    test_parser_reports_fields_as_they_complete()
+    test_streamed_agent_and_orchestrator()
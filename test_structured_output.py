@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test script for the structured-output parsing layer.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import json
+
+import agents
+from agents import EmotionAgent
+from monitoring import llm_usage_monitor
+from structured_output import (
+    EMOTION_SCHEMA, extract_json_object, parse_structured_output, validate_schema
+)
+
+VALID = {"primary_emotion": "calm", "confidence": 0.8, "intensity": 4, "summary": "Relaxed"}
+
+def test_extracts_first_object_from_prose():
+    """JSON wrapped in prose or code fences is recovered without a model call."""
+    print("=== Testing JSON extraction ===")
+    wrapped = [
+        json.dumps(VALID),
+        f"Sure! Here is the analysis:\n{json.dumps(VALID)}\nLet me know if you need more.",
+        f"```json\n{json.dumps(VALID, indent=2)}\n```",
+        "Braces {like these} come first, then " + json.dumps(VALID),
+    ]
+    for i, text in enumerate(wrapped):
+        document, extracted = extract_json_object(text)
+        assert document == VALID, text
+        assert extracted == (i > 0)
+    assert extract_json_object("no json here") == (None, False)
+    assert extract_json_object(None) == (None, False)
+
+    coerced = {"primary_emotion": "sad", "confidence": "0.7", "intensity": 6}
+    assert validate_schema(coerced, EMOTION_SCHEMA) == [] and coerced["confidence"] == 0.7
+    assert validate_schema({"primary_emotion": "sad", "confidence": True, "intensity": 6}, EMOTION_SCHEMA)
+    print("✅ JSON objects extracted and validated")
+
+def test_single_repair_call_and_metrics():
+    """An invalid answer gets exactly one repair call; outcomes are counted."""
+    print("=== Testing bounded repair ===")
+    repairs = []
+
+    def repair_ok(prompt):
+        repairs.append(prompt)
+        return json.dumps(VALID)
+
+    result = parse_structured_output("test_agent", '{"primary_emotion": "calm"}', EMOTION_SCHEMA, repair_ok)
+    assert result == VALID and len(repairs) == 1
+    assert "missing required field 'confidence'" in repairs[0]
+
+    def repair_bad(prompt):
+        repairs.append(prompt)
+        return "I'm sorry, I can't do that."
+
+    result = parse_structured_output("test_agent", "not json", EMOTION_SCHEMA, repair_bad)
+    assert result["error"] == "malformed_json" and len(repairs) == 2
+
+    parse_structured_output("test_agent", json.dumps(VALID), EMOTION_SCHEMA, repair_bad)
+    stats = llm_usage_monitor.get_metrics()['parsing']['test_agent']
+    assert stats['repaired'] == 1 and stats['failed'] == 1 and stats['ok'] == 1
+    assert abs(llm_usage_monitor.parse_failure_rates()['test_agent'] - 2 / 3) < 1e-9
+    print(f"✅ Parse outcomes: {stats}")
+
+def test_agent_uses_repair_through_bedrock():
+    """EmotionAgent recovers from a prose-only answer with one extra call."""
+    print("=== Testing agent repair path ===")
+    answers = iter(["I think the user feels calm.", json.dumps(VALID)])
+    calls, cacheable = [], []
+
+    def fake_invoke(prompt, max_tokens=1024, use_cache=True, cache_if=None):
+        calls.append(prompt)
+        text = next(answers)
+        cacheable.append(cache_if(text))
+        return {'text': text, 'usage': {}, 'latency': 0.0, 'cached': False}
+
+    original = agents.invoke_claude
+    try:
+        agents.invoke_claude = fake_invoke
+        assert EmotionAgent().analyze_emotion("I sat in the garden") == VALID
+        assert len(calls) == 2
+        # Only the completion that validates may be cached
+        assert cacheable == [False, True]
+    finally:
+        agents.invoke_claude = original
+    print("✅ Agent repaired its answer with one extra call")
+
+if __name__ == "__main__":
+    test_extracts_first_object_from_prose()
+    test_single_repair_call_and_metrics()
+    test_agent_uses_repair_through_bedrock()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test script for the pluggable speech-to-text backends.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import io
+import wave
+
+import numpy as np
+
+import aws_services
+import transcribers
+from audio_index import AudioIndex
+from config import config
+from transcribers import LocalTranscriber, Transcriber, read_wav_pcm, register_transcriber
+
+def make_wav(seconds=1.0, sample_rate=16000, channels=1):
+    t = np.linspace(0, seconds, int(seconds * sample_rate), endpoint=False)
+    samples = (np.sin(2 * np.pi * 220 * t) * 8000).astype(np.int16)
+    if channels > 1:
+        samples = np.repeat(samples, channels)
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+class FakeBackend(Transcriber):
+    def __init__(self, name, transcript=None, available=True, error=None):
+        self.name = name
+        self.transcript = transcript
+        self.available = available
+        self.error = error
+        self.calls = 0
+
+    def is_available(self):
+        return self.available
+
+    def transcribe(self, audio, media_format, job_name=None, digest=None):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return self.transcript
+
+class FakeLocalModel(LocalTranscriber):
+    """Local backend whose 'recognizer' reports what it was given."""
+
+    name = "fake_local"
+
+    def is_available(self):
+        return True
+
+    def _load_model(self):
+        return "model"
+
+    def _recognize(self, model, samples, sample_rate):
+        return f"{model} heard {len(samples)} samples at {sample_rate} Hz"
+
+def test_backend_chain_and_no_canned_fallback():
+    """The configured backend is used, failures fall through, and nothing invents text."""
+    print("=== Testing backend selection and fallback ===")
+    settings = config.transcription
+    original = (settings.backend, settings.fallback_backends, dict(transcribers._transcribers),
+                aws_services.audio_index, transcribers.audio_index)
+    try:
+        aws_services.audio_index = transcribers.audio_index = AudioIndex(path="")
+        primary = FakeBackend("fake_primary", error=RuntimeError("model crashed"))
+        offline = FakeBackend("fake_offline", available=False)
+        secondary = FakeBackend("fake_secondary", transcript="I slept well today")
+        for backend in (primary, offline, secondary):
+            register_transcriber(backend)
+
+        settings.backend = "fake_primary"
+        settings.fallback_backends = ["fake_offline", "fake_secondary"]
+        audio = io.BytesIO(make_wav())
+        audio.name = "checkin.wav"
+        assert aws_services.transcribe_audio_file(audio) == "I slept well today"
+        assert primary.calls == 1 and offline.calls == 0 and secondary.calls == 1
+
+        # Every backend failing yields None, never a random sample transcript
+        settings.fallback_backends = ["fake_offline"]
+        silence = io.BytesIO(make_wav(seconds=0.5))
+        silence.name = "silence.wav"
+        assert aws_services.transcribe_audio_file(silence) is None
+        print("✅ Fallback chain honoured; failures return None")
+    finally:
+        settings.backend, settings.fallback_backends = original[0], original[1]
+        aws_services.audio_index, transcribers.audio_index = original[3], original[4]
+        transcribers._transcribers.clear()
+        transcribers._transcribers.update(original[2])
+
+def test_local_backend_decodes_wav():
+    """Local backends get mono PCM samples on their worker pool and reject other formats."""
+    print("=== Testing local backend input ===")
+    samples, sample_rate = read_wav_pcm(make_wav(seconds=0.5, sample_rate=8000, channels=2))
+    assert samples.dtype == np.int16 and len(samples) == 4000 and sample_rate == 8000
+    assert read_wav_pcm(b"not a wav file") is None
+
+    local = FakeLocalModel(workers=1)
+    assert local.transcribe(make_wav(seconds=1.0), "wav") == "model heard 16000 samples at 16000 Hz"
+    assert local.transcribe(io.BytesIO(b"webm data"), "webm") is None
+    print("✅ Local backend decoded WAV input")
+
+if __name__ == "__main__":
+    test_backend_chain_and_no_canned_fallback()
+    test_local_backend_decodes_wav()
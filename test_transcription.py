@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Test script for the transcription job manager.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import io
+import json
+import stat
+import tempfile
+import threading
+import time
+
+import aws_services
+import transcribers
+from audio_index import AudioIndex, audio_digest, unique_job_name
+from config import config
+from transcription import TranscriptionJobManager
+
+class FakeTranscribe:
+    """Local stand-in for AWS Transcribe: each job completes after a fixed duration."""
+
+    def __init__(self, duration):
+        self.duration = duration
+        self.jobs = {}
+        self.polls = 0
+
+    def start_transcription_job(self, TranscriptionJobName, Media, MediaFormat, LanguageCode):
+        self.jobs[TranscriptionJobName] = time.monotonic()
+
+    def is_complete(self, job_name):
+        return time.monotonic() - self.jobs[job_name] >= self.duration
+
+    def get_transcription_job(self, TranscriptionJobName):
+        self.polls += 1
+        done = self.is_complete(TranscriptionJobName)
+        job = {'TranscriptionJobStatus': 'COMPLETED' if done else 'IN_PROGRESS'}
+        if done:
+            job['Transcript'] = {'TranscriptFileUri': f"https://s3.amazonaws.com/bucket/{TranscriptionJobName}.json"}
+        return {'TranscriptionJob': job}
+
+class FakeS3:
+    def __init__(self):
+        self.uploads = {}
+
+    def get_object(self, Bucket, Key):
+        body = {'results': {'transcripts': [{'transcript': f"transcript for {Key}"}]}}
+        return {'Body': io.BytesIO(json.dumps(body).encode())}
+
+    def upload_fileobj(self, Fileobj, Bucket, Key, ExtraArgs=None, Config=None):
+        # Read the way s3transfer does: one chunk at a time
+        size, largest = 0, 0
+        while True:
+            chunk = Fileobj.read(Config.multipart_chunksize)
+            if not chunk:
+                break
+            size += len(chunk)
+            largest = max(largest, len(chunk))
+        self.uploads[Key] = {'size': size, 'largest_read': largest, 'extra': ExtraArgs,
+                             'multipart': size > Config.multipart_threshold}
+
+def test_adaptive_polling_time_to_transcript():
+    """A 0.3 s job is picked up within a few hundred ms, instead of after a 5 s sleep."""
+    print("=== Testing adaptive polling ===")
+    service = FakeTranscribe(duration=0.3)
+    manager = TranscriptionJobManager(service, FakeS3(), "bucket", initial_interval=0.05,
+                                      max_interval=1.0, backoff=1.5, timeout=10)
+    started = time.monotonic()
+    future = manager.submit("job_short", "s3://bucket/a.wav", "wav")
+    assert not future.done()
+    transcript = future.result(timeout=5)
+    time_to_transcript = time.monotonic() - started
+
+    assert transcript == "transcript for job_short.json"
+    assert time_to_transcript < 0.6, time_to_transcript
+    assert service.polls <= 8, service.polls
+    print(f"✅ Time to transcript {time_to_transcript:.2f}s with {service.polls} polls (fixed 5s polling: 5.00s)")
+
+def test_long_jobs_back_off_and_notifications_wake():
+    """Long jobs poll less often; a completion notification ends the wait immediately."""
+    print("=== Testing backoff and notifications ===")
+    service = FakeTranscribe(duration=1.5)
+    manager = TranscriptionJobManager(service, FakeS3(), "bucket", initial_interval=0.05,
+                                      max_interval=0.5, backoff=2.0, timeout=10)
+    assert manager.submit("job_long", "s3://bucket/b.wav", "wav").result(timeout=5)
+    # A fixed 0.05 s interval would need ~30 polls
+    assert service.polls <= 9, service.polls
+
+    service = FakeTranscribe(duration=0.4)
+    manager = TranscriptionJobManager(service, FakeS3(), "bucket", initial_interval=5.0,
+                                      max_interval=5.0, timeout=10)
+    future = manager.submit("job_notified", "s3://bucket/c.wav", "wav")
+
+    def notify_on_completion():
+        while "job_notified" not in service.jobs or not service.is_complete("job_notified"):
+            time.sleep(0.01)
+        manager.notify("job_notified")
+
+    threading.Thread(target=notify_on_completion, daemon=True).start()
+    started = time.monotonic()
+    assert future.result(timeout=5)
+    assert time.monotonic() - started < 1.0
+    assert manager.stats['notifications'] == 1
+    print(f"✅ Manager stats: {manager.stats}")
+
+class UploadedFile(io.BytesIO):
+    """Shape of Streamlit's UploadedFile (a BytesIO with a name)."""
+
+    def __init__(self, data, name):
+        super().__init__(data)
+        self.name = name
+
+def test_upload_streams_without_temp_files():
+    """Uploads go straight from memory to S3 in bounded chunks, for files and bytes."""
+    print("=== Testing zero-copy audio upload ===")
+    s3 = FakeS3()
+    originals = (aws_services.s3_client, aws_services.transcribe_client,
+                 aws_services.transcription_manager, tempfile.NamedTemporaryFile,
+                 aws_services.audio_index, transcribers.audio_index)
+
+    def no_temp_files(*args, **kwargs):
+        raise AssertionError("audio must not be written to a temp file")
+
+    try:
+        aws_services.s3_client = s3
+        aws_services.transcribe_client = service = FakeTranscribe(duration=0)
+        aws_services.transcription_manager = TranscriptionJobManager(service, s3, aws_services.s3_bucket_name,
+                                                                     initial_interval=0.01)
+        tempfile.NamedTemporaryFile = no_temp_files
+        aws_services.audio_index = transcribers.audio_index = AudioIndex(path="")
+
+        large = UploadedFile(b"\0" * (20 * 1024 * 1024), "long_checkin.wav")
+        large.read(100)  # Streamlit may already have read part of it
+        assert aws_services.transcribe_audio_file(large, job_name="job_upload")
+        upload = s3.uploads["audio-uploads/job_upload.wav"]
+        assert upload['size'] == 20 * 1024 * 1024 and upload['multipart']
+        assert upload['largest_read'] <= 8 * 1024 * 1024
+        assert upload['extra'] == {'ContentType': 'audio/wav'}
+
+        aws_services.upload_audio_fileobj(b"RIFF" + b"\0" * 1000, "audio-uploads/mic.wav")
+        assert s3.uploads["audio-uploads/mic.wav"]['size'] == 1004
+        assert not s3.uploads["audio-uploads/mic.wav"]['multipart']
+        print(f"✅ Uploaded {len(s3.uploads)} files without temp files")
+    finally:
+        (aws_services.s3_client, aws_services.transcribe_client,
+         aws_services.transcription_manager, tempfile.NamedTemporaryFile,
+         aws_services.audio_index, transcribers.audio_index) = originals
+
+def test_duplicate_uploads_reuse_transcripts():
+    """The same recording uploaded twice is transcribed once; job names never collide."""
+    print("=== Testing audio deduplication ===")
+    s3 = FakeS3()
+    originals = (aws_services.s3_client, aws_services.transcribe_client, aws_services.transcription_manager,
+                 aws_services.audio_index, transcribers.audio_index)
+    try:
+        aws_services.s3_client = s3
+        aws_services.transcribe_client = service = FakeTranscribe(duration=0)
+        aws_services.transcription_manager = TranscriptionJobManager(service, s3, aws_services.s3_bucket_name,
+                                                                     initial_interval=0.01)
+        aws_services.audio_index = transcribers.audio_index = index = AudioIndex(path="")
+
+        recording = b"webm recording" * 1000
+        first = aws_services.transcribe_audio_file(UploadedFile(recording, "cognora_recording_1.webm"))
+        second = aws_services.transcribe_audio_file(UploadedFile(recording, "cognora_recording_1 (1).webm"))
+        assert first and second == first
+        assert len(service.jobs) == 1 and len(s3.uploads) == 1
+        assert index.stats['transcript_hits'] == 1
+
+        # A known upload without a transcript is not uploaded again
+        index.record_transcript(audio_digest(recording), None)
+        assert aws_services.transcribe_audio_file(UploadedFile(recording, "again.webm"))
+        assert len(service.jobs) == 2 and len(s3.uploads) == 1 and index.stats['upload_reuses'] == 1
+
+        # Another language re-transcribes (reusing the upload); expired entries are not served
+        digest = audio_digest(recording)
+        index.record_transcript(digest, "hello")
+        settings = config.transcription
+        original_language = settings.language_code
+        try:
+            settings.language_code = "es-US"
+            assert index.lookup_transcript(digest) is None
+            assert aws_services.transcribe_audio_file(UploadedFile(recording, "spanish.webm"))
+            assert len(service.jobs) == 3 and len(s3.uploads) == 1
+        finally:
+            settings.language_code = original_language
+        assert index.lookup_transcript(digest) == "hello"
+        index.ttl_seconds = 0
+        time.sleep(0.01)
+        assert index.lookup_transcript(digest) is None and index.lookup_upload(digest) is None
+
+        # The disk tier lives in a private directory
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "private", "index.sqlite3")
+            AudioIndex(path=path).record_transcript(digest, "hello")
+            assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+            assert not stat.S_IMODE(os.stat(os.path.dirname(path)).st_mode) & 0o077
+            assert AudioIndex(path=path).lookup_transcript(digest) == "hello"
+            assert AudioIndex(path=path, ttl_seconds=0).lookup_transcript(digest) is None
+
+        names = {unique_job_name() for _ in range(1000)}
+        assert len(names) == 1000
+        print(f"✅ Index stats: {index.stats}")
+    finally:
+        (aws_services.s3_client, aws_services.transcribe_client, aws_services.transcription_manager,
+         aws_services.audio_index, transcribers.audio_index) = originals
+
+if __name__ == "__main__":
+    test_adaptive_polling_time_to_transcript()
+    test_long_jobs_back_off_and_notifications_wake()
+    test_upload_streams_without_temp_files()
+    test_duplicate_uploads_reuse_transcripts()
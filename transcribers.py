@@ -0,0 +1,248 @@
+"""
+Speech-to-Text Backends for Cognora+
+Pluggable transcribers that aws_services.transcribe_audio_file dispatches
+through. The backend is chosen by TRANSCRIBER_BACKEND, with an optional
+fallback chain (TRANSCRIBER_FALLBACK):
+
+    aws         AWS Transcribe (S3 upload + transcription job)
+    vosk        Local CPU recognition with Vosk (needs the vosk package and a model)
+    whispercpp  Local CPU recognition with whisper.cpp bindings (pywhispercpp)
+    mock        Canned transcript for UI development only; never used implicitly
+
+Local backends run on a worker pool, skip the S3 upload and job queue, and
+take 16-bit PCM WAV input.
+"""
+
+import io
+import json
+import threading
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from audio_index import audio_index
+from config import config
+
+class Transcriber:
+    """Interface for speech-to-text backends."""
+
+    name = "base"
+
+    def is_available(self) -> bool:
+        """True if the backend can be used in this environment."""
+        return False
+
+    def transcribe(self, audio, media_format: str, job_name: Optional[str] = None,
+                   digest: Optional[str] = None) -> Optional[str]:
+        """
+        Transcribes one clip.
+
+        Args:
+            audio: File-like object or bytes
+            media_format: AWS Transcribe media format name ('wav', 'mp3', 'mp4', 'flac', 'webm')
+            job_name: Identifier for the request (used by job-based backends)
+            digest: Content hash of the audio, when known (lets job-based backends reuse uploads)
+
+        Returns:
+            Transcript text, or None if the clip could not be transcribed
+        """
+        raise NotImplementedError
+
+class AWSTranscriber(Transcriber):
+    """AWS Transcribe via S3 upload and a transcription job."""
+
+    name = "aws"
+
+    def is_available(self) -> bool:
+        import aws_services
+        return bool(aws_services.transcribe_client and aws_services.s3_client)
+
+    def transcribe(self, audio, media_format: str, job_name: Optional[str] = None,
+                   digest: Optional[str] = None) -> Optional[str]:
+        from aws_services import transcribe_audio_file_aws
+        return transcribe_audio_file_aws(audio, media_format, job_name, digest)
+
+def read_wav_pcm(audio) -> Optional[tuple]:
+    """
+    Decodes 16-bit PCM WAV audio to a mono int16 array.
+
+    Returns:
+        (samples, sample_rate), or None if the audio is not 16-bit PCM WAV
+    """
+    data = audio if isinstance(audio, (bytes, bytearray, memoryview)) else None
+    if data is None:
+        if hasattr(audio, 'seek'):
+            audio.seek(0)
+        data = audio.read()
+    try:
+        with wave.open(io.BytesIO(data), 'rb') as wav:
+            if wav.getsampwidth() != 2:
+                return None
+            channels = wav.getnchannels()
+            sample_rate = wav.getframerate()
+            samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+    except (wave.Error, EOFError):
+        return None
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1).astype(np.int16)
+    return samples, sample_rate
+
+class LocalTranscriber(Transcriber):
+    """Base for in-process CPU backends; recognition runs on a shared worker pool."""
+
+    def __init__(self, model_path: Optional[str] = None, workers: Optional[int] = None):
+        self.model_path = model_path or config.transcription.local_model_path
+        self._model = None
+        self._lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers or config.transcription.local_workers,
+            thread_name_prefix=f"cognora-stt-{self.name}"
+        )
+
+    def _load_model(self):
+        raise NotImplementedError
+
+    def _recognize(self, model, samples: np.ndarray, sample_rate: int) -> str:
+        raise NotImplementedError
+
+    def model(self):
+        with self._lock:
+            if self._model is None:
+                self._model = self._load_model()
+            return self._model
+
+    def transcribe(self, audio, media_format: str, job_name: Optional[str] = None,
+                   digest: Optional[str] = None) -> Optional[str]:
+        decoded = read_wav_pcm(audio) if media_format == 'wav' else None
+        if decoded is None:
+            print(f"WARNING: {self.name} transcriber needs 16-bit PCM WAV input, got {media_format}")
+            return None
+        samples, sample_rate = decoded
+        transcript = self.executor.submit(self._recognize, self.model(), samples, sample_rate).result()
+        return transcript.strip() or None
+
+class VoskTranscriber(LocalTranscriber):
+    """Offline recognition with Vosk (Kaldi)."""
+
+    name = "vosk"
+
+    def is_available(self) -> bool:
+        try:
+            import vosk  # noqa: F401
+        except ImportError:
+            return False
+        return bool(self.model_path)
+
+    def _load_model(self):
+        import vosk
+        vosk.SetLogLevel(-1)
+        return vosk.Model(self.model_path)
+
+    def _recognize(self, model, samples: np.ndarray, sample_rate: int) -> str:
+        import vosk
+        # Recognizers are cheap and not thread-safe; the model is shared
+        recognizer = vosk.KaldiRecognizer(model, sample_rate)
+        pcm = samples.tobytes()
+        step = 8000
+        for start in range(0, len(pcm), step):
+            recognizer.AcceptWaveform(pcm[start:start + step])
+        return json.loads(recognizer.FinalResult()).get('text', '')
+
+class WhisperCppTranscriber(LocalTranscriber):
+    """Offline recognition with whisper.cpp through the pywhispercpp bindings."""
+
+    name = "whispercpp"
+
+    def is_available(self) -> bool:
+        try:
+            import pywhispercpp  # noqa: F401
+        except ImportError:
+            return False
+        return bool(self.model_path)
+
+    def _load_model(self):
+        from pywhispercpp.model import Model
+        return Model(self.model_path, print_progress=False)
+
+    def _recognize(self, model, samples: np.ndarray, sample_rate: int) -> str:
+        if sample_rate != 16000:
+            # whisper.cpp expects 16 kHz; linear resampling is adequate for speech
+            duration = len(samples) / sample_rate
+            target = np.linspace(0, len(samples) - 1, int(duration * 16000))
+            samples = np.interp(target, np.arange(len(samples)), samples)
+        audio = (np.asarray(samples, dtype=np.float32) / 32768.0)
+        segments = model.transcribe(audio)
+        return " ".join(segment.text.strip() for segment in segments)
+
+class MockTranscriber(Transcriber):
+    """Returns a canned transcript. Only for UI development; select it explicitly."""
+
+    name = "mock"
+
+    def is_available(self) -> bool:
+        return True
+
+    def transcribe(self, audio, media_format: str, job_name: Optional[str] = None,
+                   digest: Optional[str] = None) -> Optional[str]:
+        from aws_services import transcribe_audio_file_fallback
+        return transcribe_audio_file_fallback(audio)
+
+TRANSCRIBER_BACKENDS = {
+    "aws": AWSTranscriber,
+    "vosk": VoskTranscriber,
+    "whispercpp": WhisperCppTranscriber,
+    "mock": MockTranscriber,
+}
+
+_transcribers: Dict[str, Transcriber] = {}
+_transcribers_lock = threading.Lock()
+
+def get_transcriber(name: str) -> Transcriber:
+    """Returns the process-wide instance of a backend."""
+    if name not in TRANSCRIBER_BACKENDS:
+        raise ValueError(f"Unknown transcriber backend '{name}' (expected one of {', '.join(TRANSCRIBER_BACKENDS)})")
+    with _transcribers_lock:
+        if name not in _transcribers:
+            _transcribers[name] = TRANSCRIBER_BACKENDS[name]()
+        return _transcribers[name]
+
+def register_transcriber(transcriber: Transcriber):
+    """Installs a transcriber instance under its name (custom backends, tests)."""
+    TRANSCRIBER_BACKENDS.setdefault(transcriber.name, type(transcriber))
+    with _transcribers_lock:
+        _transcribers[transcriber.name] = transcriber
+
+def backend_chain() -> List[str]:
+    """The configured backend followed by its fallbacks, without duplicates."""
+    chain = [config.transcription.backend] + config.transcription.fallback_backends
+    return list(dict.fromkeys(chain))
+
+def transcribe_with_backends(audio, media_format: str, job_name: Optional[str] = None,
+                             digest: Optional[str] = None) -> Optional[str]:
+    """
+    Tries each backend in the configured chain until one returns a transcript.
+    With a digest, real (non-mock) transcripts are recorded in the audio index.
+
+    Returns:
+        Transcript text, or None if no backend could transcribe the clip
+    """
+    for name in backend_chain():
+        transcriber = get_transcriber(name)
+        if not transcriber.is_available():
+            print(f"WARNING: {name} transcriber not available")
+            continue
+        try:
+            if hasattr(audio, 'seek'):
+                audio.seek(0)
+            transcript = transcriber.transcribe(audio, media_format, job_name, digest)
+        except Exception as e:
+            print(f"ERROR: {name} transcriber failed: {e}")
+            continue
+        if transcript:
+            print(f"DEBUG: Transcribed with {name} backend")
+            if digest and name != MockTranscriber.name:
+                audio_index.record_transcript(digest, transcript, backend=name)
+            return transcript
+    return None
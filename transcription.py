@@ -0,0 +1,120 @@
+"""
+Transcription Job Management for Cognora+
+Waits for AWS Transcribe jobs off the UI thread. Jobs are polled adaptively
+(quickly at first, backing off for long recordings) and a completion
+notification (e.g. an EventBridge rule relayed through SNS/SQS) can wake the
+waiter immediately. Results are handed back as futures.
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from config import config
+
+TERMINAL_STATUSES = ('COMPLETED', 'FAILED')
+
+class TranscriptionJobManager:
+    """Starts, waits for and collects AWS Transcribe jobs on a worker pool."""
+
+    def __init__(self, transcribe_client, s3_client, bucket_name: Optional[str],
+                 max_workers: Optional[int] = None, initial_interval: Optional[float] = None,
+                 max_interval: Optional[float] = None, backoff: Optional[float] = None,
+                 timeout: Optional[float] = None):
+        settings = config.transcription
+        self.transcribe_client = transcribe_client
+        self.s3_client = s3_client
+        self.bucket_name = bucket_name
+        self.initial_interval = settings.poll_initial_seconds if initial_interval is None else initial_interval
+        self.max_interval = settings.poll_max_seconds if max_interval is None else max_interval
+        self.backoff = settings.poll_backoff if backoff is None else backoff
+        self.timeout = settings.timeout_seconds if timeout is None else timeout
+        self.executor = ThreadPoolExecutor(
+            max_workers=settings.max_workers if max_workers is None else max_workers,
+            thread_name_prefix="cognora-transcribe"
+        )
+        self._events: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self.stats = {'jobs': 0, 'polls': 0, 'notifications': 0, 'total_wait': 0.0}
+
+    def notify(self, job_name: str):
+        """Wakes the waiter for job_name (call from a job-state-change notification handler)."""
+        with self._lock:
+            event = self._events.get(job_name)
+            self.stats['notifications'] += 1
+        if event:
+            event.set()
+
+    def wait_for_job(self, job_name: str) -> Dict[str, Any]:
+        """
+        Blocks the calling (worker) thread until the job reaches a terminal status.
+
+        Returns:
+            The final get_transcription_job response
+
+        Raises:
+            TimeoutError: The job did not finish within the timeout
+        """
+        with self._lock:
+            event = self._events.setdefault(job_name, threading.Event())
+        started = time.monotonic()
+        interval = self.initial_interval
+        try:
+            while True:
+                status = self.transcribe_client.get_transcription_job(TranscriptionJobName=job_name)
+                with self._lock:
+                    self.stats['polls'] += 1
+                job_status = status['TranscriptionJob']['TranscriptionJobStatus']
+                if job_status in TERMINAL_STATUSES:
+                    return status
+
+                elapsed = time.monotonic() - started
+                if elapsed >= self.timeout:
+                    raise TimeoutError(f"Transcription job {job_name} still {job_status} after {elapsed:.0f}s")
+                print(f"Transcription in progress... Status: {job_status}")
+                # A notification ends the wait early; otherwise back off towards max_interval
+                event.wait(min(interval, self.timeout - elapsed))
+                event.clear()
+                interval = min(self.max_interval, interval * self.backoff)
+        finally:
+            with self._lock:
+                self._events.pop(job_name, None)
+                self.stats['total_wait'] += time.monotonic() - started
+
+    def fetch_transcript(self, status: Dict[str, Any]) -> Optional[str]:
+        """Reads the transcript text of a finished job (None if it failed)."""
+        job = status['TranscriptionJob']
+        if job['TranscriptionJobStatus'] != 'COMPLETED':
+            print(f"ERROR: Transcription failed with status: {job['TranscriptionJobStatus']}")
+            if 'FailureReason' in job:
+                print(f"Failure reason: {job['FailureReason']}")
+            return None
+        transcript_uri = job['Transcript']['TranscriptFileUri']
+        content = self.s3_client.get_object(
+            Bucket=self.bucket_name, Key=transcript_uri.split(f"{self.bucket_name}/")[-1]
+        )
+        transcript_data = json.loads(content['Body'].read().decode('utf-8'))
+        return transcript_data['results']['transcripts'][0]['transcript']
+
+    def run_job(self, job_name: str, media_uri: str, media_format: str, language_code: str = 'en-US') -> Optional[str]:
+        """Starts a job and waits for its transcript on the calling thread."""
+        self.transcribe_client.start_transcription_job(
+            TranscriptionJobName=job_name,
+            Media={'MediaFileUri': media_uri},
+            MediaFormat=media_format,
+            LanguageCode=language_code
+        )
+        with self._lock:
+            self.stats['jobs'] += 1
+        print(f"DEBUG: Transcription job started: {job_name}")
+        return self.fetch_transcript(self.wait_for_job(job_name))
+
+    def submit(self, job_name: str, media_uri: str, media_format: str, language_code: str = 'en-US') -> Future:
+        """Starts a job on the worker pool and returns a Future for its transcript."""
+        return self.executor.submit(self.run_job, job_name, media_uri, media_format, language_code)
+
+    def submit_call(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """Runs a whole transcription pipeline (upload, job, fetch) on the worker pool."""
+        return self.executor.submit(fn, *args, **kwargs)
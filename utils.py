@@ -88,6 +88,9 @@ TRANSLATIONS = {
         'enter_text_analyze': 'Please enter some text to analyze.',
         'how_feeling_today': 'How are you feeling today? Share your thoughts, experiences, or anything on your mind...',
         'placeholder_text': 'Today I felt... I did... I\'m thinking about...',
+        'live_preview': 'Preview: {words} words · {sentences} sentences · vocabulary variety {diversity:.0%}',
+        'streaming_emotion': 'Momo senses so far',
+        'analysis_incomplete': 'Part of the AI analysis could not be completed, so default values were used for it.',
         'choose_input_method': 'Choose your input method:',
         'download_weekly_report': 'Download Weekly Report (PDF)',
         'download_csv_export': 'Download CSV Export',
@@ -277,6 +280,9 @@ TRANSLATIONS = {
         'enter_text_analyze': '分析するテキストを入力してください。',
         'how_feeling_today': '今日はどのように感じていますか？考えや経験、心に浮かんだことを共有してください...',
         'placeholder_text': '今日は...感じました。...しました。...について考えています...',
+        'live_preview': 'プレビュー：{words}語・{sentences}文・語彙の多様性 {diversity:.0%}',
+        'streaming_emotion': 'ももが感じ取ったこと',
+        'analysis_incomplete': 'AI分析の一部を完了できなかったため、既定値を使用しました。',
         'choose_input_method': '入力方法を選択してください：',
         'download_weekly_report': '週間レポートをダウンロード（PDF）',
         'download_csv_export': 'CSVエクスポートをダウンロード',